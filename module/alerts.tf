@@ -289,6 +289,41 @@ resource "google_monitoring_metric_descriptor" "gdc-api-connectivity-descriptor"
   }
 }
 
+resource "google_monitoring_metric_descriptor" "gdc-watcher-concurrency-limit-descriptor" {
+  description  = "Adaptive concurrency limit of the API calls made by the watchers"
+  display_name = "GDC Watcher Concurrency Limit"
+  type         = "custom.googleapis.com/gdc_watcher_concurrency_limit"
+  metric_kind  = "GAUGE"
+  value_type   = "INT64"
+  unit         = "1"
+
+  labels {
+    key         = "api"
+    value_type  = "STRING"
+    description = "The API name (e.g. hwm or edgecontainer)"
+  }
+  labels {
+    key         = "watcher"
+    value_type  = "STRING"
+    description = "The watcher reporting the limit (zone_watcher or cluster_watcher)"
+  }
+}
+
+resource "google_monitoring_metric_descriptor" "gdc-watcher-duplicate-builds-suppressed-descriptor" {
+  description  = "Builds not triggered by a watcher run because their zone already had a build in flight"
+  display_name = "GDC Watcher Duplicate Builds Suppressed"
+  type         = "custom.googleapis.com/gdc_watcher_duplicate_builds_suppressed"
+  metric_kind  = "GAUGE"
+  value_type   = "INT64"
+  unit         = "1"
+
+  labels {
+    key         = "watcher"
+    value_type  = "STRING"
+    description = "The watcher reporting the count (zone_watcher)"
+  }
+}
+
 resource "google_monitoring_alert_policy" "gdc-api-connectivity-alert" {
   depends_on = [ google_monitoring_metric_descriptor.gdc-api-connectivity-descriptor ]
   display_name = "GDC API Connectivity Failure Alert"
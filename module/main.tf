@@ -260,6 +260,22 @@ resource "google_project_iam_member" "zone-watcher-agent-secret-accessor" {
   member  = google_service_account.zone-watcher-agent.member
 }
 
+# Watcher state (intent snapshots, sweep cursors, build history checkpoints) kept between runs,
+# in a bucket of its own so the watchers cannot touch the build inputs of the provisioner bucket
+resource "google_storage_bucket" "watcher-state-bucket" {
+  name          = "gdce-watcher-state-${var.environment}-${random_id.main.hex}"
+  location      = "US"
+  storage_class = "STANDARD"
+
+  uniform_bucket_level_access = true
+}
+
+resource "google_storage_bucket_iam_member" "zone-watcher-agent-state-store" {
+  bucket = google_storage_bucket.watcher-state-bucket.name
+  role   = "roles/storage.objectUser"
+  member = google_service_account.zone-watcher-agent.member
+}
+
 resource "google_service_account_iam_member" "gdce-provisioning-agent-token-user" {
   service_account_id = google_service_account.gdce-provisioning-agent.name
   role               = "roles/iam.serviceAccountUser"
@@ -332,6 +348,8 @@ resource "google_cloudfunctions2_function" "zone-watcher" {
       GIT_SECRET_ID                             = var.git_secret_id
       MAX_RETRIES                               = var.cluster_creation_max_retries
       MAX_WORKERS                               = "20"
+      RUN_DEADLINE_SECONDS                      = "50" # leaves 10s of the 60s timeout to report and save state
+      STATE_STORE_URI                           = "gs://${google_storage_bucket.watcher-state-bucket.name}/watcher-state" # lets the next run resume the sweep
     }
     service_account_email = google_service_account.zone-watcher-agent.email
     vpc_connector         = var.vpc_connector
@@ -406,6 +424,8 @@ resource "google_cloudfunctions2_function" "cluster-watcher" {
       PROJECT_ID_SECRETS                        = var.project_id_secrets
       GIT_SECRET_ID                             = var.git_secret_id
       MAX_WORKERS                               = "20"
+      RUN_DEADLINE_SECONDS                      = "50" # leaves 10s of the 60s timeout to report and save state
+      STATE_STORE_URI                           = "gs://${google_storage_bucket.watcher-state-bucket.name}/watcher-state" # lets the next run resume the sweep
     }
     service_account_email = google_service_account.zone-watcher-agent.email
     vpc_connector         = var.vpc_connector
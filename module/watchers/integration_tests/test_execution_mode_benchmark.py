@@ -0,0 +1,173 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import time
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock
+
+from google.auth import credentials as google_credentials
+from google.cloud import edgecontainer
+from google.cloud.gdchardwaremanagement_v1alpha import Zone
+
+auth_patch = mock.patch('google.auth.default')
+mock_auth = auth_patch.start()
+mock_auth.return_value = (mock.MagicMock(spec=google_credentials.Credentials), "mock-project")
+
+clients_patch = mock.patch('src.clients.GoogleClients')
+clients_patch.start()
+
+from src import main
+
+auth_patch.stop()
+clients_patch.stop()
+
+# Latencies of test_watcher_timing.py
+GET_ZONE_LATENCY = 0.5
+LIST_MACHINES_PER_MACHINE_LATENCY = 0.05
+STORES_PER_LOCATION = 20
+
+class AsyncPager:
+    def __init__(self, items):
+        self.items = items
+
+    async def __aiter__(self):
+        for item in self.items:
+            yield item
+
+class Store:
+    zone_name = None
+    node_count = 1
+    sync_branch = "main"
+    recreate_on_delete = False
+
+    def __init__(self, cluster_name):
+        self.cluster_name = cluster_name
+        self.intent_hash = cluster_name
+
+class TestExecutionModeBenchmark(unittest.TestCase):
+
+    @unittest.skipUnless(os.environ.get('RUN_PERF_TEST'), "Skipping perf test")
+    def test_threads_against_asyncio(self):
+        """
+        Runs the zone watcher against mocked EdgeContainer and HWM APIs, with the latencies
+        of test_watcher_timing.py, at 1k and 10k stores in the threads (max_workers=100)
+        and asyncio execution modes. Every cluster already exists so no build is triggered.
+        """
+        for number_of_stores in (1000, 10000):
+            intent = generate_intent(number_of_stores)
+            durations = {}
+
+            for execution_mode in ("threads", "asyncio"):
+                main.zone_cache.invalidate()
+                start = time.perf_counter()
+                result = run_zone_watcher(intent, execution_mode)
+                durations[execution_mode] = time.perf_counter() - start
+
+                self.assertEqual(result, "total zones triggered = 0, sweep complete = True")
+
+            print(f"stores={number_of_stores}: threads={durations['threads']:0.2f}s, asyncio={durations['asyncio']:0.2f}s")
+
+def generate_intent(number_of_stores):
+    intent = {}
+    for i in range(number_of_stores):
+        location = (f"project-{i // (STORES_PER_LOCATION * 10)}", f"region-{(i // STORES_PER_LOCATION) % 10}")
+        intent.setdefault(location, {})[f"store{i}"] = Store(f"cluster{i}")
+    return intent
+
+def get_machines(intent, parent):
+    _, project, _, location = parent.split("/")
+    return [
+        edgecontainer.Machine(zone=f"zone-{store_id}", hosted_node=f"projects/{project}/locations/{location}/clusters/{store.cluster_name}/nodePools/np/nodes/n")
+        for store_id, store in intent[(project, location)].items()
+    ]
+
+def get_zones(intent, parent):
+    _, project, _, location = parent.split("/")
+    return [
+        Zone(name=f"{parent}/zones/{store_id}", globally_unique_id=f"zone-{store_id}", state=Zone.State.ACTIVE, cluster_intent_verified=True)
+        for store_id in intent[(project, location)]
+    ]
+
+def common_location_path(project, location):
+    return f"projects/{project}/locations/{location}"
+
+def run_zone_watcher(intent, execution_mode):
+    params = MagicMock()
+    params.project_id = "test-project"
+    params.execution_mode = execution_mode
+    params.max_workers = 100
+    params.store_chunk_size = 100
+    params.async_max_concurrency = 1000
+    params.build_trigger_rate = 100
+    params.build_trigger_burst = 100
+    params.max_builds_in_flight = 100
+    params.max_verify_signals_in_flight = 10
+    params.adaptive_concurrency = False
+    params.state_store_uri = None
+    params.full_sweep_interval = 1
+    params.verify_operation_max_age_seconds = 3600
+    params.source_of_truth_retry_backoff = 0.5
+    params.source_of_truth_retries = 3
+    params.git_token_cache_ttl_seconds = 300
+    params.intent_memo_max_entries = 100000
+    params.source_of_truth_cache_dir = None
+    params.zone_cache_ttl_seconds = 60
+    params.trigger_id_cache_ttl_seconds = 600
+    params.run_deadline_seconds = None
+
+    def list_machines(request):
+        machines = get_machines(intent, request.parent)
+        time.sleep(LIST_MACHINES_PER_MACHINE_LATENCY * len(machines))
+        return machines
+
+    async def list_machines_async(request):
+        machines = get_machines(intent, request.parent)
+        await asyncio.sleep(LIST_MACHINES_PER_MACHINE_LATENCY * len(machines))
+        return AsyncPager(machines)
+
+    def list_zones(request):
+        time.sleep(GET_ZONE_LATENCY)
+        return get_zones(intent, request.parent)
+
+    async def list_zones_async(request):
+        await asyncio.sleep(GET_ZONE_LATENCY)
+        return AsyncPager(get_zones(intent, request.parent))
+
+    ec_client = MagicMock()
+    ec_client.common_location_path.side_effect = common_location_path
+    ec_client.list_machines.side_effect = list_machines
+    hw_client = MagicMock()
+    hw_client.list_zones.side_effect = list_zones
+
+    async_clients = MagicMock()
+    async_clients.close = mock.AsyncMock()
+    async_clients.get_edgecontainer_client.return_value.common_location_path = common_location_path
+    async_clients.get_edgecontainer_client.return_value.list_machines = list_machines_async
+    async_clients.get_hardware_management_client.return_value.list_zones = list_zones_async
+    async_clients.get_monitoring_client.return_value = mock.AsyncMock()
+
+    builds = MagicMock()
+    builds.should_retry_zone_build.return_value = False
+
+    with mock.patch('src.main.WatcherSettings', return_value=params), \
+            mock.patch('src.main.read_intent_data', return_value=intent), \
+            mock.patch('src.main.BuildHistory', return_value=builds), \
+            mock.patch('src.main.clients.get_edgecontainer_client', return_value=ec_client), \
+            mock.patch('src.acp_zone.clients.get_hardware_management_client', return_value=hw_client), \
+            mock.patch('src.main.clients.get_monitoring_client'), \
+            mock.patch('src.main.AsyncGoogleClients', return_value=async_clients):
+        return main.zone_watcher(MagicMock())
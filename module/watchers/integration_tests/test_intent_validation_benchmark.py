@@ -0,0 +1,85 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+import unittest
+
+from src.bulk_validation import BulkIntentValidator
+from src.cluster_intent_model import SourceOfTruthModel
+
+class TestIntentValidationBenchmark(unittest.TestCase):
+
+    @unittest.skipUnless(os.environ.get('RUN_PERF_TEST'), "Skipping perf test")
+    def test_bulk_validation_against_per_row_validation(self):
+        """
+        Compares per-row pydantic validation of the cluster intent with the column-wise
+        bulk validator, at 10k, 50k and 100k rows. Rows are validated in batches of 1,000
+        like read_intent_data does.
+        """
+        batch_size = 1000
+        validator = BulkIntentValidator()
+
+        for number_of_rows in (10000, 50000, 100000):
+            rows = generate_cluster_intent_rows(number_of_rows)
+
+            start = time.perf_counter()
+            per_row = [SourceOfTruthModel.model_validate(row) for row in rows]
+            per_row_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            bulk = []
+            for i in range(0, number_of_rows, batch_size):
+                bulk.extend(validator.validate(rows[i:i + batch_size]))
+            bulk_seconds = time.perf_counter() - start
+
+            print(f"rows={number_of_rows}: per-row={per_row_seconds:0.2f}s, bulk={bulk_seconds:0.2f}s, speedup={per_row_seconds / bulk_seconds:0.1f}x")
+
+            self.assertEqual(len(per_row), len(bulk))
+            self.assertNotIn(None, bulk)
+            self.assertEqual(per_row[-1].model_dump_json(), bulk[-1].model_dump_json())
+
+def generate_cluster_intent_rows(number_of_rows):
+    rows = []
+
+    for i in range(number_of_rows):
+        rows.append({
+            "store_id": f"store-{i}",
+            "zone_name": "",
+            "machine_project_id": f"machine-project-{i % 10}",
+            "fleet_project_id": f"fleet-project-{i % 10}",
+            "cluster_name": f"cluster-{i}",
+            "location": f"region-{i % 5}",
+            "node_count": "3",
+            "cluster_ipv4_cidr": "10.0.0.0/17",
+            "services_ipv4_cidr": "10.1.0.0/20",
+            "external_load_balancer_ipv4_address_pools": "10.100.20.100-10.100.20.110",
+            "sync_repo": "https://github.com/org/repo",
+            "sync_branch": "main",
+            "sync_dir": f"clusters/cluster-{i}",
+            "secrets_project_id": "secrets-project",
+            "git_token_secrets_manager_name": "git-sec",
+            "cluster_version": "1.12.0",
+            "maintenance_window_start": "2024-01-01T00:00:00Z",
+            "maintenance_window_end": "2024-01-01T04:00:00Z",
+            "maintenance_window_recurrence": "FREQ=WEEKLY;BYDAY=SA",
+            "maintenance_exclusion_name_1": "",
+            "maintenance_exclusion_start_1": "",
+            "maintenance_exclusion_end_1": "",
+            "subnet_vlans": "100,200",
+            "recreate_on_delete": "false",
+            "enable_robin_cns": "",
+        })
+
+    return rows
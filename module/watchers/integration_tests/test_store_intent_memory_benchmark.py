@@ -0,0 +1,53 @@
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import os
+import tracemalloc
+import unittest
+
+from src.cluster_intent_model import SourceOfTruthModel
+from src.store_intent import StoreIntent
+from integration_tests.test_intent_validation_benchmark import generate_cluster_intent_rows
+
+class TestStoreIntentMemoryBenchmark(unittest.TestCase):
+
+    @unittest.skipUnless(os.environ.get('RUN_PERF_TEST'), "Skipping perf test")
+    def test_store_intent_footprint(self):
+        """
+        Compares the memory retained per store when the cluster intent is held as
+        SourceOfTruthModel instances with the memory retained as StoreIntent records.
+        """
+        number_of_rows = 50000
+
+        for label, build in (
+            ("SourceOfTruthModel", lambda row: SourceOfTruthModel.model_validate(row)),
+            ("StoreIntent", lambda row: StoreIntent.from_model(SourceOfTruthModel.model_validate(row))),
+        ):
+            rows = generate_cluster_intent_rows(number_of_rows)
+            for row in rows:
+                row["intent_hash"] = "0" * 64
+
+            gc.collect()
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            intent = [build(row) for row in rows]
+            del rows
+            gc.collect()
+            after, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{label}: {(after - before) / number_of_rows:0.0f} bytes per store, {(after - before) / 2**20:0.1f} MiB for {number_of_rows} stores")
+            self.assertEqual(len(intent), number_of_rows)
+            del intent
@@ -33,3 +33,18 @@ def get_memberships(project_id: str, region: str) -> Dict[str, ACPMembership]:
         )
 
     return memberships
+
+async def get_memberships_async(client: gkehub_v1.GkeHubAsyncClient, project_id: str, region: str) -> Dict[str, ACPMembership]:
+    """asyncio counterpart of `get_memberships`."""
+    request = gkehub_v1.ListMembershipsRequest(
+        parent=f"projects/{project_id}/locations/global"
+    )
+
+    memberships = {}
+
+    async for membership in await client.list_memberships(request):
+        memberships[membership.name] = ACPMembership(
+            labels=membership.labels
+        )
+
+    return memberships
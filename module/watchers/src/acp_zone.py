@@ -1,5 +1,10 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 from google.cloud import gdchardwaremanagement_v1alpha
 from .clients import GoogleClients
 
@@ -18,7 +23,127 @@ class ACPZone:
     globally_unique_id: str
     cluster_intent_verified: bool
 
-def get_zones(project_id: str, region: str) -> Dict[str, ACPZone]:
+class ZoneCache:
+    """
+    Process-wide TTL cache of HWM zone listings keyed by (project, region).
+
+    Listings are single-flight: concurrent callers asking for the same key while
+    it is being listed wait for that call instead of issuing their own. Errors
+    are not cached. Invalidating a key also detaches a listing in flight, so a
+    listing started before a zone was signalled never repopulates the cache.
+    `get_async` is the single-flight lookup for callers on an event loop. Its
+    listings in flight are keyed by event loop, as a task cannot be awaited from
+    another loop, e.g. that of a later asyncio run of a warm instance.
+    """
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, str], Tuple[Dict[str, 'ACPZone'], float]] = {}
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+        self._in_flight_async: Dict[Tuple[asyncio.AbstractEventLoop, Tuple[str, str]], asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str], load: Callable[[], Dict[str, 'ACPZone']]) -> Dict[str, 'ACPZone']:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                return entry[0]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            zones = load()
+        except Exception as err:
+            with self._lock:
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+            future.set_exception(err)
+            raise
+
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+                if self.ttl_seconds > 0:
+                    self._entries[key] = (zones, time.monotonic() + self.ttl_seconds)
+        future.set_result(zones)
+
+        return zones
+
+    async def get_async(self, key: Tuple[str, str], load: Callable[[], Awaitable[Dict[str, 'ACPZone']]]) -> Dict[str, 'ACPZone']:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                return entry[0]
+
+            in_flight_key = (asyncio.get_running_loop(), key)
+            task = self._in_flight_async.get(in_flight_key)
+            if task is None or task.done():
+                task = asyncio.ensure_future(self._load_async(in_flight_key, load))
+                # Forgets the task however it ends, even if it is cancelled before it starts
+                task.add_done_callback(functools.partial(self._forget_async, in_flight_key))
+                self._in_flight_async[in_flight_key] = task
+
+        return await task
+
+    async def _load_async(self, in_flight_key: Tuple[asyncio.AbstractEventLoop, Tuple[str, str]], load: Callable[[], Awaitable[Dict[str, 'ACPZone']]]) -> Dict[str, 'ACPZone']:
+        zones = await load()
+
+        with self._lock:
+            if self._in_flight_async.get(in_flight_key) is asyncio.current_task() and self.ttl_seconds > 0:
+                self._entries[in_flight_key[1]] = (zones, time.monotonic() + self.ttl_seconds)
+
+        return zones
+
+    def _forget_async(self, in_flight_key: Tuple[asyncio.AbstractEventLoop, Tuple[str, str]], task: asyncio.Task):
+        with self._lock:
+            if self._in_flight_async.get(in_flight_key) is task:
+                del self._in_flight_async[in_flight_key]
+
+    def invalidate(self, project_id: Optional[str] = None, region: Optional[str] = None):
+        """Drops the listing of a (project, region), or every listing if no project is given."""
+        with self._lock:
+            if project_id is None:
+                self._entries.clear()
+                self._in_flight.clear()
+                self._in_flight_async.clear()
+            else:
+                self._entries.pop((project_id, region), None)
+                self._in_flight.pop((project_id, region), None)
+                for in_flight_key in [in_flight_key for in_flight_key in self._in_flight_async if in_flight_key[1] == (project_id, region)]:
+                    del self._in_flight_async[in_flight_key]
+
+zone_cache = ZoneCache()
+
+def get_zones(project_id: str, region: str, force_refresh: bool = False) -> Dict[str, ACPZone]:
+    """
+    Returns the zones of a project and region, from the process-wide zone cache
+    unless `force_refresh` is set. The returned dict is shared and must not be modified.
+    """
+    if force_refresh:
+        zone_cache.invalidate(project_id, region)
+
+    return zone_cache.get((project_id, region), lambda: _list_zones(project_id, region))
+
+async def get_zones_async(
+    client: gdchardwaremanagement_v1alpha.GDCHardwareManagementAsyncClient,
+    project_id: str,
+    region: str,
+    force_refresh: bool = False,
+) -> Dict[str, ACPZone]:
+    """asyncio counterpart of `get_zones`, sharing the same zone cache."""
+    if force_refresh:
+        zone_cache.invalidate(project_id, region)
+
+    return await zone_cache.get_async((project_id, region), lambda: _list_zones_async(client, project_id, region))
+
+def _list_zones(project_id: str, region: str) -> Dict[str, ACPZone]:
     """
     Handles querying for zones from the GDC HardwareManagement API.
     """
@@ -31,11 +156,30 @@ def get_zones(project_id: str, region: str) -> Dict[str, ACPZone]:
     zones = {}
 
     for zone in client.list_zones(request):
-        zones[zone.name] = ACPZone(
-            name=zone.name,
-            state=zone.state,
-            globally_unique_id=zone.globally_unique_id,
-            cluster_intent_verified=zone.cluster_intent_verified
-        )
+        zones[zone.name] = _to_acp_zone(zone)
+
+    return zones
+
+async def _list_zones_async(
+    client: gdchardwaremanagement_v1alpha.GDCHardwareManagementAsyncClient,
+    project_id: str,
+    region: str,
+) -> Dict[str, ACPZone]:
+    request = gdchardwaremanagement_v1alpha.ListZonesRequest(
+        parent=f"projects/{project_id}/locations/{region}"
+    )
+
+    zones = {}
+
+    async for zone in await client.list_zones(request):
+        zones[zone.name] = _to_acp_zone(zone)
 
     return zones
+
+def _to_acp_zone(zone: gdchardwaremanagement_v1alpha.Zone) -> ACPZone:
+    return ACPZone(
+        name=zone.name,
+        state=zone.state,
+        globally_unique_id=zone.globally_unique_id,
+        cluster_intent_verified=zone.cluster_intent_verified
+    )
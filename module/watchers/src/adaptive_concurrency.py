@@ -0,0 +1,130 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator
+from google.api_core import exceptions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+# Errors telling us to slow down, any other error leaves the limit untouched
+BACKOFF_ERRORS = (
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+)
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit of a single API.
+
+    Every call completing within `latency_threshold` seconds grows the limit by
+    1/limit, i.e. by about one per round of `limit` calls. Slower calls leave it
+    unchanged. Quota and unavailability errors halve it, once per round: calls
+    started before the last decrease do not decrease it again.
+    """
+
+    def __init__(self, name: str, initial_limit: int, min_limit: int = 1, max_limit: int = 100, latency_threshold: float = 2.0, decrease_factor: float = 0.5):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.decrease_factor = decrease_factor
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        with self._condition:
+            return int(self._limit)
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[None]:
+        """Waits until a call fits within the limit, then measures its outcome."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+        start = time.monotonic()
+        try:
+            yield
+        except BACKOFF_ERRORS:
+            self._on_backoff(start)
+            raise
+        except Exception:
+            self._release()
+            raise
+        else:
+            self._on_success(time.monotonic() - start)
+
+    def _on_success(self, latency: float):
+        with self._condition:
+            if latency <= self.latency_threshold:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _on_backoff(self, start: float):
+        with self._condition:
+            if start >= self._last_decrease:
+                self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+                self._last_decrease = time.monotonic()
+                logger.warning(f'Backing off {self.name} API calls, concurrency limit lowered to {int(self._limit)}')
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+class AdaptiveConcurrency:
+    """
+    Process-wide registry of the adaptive limits of each API, so warm instances
+    start from the limits learned by previous runs. When disabled, slots are
+    granted immediately and concurrency is only bounded by the thread pools.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.initial_limit = 1
+        self.max_limit = 100
+        self.latency_threshold = 2.0
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, initial_limit: int, max_limit: int, latency_threshold: float):
+        with self._lock:
+            if (initial_limit, max_limit, latency_threshold) != (self.initial_limit, self.max_limit, self.latency_threshold):
+                self._limiters.clear()
+            self.enabled = enabled
+            self.initial_limit = initial_limit
+            self.max_limit = max_limit
+            self.latency_threshold = latency_threshold
+
+    def get(self, api: str) -> AdaptiveLimiter:
+        with self._lock:
+            limiter = self._limiters.get(api)
+            if limiter is None:
+                limiter = AdaptiveLimiter(api, self.initial_limit, max_limit=self.max_limit, latency_threshold=self.latency_threshold)
+                self._limiters[api] = limiter
+            return limiter
+
+    @contextlib.contextmanager
+    def slot(self, api: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        with self.get(api).slot():
+            yield
+
+    def get_limits(self) -> Dict[str, int]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.limit for limiter in limiters}
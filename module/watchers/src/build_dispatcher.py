@@ -0,0 +1,190 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+from google.api_core import exceptions
+from google.cloud.devtools import cloudbuild
+from .sweep_cursor import RunDeadline
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+class TokenBucket:
+    """
+    Blocking token bucket allowing `rate` acquisitions per second on average,
+    with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        wait_seconds = self.reserve()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+    async def acquire_async(self):
+        wait_seconds = self.reserve()
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+
+def _get_dispatch_delay(bucket: Optional[TokenBucket], deadline: RunDeadline, backoff_seconds: float) -> Optional[float]:
+    """Seconds to wait before sending the next request, or None if the deadline expires first."""
+    delay = backoff_seconds + (bucket.reserve() if bucket else 0.0)
+    remaining = deadline.remaining()
+    if remaining is not None and delay >= remaining:
+        return None
+    return delay
+
+class BuildDispatcher:
+    """
+    Central dispatcher for Cloud Build trigger runs shared by the workers of a
+    watcher run. Requests are sent concurrently, at most `max_in_flight` at a
+    time and, if a `rate` is set, no faster than the token bucket allows.
+    Requests rejected with ResourceExhausted are retried with exponential
+    backoff and jitter; any other error fails the request.
+
+    `submit` returns a future resolving to True once the build was triggered,
+    False if it could not be, or None if the deadline of the run expired before
+    it was sent, so workers can count the zones they triggered and hand the
+    others back to the sweep.
+    """
+
+    def __init__(
+        self,
+        cb_client: cloudbuild.CloudBuildClient,
+        rate: Optional[float] = None,
+        burst: int = 5,
+        max_in_flight: int = 5,
+        max_attempts: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        deadline: Optional[RunDeadline] = None,
+    ):
+        self.cb_client = cb_client
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.deadline = deadline or RunDeadline(None)
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="build-dispatcher")
+
+    def submit(self, zone: str, request: cloudbuild.RunBuildTriggerRequest) -> concurrent.futures.Future:
+        return self._executor.submit(self._run, zone, request)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'BuildDispatcher':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _run(self, zone: str, request: cloudbuild.RunBuildTriggerRequest) -> Optional[bool]:
+        backoff = self.initial_backoff
+        sleep_seconds = 0.0
+
+        for attempt in range(1, self.max_attempts + 1):
+            delay = _get_dispatch_delay(self.bucket, self.deadline, sleep_seconds)
+            if delay is None:
+                logger.warning(f'Deadline reached, cloud build for {zone} was not triggered')
+                return None
+            if delay > 0:
+                time.sleep(delay)
+
+            try:
+                logger.info(f'triggering cloud build for {zone}')
+                logger.info(f'trigger: {request.name}')
+                self.cb_client.run_build_trigger(request=request)
+                return True
+            except exceptions.ResourceExhausted as err:
+                if attempt == self.max_attempts:
+                    logger.error(f'failed to trigger cloud build for {zone} after {attempt} attempts: {err}')
+                    return False
+
+                sleep_seconds = random.uniform(0, backoff)
+                logger.warning(f'Cloud Build quota exhausted triggering build for {zone}, retrying in {sleep_seconds:0.1f}s (attempt {attempt}/{self.max_attempts})')
+                backoff = min(backoff * 2, self.max_backoff)
+            except Exception as err:
+                logger.error(f'failed to trigger cloud build for {zone}')
+                logger.error(err)
+                return False
+
+        return False
+
+class AsyncBuildDispatcher:
+    """
+    asyncio counterpart of BuildDispatcher for the asyncio execution mode, with
+    the same rate limit, in-flight cap, ResourceExhausted retries and deadline.
+    """
+
+    def __init__(
+        self,
+        cb_client: cloudbuild.CloudBuildAsyncClient,
+        rate: Optional[float] = None,
+        burst: int = 5,
+        max_in_flight: int = 5,
+        max_attempts: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        deadline: Optional[RunDeadline] = None,
+    ):
+        self.cb_client = cb_client
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.deadline = deadline or RunDeadline(None)
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def trigger(self, zone: str, request: cloudbuild.RunBuildTriggerRequest) -> Optional[bool]:
+        backoff = self.initial_backoff
+        sleep_seconds = 0.0
+
+        for attempt in range(1, self.max_attempts + 1):
+            delay = _get_dispatch_delay(self.bucket, self.deadline, sleep_seconds)
+            if delay is None:
+                logger.warning(f'Deadline reached, cloud build for {zone} was not triggered')
+                return None
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                async with self._semaphore:
+                    logger.info(f'triggering cloud build for {zone}')
+                    logger.info(f'trigger: {request.name}')
+                    await self.cb_client.run_build_trigger(request=request)
+                return True
+            except exceptions.ResourceExhausted as err:
+                if attempt == self.max_attempts:
+                    logger.error(f'failed to trigger cloud build for {zone} after {attempt} attempts: {err}')
+                    return False
+
+                sleep_seconds = random.uniform(0, backoff)
+                logger.warning(f'Cloud Build quota exhausted triggering build for {zone}, retrying in {sleep_seconds:0.1f}s (attempt {attempt}/{self.max_attempts})')
+                backoff = min(backoff * 2, self.max_backoff)
+            except Exception as err:
+                logger.error(f'failed to trigger cloud build for {zone}')
+                logger.error(err)
+                return False
+
+        return False
@@ -1,12 +1,170 @@
+import concurrent.futures
+import datetime
 import logging
 import os
+import threading
+import time
+from dataclasses import dataclass, field
 from google.cloud.devtools import cloudbuild
 from google.cloud.devtools.cloudbuild import Build
-from typing import Dict
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+from .clients import GoogleClients
+from .state_store import StateStore
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
 
+clients = GoogleClients()
+
+# Statuses a build can still move on from, the checkpoint has to look at such builds again
+NON_TERMINAL_STATUSES = (
+    cloudbuild.Build.Status.STATUS_UNKNOWN,
+    cloudbuild.Build.Status.PENDING,
+    cloudbuild.Build.Status.QUEUED,
+    cloudbuild.Build.Status.WORKING,
+)
+
+# Statuses that settle the summary of a zone and intent hash, older builds do not change it
+NON_FAILURE_STATUSES = (
+    cloudbuild.Build.Status.QUEUED,
+    cloudbuild.Build.Status.PENDING,
+    cloudbuild.Build.Status.WORKING,
+    cloudbuild.Build.Status.SUCCESS,
+)
+
+# Statuses of a build that is still provisioning its zone
+IN_FLIGHT_STATUSES = (
+    cloudbuild.Build.Status.PENDING,
+    cloudbuild.Build.Status.QUEUED,
+    cloudbuild.Build.Status.WORKING,
+)
+
+# Substitutions the build summaries are computed from
+SUMMARY_SUBSTITUTIONS = ("_ZONE", "_INTENT_HASH", "_TRY_COUNT")
+
+@dataclass
+class BuildRecord:
+    """The part of a build the summaries are computed from, small enough to be checkpointed."""
+
+    id: str
+    status: Build.Status
+    substitutions: Dict[str, str] = field(default_factory=dict)
+    # Seconds since the epoch
+    create_time: float = 0.0
+
+    @classmethod
+    def from_build(cls, build: cloudbuild.Build) -> 'BuildRecord':
+        return cls(
+            id=build.id,
+            status=build.status,
+            substitutions={key: build.substitutions[key] for key in build.substitutions if key in SUMMARY_SUBSTITUTIONS},
+            create_time=_get_seconds(build.create_time),
+        )
+
+    @classmethod
+    def from_dict(cls, record: dict) -> 'BuildRecord':
+        return cls(
+            id=record["id"],
+            status=cloudbuild.Build.Status(record["status"]),
+            substitutions=record.get("substitutions", {}),
+            create_time=record.get("create_time", 0.0),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": int(self.status),
+            "substitutions": self.substitutions,
+            "create_time": self.create_time,
+        }
+
+class TriggerIdCache:
+    """
+    Process-wide TTL cache of the ids of the build triggers named after a
+    trigger name, keyed by (project, region, trigger name), so warm instances
+    skip listing every trigger of the project.
+    """
+
+    def __init__(self, ttl_seconds: float = 600):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, str, str], Tuple[List[str], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            trigger_ids, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+
+            return trigger_ids
+
+    def put(self, key: Tuple[str, str, str], trigger_ids: List[str]):
+        if self.ttl_seconds <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (trigger_ids, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, key: Optional[Tuple[str, str, str]] = None):
+        """Drops a single entry, or every entry if no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+trigger_id_cache = TriggerIdCache()
+
+def _get_trigger_filter(trigger_ids: List[str]) -> str:
+    return " OR ".join(f"trigger_id={trigger_id}" for trigger_id in trigger_ids)
+
+def _get_seconds(timestamp) -> float:
+    if not timestamp:
+        return 0.0
+    if isinstance(timestamp, datetime.datetime):
+        return timestamp.timestamp()
+    # google.protobuf.Timestamp
+    return timestamp.seconds + timestamp.nanos / 1e9
+
+def _format_timestamp(seconds: float) -> str:
+    return datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+class InFlightBuildIndex:
+    """
+    Zones with a build in flight: builds listed as queued or working, and builds
+    triggered by the current run. `claim` is checked and updated atomically so
+    the workers of a run never trigger a second build for a zone.
+    """
+
+    def __init__(self, zones: Iterable[str] = ()):
+        self._zones: Set[str] = set(zones)
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, zone: str) -> bool:
+        with self._lock:
+            return zone in self._zones
+
+    def claim(self, zone: str) -> bool:
+        """Records a build about to be triggered for a zone, returns False if one is already in flight."""
+        with self._lock:
+            if zone in self._zones:
+                self._suppressed += 1
+                return False
+            self._zones.add(zone)
+            return True
+
+    @property
+    def suppressed(self) -> int:
+        """Count of the builds not triggered because their zone had a build in flight."""
+        with self._lock:
+            return self._suppressed
+
 class BuildSummary:
     latest_non_failure_status: Build.Status = None
     retriable: bool = False
@@ -24,7 +182,7 @@ class BuildSummary:
         #    or when there are not enough free machines.
 
         # latest_non_failure_status will only be updated with non-failure statuses.
-        if build.status in (cloudbuild.Build.Status.QUEUED, cloudbuild.Build.Status.PENDING, cloudbuild.Build.Status.WORKING, cloudbuild.Build.Status.SUCCESS):
+        if build.status in NON_FAILURE_STATUSES:
             self.latest_non_failure_status = build.status
             self.retriable = False
         else:
@@ -32,15 +190,58 @@ class BuildSummary:
             self.retriable = True
 
 class BuildHistory:
-    def __init__(self, project_id: str, region: str, max_retries: int, trigger_name: str):
+    """
+    Summaries of the Cloud Build history of a trigger, per zone and intent hash.
+
+    Builds are listed newest first until the summary of every candidate intent
+    hash is settled by a non-failure build, or `max_builds` builds were listed.
+    Without candidates, and whenever the checkpoint of a state store is built
+    afresh, the last `max_builds` builds are listed.
+
+    With a state store, the builds the summaries depend on are checkpointed
+    along with a `create_time` high-water mark, and each run only lists the builds created
+    since then and merges them in. The mark never moves past a build that was
+    still running, so its final status is picked up by a later run, unless it
+    was created more than `max_pending_age_seconds` before the newest build,
+    e.g. a build waiting for an approval that never comes. If more than
+    `max_builds` builds were created since the mark, the history is listed as
+    on a first run. Finished builds of intent hashes not in `intent_hashes`,
+    the hashes of the current intent, are dropped from the checkpoint.
+    """
+
+    CHECKPOINT_KEY = "build_history_checkpoint"
+
+    def __init__(
+        self,
+        project_id: str,
+        region: str,
+        max_retries: int,
+        trigger_name: str,
+        store: Optional[StateStore] = None,
+        candidate_hashes: Optional[AbstractSet[str]] = None,
+        max_builds: int = 1000,
+        intent_hashes: Optional[AbstractSet[str]] = None,
+        max_pending_age_seconds: float = 86400,
+    ):
         self.project_id = project_id
         self.region = region
         self.max_retries = max_retries
         self.trigger_name = trigger_name
-        self.client = cloudbuild.CloudBuildClient()
-        self.builds: Dict[tuple[str, str], BuildSummary] = self._get_build_history()
+        self.store = store
+        self.candidate_hashes = candidate_hashes
+        self.max_builds = max_builds
+        self.intent_hashes = intent_hashes
+        self.max_pending_age_seconds = max_pending_age_seconds
+        self.client = clients.get_cloudbuild_client()
+        records = self._get_build_history()
+        self.in_flight = InFlightBuildIndex(
+            record.substitutions["_ZONE"]
+            for record in records
+            if record.status in IN_FLIGHT_STATUSES and record.substitutions.get("_ZONE")
+        )
+        self.builds: Dict[tuple[str, str], BuildSummary] = self._summarize(records)
 
-    def _get_build_history(self) ->Dict[tuple[str, str], BuildSummary]:
+    def _get_build_history(self) -> List[BuildRecord]:
         """
         Queries for Cloud Build history matching a specific trigger name.
 
@@ -48,47 +249,220 @@ class BuildHistory:
             trigger_name: The name of the Cloud Build trigger.
 
         Returns:
-            A dictionary with the zone name and intent hash tuple as the key 
-            and the build summary which contains relevant information to 
-            determine if a retry should be triggered.
+            The builds of the trigger, newest first, from which the build
+            summaries and the in-flight builds are computed.
         """
+        key = (self.project_id, self.region, self.trigger_name)
+        trigger_ids = trigger_id_cache.get(key)
+        if trigger_ids is not None:
+            records = self._get_records(_get_trigger_filter(trigger_ids))
+            if records is not None:
+                return records
+            # The cached triggers may have been recreated since, resolve their ids again
+            logger.info(f"No builds found for the cached ids of trigger {self.trigger_name}, listing triggers again")
+            trigger_id_cache.invalidate(key)
+
+        trigger_ids = self._list_trigger_ids()
+        trigger_id_cache.put(key, trigger_ids)
+        return self._get_records(_get_trigger_filter(trigger_ids)) or []
+
+    def _list_trigger_ids(self) -> List[str]:
         trigger_request = cloudbuild.ListBuildTriggersRequest(
             project_id = self.project_id,
             parent = f"projects/{self.project_id}/locations/{self.region}"
         )
 
-        trigger_name_filter = ""
-
         triggers = self.client.list_build_triggers(trigger_request)
+        trigger_ids = [trigger.id for trigger in triggers if trigger.name == self.trigger_name]
 
-        for trigger in triggers:
-            if (trigger.name == self.trigger_name):
-                if trigger_name_filter == "":
-                    trigger_name_filter += f"trigger_id={trigger.id}"
-                else:
-                    trigger_name_filter += f" OR trigger_id={trigger.id}"
-
-        if trigger_name_filter == "":
+        if not trigger_ids:
             raise Exception(f"No triggers found named {self.trigger_name}")
 
-        request = cloudbuild.ListBuildsRequest(
+        return trigger_ids
+
+    def _get_records(self, trigger_name_filter: str) -> Optional[List[BuildRecord]]:
+        """
+        Returns the builds of the triggers newest first, or `None` if the whole
+        history was listed and holds no build of these triggers.
+        """
+        if self.store is not None:
+            return self._get_incremental_records(trigger_name_filter)
+
+        return self._list_records(self._get_request(trigger_name_filter), self.candidate_hashes) or None
+
+    def _get_request(self, request_filter: str) -> cloudbuild.ListBuildsRequest:
+        return cloudbuild.ListBuildsRequest(
             project_id=self.project_id,
-            filter=trigger_name_filter,
+            filter=request_filter,
             parent = f"projects/{self.project_id}/locations/{self.region}"
         )
 
-        page_result = self.client.list_builds(request=request)
+    def _list_records(self, request: cloudbuild.ListBuildsRequest, candidate_hashes: Optional[AbstractSet[str]] = None) -> List[BuildRecord]:
+        """
+        Lists builds newest first, up to `max_builds`, and stops paging as soon as
+        the summaries of all candidate intent hashes are settled.
+        """
+        # Intent hash -> zones whose builds listed so far all failed, None until a build of the hash is listed
+        waiting: Dict[str, Optional[Set[str]]] = dict.fromkeys(candidate_hashes or ())
+        settled: Set[tuple[str, str]] = set()
 
-        # Only page through last 1,000 builds
-        build_entries = 0
-        build_summary_dict: Dict[tuple[str, str], BuildSummary] = dict()
+        records = []
+        for response in self.client.list_builds(request=request):
+            if len(records) >= self.max_builds:
+                if waiting:
+                    logger.warning(f"Stopped listing builds after {self.max_builds} builds, {len(waiting)} candidate intent hashes are not settled")
+                break
 
-        for response in page_result:
-            build_entries += 1
+            record = BuildRecord.from_build(response)
+            records.append(record)
 
-            if build_entries > 1000:
-                break
+            zone = record.substitutions.get("_ZONE", "")
+            intent_hash = record.substitutions.get("_INTENT_HASH", "")
+            if not zone or intent_hash not in waiting or (zone, intent_hash) in settled:
+                continue
 
+            waiting_zones = waiting[intent_hash] or set()
+            if record.status in NON_FAILURE_STATUSES:
+                settled.add((zone, intent_hash))
+                waiting_zones.discard(zone)
+            else:
+                waiting_zones.add(zone)
+
+            if waiting_zones:
+                waiting[intent_hash] = waiting_zones
+            else:
+                del waiting[intent_hash]
+                if not waiting:
+                    logger.info(f"Build history of every candidate intent hash settled after {len(records)} builds")
+                    break
+
+        return records
+
+    def _get_incremental_records(self, trigger_name_filter: str) -> Optional[List[BuildRecord]]:
+        """
+        Returns the checkpointed builds merged with the builds created since the
+        checkpoint, newest first, and checkpoints them again. Without a usable
+        checkpoint the last `max_builds` builds are listed, and `None` is
+        returned if none were found. The candidate intent hashes never cut
+        that listing short: later runs only list the builds created since the
+        checkpoint, so the older builds of the other hashes would be lost.
+        """
+        checkpoint = self._load_checkpoint(trigger_name_filter)
+
+        listed: Optional[Dict[str, BuildRecord]] = None
+        if checkpoint is not None:
+            listed = self._list_since(trigger_name_filter, checkpoint["watermark"])
+            if listed is None:
+                logger.warning(f"More than {self.max_builds} builds created since the build history checkpoint, listing the whole build history")
+                checkpoint = None
+
+        if listed is None:
+            listed = {}
+            for record in self._list_records(self._get_request(trigger_name_filter)):
+                listed.setdefault(record.id, record)
+
+        stored = [] if checkpoint is None else [
+            BuildRecord.from_dict(record) for record in checkpoint["builds"] if record["id"] not in listed
+        ]
+        # Newer builds first, builds created in the same second keep the listing order
+        records = sorted([*listed.values(), *stored], key=lambda record: -record.create_time)
+        records = self._prune(records)
+
+        logger.info(f"Listed {len(listed)} builds since the build history checkpoint, {len(records)} builds kept")
+        self._save_checkpoint(trigger_name_filter, records, checkpoint["watermark"] if checkpoint is not None else 0.0)
+
+        if checkpoint is None and not listed:
+            return None
+
+        return records
+
+    def _list_since(self, trigger_name_filter: str, watermark: float) -> Optional[Dict[str, BuildRecord]]:
+        """Lists the builds created since the mark, or returns `None` if there are more than `max_builds`."""
+        # Builds created at the mark are listed again, they are merged by id
+        request = self._get_request(f'({trigger_name_filter}) AND create_time>="{_format_timestamp(watermark)}"')
+
+        # Every build created since the mark is needed to move the mark forward
+        listed: Dict[str, BuildRecord] = {}
+        for response in self.client.list_builds(request=request):
+            if len(listed) >= self.max_builds:
+                return None
+            listed.setdefault(response.id, BuildRecord.from_build(response))
+
+        return listed
+
+    def _prune(self, records: List[BuildRecord]) -> List[BuildRecord]:
+        """
+        Drops the builds that can no longer change a summary: builds without a
+        zone, finished builds of an intent hash no store has anymore, and the
+        builds of a zone and intent hash older than its newest successful build.
+        """
+        succeeded = set()
+        kept = []
+        for record in records:
+            zone = record.substitutions.get("_ZONE", "")
+            if not zone:
+                continue
+            intent_hash = record.substitutions.get("_INTENT_HASH", "")
+            # Builds still running keep their zone in flight whatever their intent hash
+            if self.intent_hashes is not None and intent_hash not in self.intent_hashes and record.status not in NON_TERMINAL_STATUSES:
+                continue
+            key = (zone, intent_hash)
+            if key in succeeded:
+                continue
+            if record.status == cloudbuild.Build.Status.SUCCESS:
+                succeeded.add(key)
+            kept.append(record)
+        return kept
+
+    def _load_checkpoint(self, trigger_name_filter: str) -> Optional[dict]:
+        try:
+            checkpoint = self.store.load(self.CHECKPOINT_KEY)
+        except Exception:
+            logger.exception(f"Unable to load build history checkpoint {self.CHECKPOINT_KEY}, listing the whole build history")
+            return None
+
+        if checkpoint is None:
+            return None
+
+        # A checkpoint of another trigger, e.g. after it was recreated, is of no use
+        if checkpoint.get("parent") != f"projects/{self.project_id}/locations/{self.region}" or checkpoint.get("filter") != trigger_name_filter:
+            logger.info("Build history checkpoint is for other triggers, listing the whole build history")
+            return None
+
+        return checkpoint
+
+    def _save_checkpoint(self, trigger_name_filter: str, records: List[BuildRecord], previous_watermark: float):
+        if records:
+            # Builds running for longer than this are given up on, their status would hold the mark forever
+            stale_before = records[0].create_time - self.max_pending_age_seconds
+            stale = {record.id for record in records if record.status in NON_TERMINAL_STATUSES and record.create_time < stale_before}
+            if stale:
+                logger.warning(f"Dropping {len(stale)} builds still not finished {self.max_pending_age_seconds}s after they were created from the build history checkpoint")
+                records = [record for record in records if record.id not in stale]
+
+        running = [record.create_time for record in records if record.status in NON_TERMINAL_STATUSES]
+        if running:
+            watermark = min(running)
+        elif records:
+            watermark = max(previous_watermark, records[0].create_time)
+        else:
+            watermark = previous_watermark
+
+        try:
+            self.store.save(self.CHECKPOINT_KEY, {
+                "parent": f"projects/{self.project_id}/locations/{self.region}",
+                "filter": trigger_name_filter,
+                "watermark": watermark,
+                "builds": [record.to_dict() for record in records],
+            })
+        except Exception:
+            logger.exception(f"Unable to save build history checkpoint {self.CHECKPOINT_KEY}")
+
+    def _summarize(self, records: Iterable[BuildRecord]) -> Dict[tuple[str, str], BuildSummary]:
+        """Computes the build summaries from builds ordered newest first."""
+        build_summary_dict: Dict[tuple[str, str], BuildSummary] = dict()
+
+        for response in records:
             zone = ""
             intent_hash = ""
 
@@ -118,12 +492,7 @@ class BuildHistory:
                 summary = BuildSummary()
                 
                 # Check if the absolute newest build failed
-                summary.latest_attempt_failed = response.status not in (
-                    cloudbuild.Build.Status.SUCCESS,
-                    cloudbuild.Build.Status.WORKING,
-                    cloudbuild.Build.Status.QUEUED,
-                    cloudbuild.Build.Status.PENDING
-                )
+                summary.latest_attempt_failed = response.status not in NON_FAILURE_STATUSES
                 
                 try_count_str = response.substitutions.get("_TRY_COUNT", "0")
                 summary.latest_try_count = int(try_count_str)
@@ -152,6 +521,20 @@ class BuildHistory:
             build = self.builds[key]
             return build.retriable
 
+    def get_retriable_intent_hashes(self) -> Set[str]:
+        """Returns the intent hashes with a build that should be retried, to process their stores first."""
+        return {intent_hash for (_, intent_hash), summary in self.builds.items() if summary.retriable}
+
+    def get_summary(self, zone_name: str, intent_hash: str) -> Optional[BuildSummary]:
+        return self.builds.get((zone_name, intent_hash))
+
+    def claim_zone_build(self, zone_name: str) -> bool:
+        """Returns False if the zone has a build in flight, otherwise records the build about to be triggered."""
+        return self.in_flight.claim(zone_name)
+
+    def get_suppressed_build_count(self) -> int:
+        return self.in_flight.suppressed
+
     def get_latest_try_count(self, zone_name: str, intent_hash: str) -> int:
         """
         Returns the latest try count for a zone and intent hash.
@@ -161,5 +544,32 @@ class BuildHistory:
             return 0
         return self.builds[key].latest_try_count
 
-        
-        
\ No newline at end of file
+class LazyBuildHistory:
+    """
+    Build history loading in the background, e.g. while machines are listed.
+    Lookups block until it is loaded and raise the error it failed with, if any.
+    """
+
+    def __init__(self, future: concurrent.futures.Future):
+        self.future = future
+
+    def result(self) -> BuildHistory:
+        return self.future.result()
+
+    def should_retry_zone_build(self, zone_name: str, intent_hash: str):
+        return self.result().should_retry_zone_build(zone_name, intent_hash)
+
+    def get_retriable_intent_hashes(self) -> Set[str]:
+        return self.result().get_retriable_intent_hashes()
+
+    def get_summary(self, zone_name: str, intent_hash: str) -> Optional[BuildSummary]:
+        return self.result().get_summary(zone_name, intent_hash)
+
+    def get_latest_try_count(self, zone_name: str, intent_hash: str) -> int:
+        return self.result().get_latest_try_count(zone_name, intent_hash)
+
+    def claim_zone_build(self, zone_name: str) -> bool:
+        return self.result().claim_zone_build(zone_name)
+
+    def get_suppressed_build_count(self) -> int:
+        return self.result().get_suppressed_build_count()
@@ -0,0 +1,154 @@
+import re
+import typing
+from ipaddress import IPv4Network
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import BaseModel, StringConstraints
+from .cluster_intent_model import SourceOfTruthModel
+
+# Strings accepted by pydantic in lax mode for booleans (compared case-insensitively)
+_TRUE_VALUES = {"1", "on", "t", "true", "y", "yes"}
+_FALSE_VALUES = {"0", "off", "f", "false", "n", "no"}
+
+_INT_PATTERN = re.compile(r"-?[0-9]+")
+
+_MISSING = object()
+
+class _Fallback(Exception):
+    """A value the bulk validator cannot vouch for, the row is handed to pydantic instead."""
+
+def _to_none(value: Any) -> Any:
+    # Mirrors SourceOfTruthModel.convert_to_none
+    if value is None or (isinstance(value, str) and value.strip() == ""):
+        return None
+    return value
+
+def _build_str_parser(constraints: Optional[StringConstraints]) -> Callable[[str], str]:
+    pattern = re.compile(constraints.pattern) if constraints and constraints.pattern else None
+    min_length = constraints.min_length if constraints and constraints.min_length is not None else 0
+    max_length = constraints.max_length if constraints and constraints.max_length is not None else None
+
+    def parse(value):
+        if not isinstance(value, str):
+            raise _Fallback()
+        if len(value) < min_length or (max_length is not None and len(value) > max_length):
+            raise _Fallback()
+        if pattern and not pattern.match(value):
+            raise _Fallback()
+        return value
+
+    return parse
+
+def _parse_int(value):
+    if not isinstance(value, str) or not _INT_PATTERN.fullmatch(value):
+        raise _Fallback()
+    return int(value)
+
+def _parse_bool(value):
+    if not isinstance(value, str):
+        raise _Fallback()
+    lowered = value.lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    raise _Fallback()
+
+def _parse_ipv4_network(value):
+    if not isinstance(value, str):
+        raise _Fallback()
+    try:
+        return IPv4Network(value)
+    except ValueError:
+        raise _Fallback()
+
+def _build_column_parser(annotation, metadata: List[Any], required: bool) -> Callable[[Any], Any]:
+    if typing.get_origin(annotation) is typing.Union:
+        # Optional[X]
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+    if typing.get_origin(annotation) is typing.Annotated:
+        annotation, *extra_metadata = typing.get_args(annotation)
+        metadata = [*metadata, *extra_metadata]
+
+    constraints = next((m for m in metadata if isinstance(m, StringConstraints)), None)
+
+    if annotation is str:
+        parse_value = _build_str_parser(constraints)
+    elif annotation is int:
+        parse_value = _parse_int
+    elif annotation is bool:
+        parse_value = _parse_bool
+    elif annotation is IPv4Network:
+        parse_value = _parse_ipv4_network
+    else:
+        raise ValueError(f"Unsupported field type for bulk validation: {annotation}")
+
+    def parse(value):
+        value = _to_none(value)
+        if value is None:
+            if required:
+                raise _Fallback()
+            return None
+        return parse_value(value)
+
+    return parse
+
+class BulkIntentValidator:
+    """
+    Validates cluster intent rows a column at a time instead of a row at a time.
+
+    Every column is checked with a single parser built from the model's field
+    definitions, and each distinct value of a column is only parsed once (many
+    rows share CIDRs, branches, versions...). Rows passing every column check
+    are built with `model_construct`, which yields the same model, and the same
+    `model_dump_json` output, as `model_validate`. Any row the bulk checks
+    cannot vouch for is returned as `None` and must go through `model_validate`,
+    which also produces the detailed error to report for invalid rows.
+    """
+
+    def __init__(self, model: type[BaseModel] = SourceOfTruthModel):
+        self.model = model
+        self.parsers: Dict[str, Callable[[Any], Any]] = {
+            name: _build_column_parser(field.annotation, field.metadata, field.is_required())
+            for name, field in model.model_fields.items()
+        }
+
+    def validate(self, rows: List[Dict[str, Any]]) -> List[Optional[BaseModel]]:
+        valid = [all(isinstance(key, str) for key in row) for row in rows]
+        columns: Dict[str, List[Any]] = {}
+
+        for name, parse in self.parsers.items():
+            values = [row.get(name, _MISSING) for row in rows]
+
+            parsed_values = {}
+            for value in set(values):
+                if value is _MISSING:
+                    # Missing columns take the field default, like model_validate
+                    parsed_values[value] = (not self.model.model_fields[name].is_required(), self.model.model_fields[name].default)
+                    continue
+                try:
+                    parsed_values[value] = (True, parse(value))
+                except _Fallback:
+                    parsed_values[value] = (False, None)
+
+            column = []
+            for i, value in enumerate(values):
+                ok, parsed = parsed_values[value]
+                if not ok:
+                    valid[i] = False
+                column.append(parsed)
+            columns[name] = column
+
+        results = []
+        for i, row in enumerate(rows):
+            if not valid[i]:
+                results.append(None)
+                continue
+
+            # Declared fields use the parsed value, extra columns are carried over untouched
+            values = {name: column[i] for name, column in columns.items()}
+            for key, value in row.items():
+                if key not in values:
+                    values[key] = value
+            results.append(self.model.model_construct(**values))
+
+        return results
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from google.api_core import client_options
 import google.auth
 from google.cloud import (
@@ -8,6 +9,7 @@ from google.cloud import (
     gkehub_v1,
     monitoring_v3,
     secretmanager,
+    storage,
 )
 from google.cloud.devtools import cloudbuild
 from urllib.parse import urlparse
@@ -48,6 +50,7 @@ class GoogleClients:
         self.secret_manager_client = secretmanager.SecretManagerServiceClient()
         self.cb_client = cloudbuild.CloudBuildClient()
         self.monitoring_client = monitoring_v3.MetricServiceClient()
+        self.storage_client = storage.Client()
 
     def get_edgecontainer_client(self) -> edgecontainer.EdgeContainerClient:
         return self.ec_client
@@ -68,4 +71,51 @@ class GoogleClients:
         return self.cb_client
     
     def get_monitoring_client(self) -> monitoring_v3.MetricServiceClient:
-        return self.monitoring_client
\ No newline at end of file
+        return self.monitoring_client
+
+    def get_storage_client(self) -> storage.Client:
+        return self.storage_client
+
+
+class AsyncGoogleClients:
+    """
+    Async GAPIC clients used by the asyncio execution mode. The gRPC channels of
+    async clients are bound to the event loop they are created in, so a new
+    instance has to be created, and closed, by every asyncio run.
+    """
+
+    def __init__(self) -> None:
+        self.ec_client = edgecontainer.EdgeContainerAsyncClient(client_options=_get_client_options("EDGE_CONTAINER_API_ENDPOINT_OVERRIDE"))
+        self.en_client = edgenetwork.EdgeNetworkAsyncClient(client_options=_get_client_options("EDGE_NETWORK_API_ENDPOINT_OVERRIDE"))
+        self.gkehub_client = gkehub_v1.GkeHubAsyncClient(client_options=_get_client_options("GKEHUB_API_ENDPOINT_OVERRIDE"))
+        self.hw_mgmt_client = gdchardwaremanagement_v1alpha.GDCHardwareManagementAsyncClient(client_options=_get_client_options("HARDWARE_MANAGEMENT_API_ENDPOINT_OVERRIDE"))
+        self.cb_client = cloudbuild.CloudBuildAsyncClient()
+        self.monitoring_client = monitoring_v3.MetricServiceAsyncClient()
+
+    def get_edgecontainer_client(self) -> edgecontainer.EdgeContainerAsyncClient:
+        return self.ec_client
+
+    def get_edgenetwork_client(self) -> edgenetwork.EdgeNetworkAsyncClient:
+        return self.en_client
+
+    def get_gkehub_client(self) -> gkehub_v1.GkeHubAsyncClient:
+        return self.gkehub_client
+
+    def get_hardware_management_client(self) -> gdchardwaremanagement_v1alpha.GDCHardwareManagementAsyncClient:
+        return self.hw_mgmt_client
+
+    def get_cloudbuild_client(self) -> cloudbuild.CloudBuildAsyncClient:
+        return self.cb_client
+
+    def get_monitoring_client(self) -> monitoring_v3.MetricServiceAsyncClient:
+        return self.monitoring_client
+
+    async def close(self):
+        for client in (self.ec_client, self.en_client, self.gkehub_client, self.hw_mgmt_client, self.cb_client, self.monitoring_client):
+            await client.transport.close()
+
+def _get_client_options(endpoint_override_variable: str) -> Optional[client_options.ClientOptions]:
+    endpoint_override = os.environ.get(endpoint_override_variable)
+    if endpoint_override:
+        return client_options.ClientOptions(api_endpoint=urlparse(endpoint_override).netloc)
+    return None
@@ -1,4 +1,4 @@
-from typing import Optional, Annotated, Iterable
+from typing import List, Optional, Annotated, Iterable, Tuple
 from pydantic import BaseModel, ConfigDict, StringConstraints, validator
 from ipaddress import IPv4Network
 
@@ -55,3 +55,20 @@ class SourceOfTruthModel(BaseModel):
             return None
         else:
             return v
+
+    def get_maintenance_exclusions(self) -> List[Tuple[str, str, str]]:
+        """
+            Returns the (name, start, end) of every fully defined maintenance exclusion
+        """
+        exclusions = []
+
+        for i in range(3):
+            exclusion_name = getattr(self, f"maintenance_exclusion_name_{i+1}")
+            exclusion_start = getattr(self, f"maintenance_exclusion_start_{i+1}")
+            exclusion_end = getattr(self, f"maintenance_exclusion_end_{i+1}")
+
+            # Only consider exclusions that are fully defined
+            if (exclusion_name and exclusion_start and exclusion_end):
+                exclusions.append((exclusion_name, exclusion_start, exclusion_end))
+
+        return exclusions
@@ -0,0 +1,151 @@
+import io
+import os
+from email.utils import formatdate
+from typing import Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+# Transient statuses worth retrying, auth failures and 404s are returned as is
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class GitProvider:
+    """
+    Builds the URL and headers to download a single file of a repository at a
+    given branch. The repository URL is parsed once when the provider is created.
+    """
+
+    def __init__(self, repo_path: str, branch: str, token: Optional[str]):
+        self.repo_path = repo_path
+        self.branch = branch
+        self.token = token
+
+    def get_url(self, path: str) -> str:
+        raise NotImplementedError
+
+    def get_headers(self) -> CaseInsensitiveDict:
+        return CaseInsensitiveDict()
+
+class GitHubProvider(GitProvider):
+    """Downloads files from raw.githubusercontent.com, authenticated with the token."""
+
+    def get_url(self, path: str) -> str:
+        return f"https://raw.githubusercontent.com{self.repo_path}/{self.branch}/{path}"
+
+    def get_headers(self) -> CaseInsensitiveDict:
+        headers = CaseInsensitiveDict()
+        headers["Authorization"] = f"token {self.token}"
+        return headers
+
+class GitLabProvider(GitProvider):
+    """Downloads files through the GitLab repository files API."""
+
+    def get_url(self, path: str) -> str:
+        # projectid is url encoded: org%2Fproject%2Frepo_name
+        project_id = self.repo_path[1:].replace('/', '%2F')
+
+        return f"https://gitlab.com/api/v4/projects/{project_id}/repository/files/{path}/raw?ref={self.branch}&private_token={self.token}"
+
+class HttpProvider(GitProvider):
+    """
+    Downloads files from `<repo>/<branch>/<path>` on any HTTP server, e.g. a mirror
+    of the repository or a local test server. The token is only sent over https,
+    it would go out in cleartext over plain http.
+    """
+
+    def get_url(self, path: str) -> str:
+        return f"{self.repo_path.rstrip('/')}/{self.branch}/{path}"
+
+    def get_headers(self) -> CaseInsensitiveDict:
+        headers = CaseInsensitiveDict()
+        if self.token and urlparse(self.repo_path).scheme.lower() == "https":
+            headers["Authorization"] = f"token {self.token}"
+        return headers
+
+class LocalFileProvider(GitProvider):
+    """
+    Reads files from a checkout on the local filesystem, for tests and local runs.
+    The branch is ignored, the checkout is expected to be on the right branch.
+    """
+
+    def get_url(self, path: str) -> str:
+        return f"{self.repo_path.rstrip('/')}/{path}"
+
+def get_git_provider(repo: str, branch: str, token: Optional[str]) -> GitProvider:
+    """
+    Returns the provider for a repository. `github.com/...` and `gitlab.com/...`
+    repositories are downloaded through the provider's API, `file://` and
+    `http(s)://` repositories are stand-ins for tests and mirrors.
+    """
+    if repo.startswith("file://"):
+        return LocalFileProvider(repo, branch, token)
+    if repo.startswith(("http://", "https://")):
+        return HttpProvider(repo, branch, token)
+
+    parse_result = urlparse(f"https://{repo}")
+
+    # Remove .git suffix used in git web url
+    path = parse_result.path.split('.')[0]
+
+    if parse_result.netloc == "github.com":
+        return GitHubProvider(path, branch, token)
+    elif parse_result.netloc == "gitlab.com":
+        return GitLabProvider(path, branch, token)
+    else:
+        raise Exception("Unsupported git provider")
+
+class LocalFileAdapter(BaseAdapter):
+    """Serves `file://` URLs so local repositories go through the same session code path."""
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        resp = requests.Response()
+        resp.request = request
+        resp.url = request.url
+
+        file_path = url2pathname(urlparse(request.url).path)
+        try:
+            with open(file_path, "rb") as f:
+                body = f.read()
+            resp.status_code = 200
+            resp.headers["Last-Modified"] = formatdate(os.path.getmtime(file_path), usegmt=True)
+        except FileNotFoundError:
+            body = b""
+            resp.status_code = 404
+        resp.raw = io.BytesIO(body)
+
+        return resp
+
+    def close(self):
+        pass
+
+def create_session(retries: int = 3, backoff_factor: float = 0.5, pool_maxsize: int = 10) -> requests.Session:
+    """
+    Returns a session whose connections are kept alive and reused across runs of a warm
+    instance, retrying connection errors and transient statuses with exponential backoff.
+    """
+    adapter = HTTPAdapter(max_retries=_create_retry(retries, backoff_factor), pool_connections=4, pool_maxsize=pool_maxsize)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.mount("file://", LocalFileAdapter())
+    return session
+
+def set_session_retries(session: requests.Session, retries: int, backoff_factor: float):
+    """Changes the retries of a session returned by `create_session`, keeping its pooled connections."""
+    for adapter in session.adapters.values():
+        if isinstance(adapter, HTTPAdapter):
+            adapter.max_retries = _create_retry(retries, backoff_factor)
+
+def _create_retry(retries: int, backoff_factor: float) -> Retry:
+    return Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET"]),
+        # Hand the last response back instead of raising so the caller reports its status
+        raise_on_status=False,
+    )
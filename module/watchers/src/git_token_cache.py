@@ -0,0 +1,44 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+class GitTokenCache:
+    """
+    Process-wide cache of git tokens read from Secret Manager, keyed by secret
+    version name. Tokens are verified (CRC32C) before being cached, so warm
+    instances skip both the Secret Manager call and the checksum until the
+    entry expires or is invalidated after the git provider rejects it.
+    """
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+
+            token, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[name]
+                return None
+
+            return token
+
+    def put(self, name: str, token: str):
+        if self.ttl_seconds <= 0:
+            return
+
+        with self._lock:
+            self._entries[name] = (token, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drops a single token, or every token if no name is given."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from .store_intent import StoreIntent
+
+class IntentRowMemo:
+    """
+    Bounded LRU memo of validated cluster intent rows.
+
+    Validating, resolving and hashing a row is the bulk of the CPU time spent
+    loading the source of truth, yet almost every row is unchanged between runs.
+    The memo is keyed by the raw CSV row plus the fleet default version the row
+    would resolve against, so a change to either re-validates the row. Only
+    valid rows are memoized so validation errors are logged on every run.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, StoreIntent] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(row: Dict, fleet_version: Optional[str]) -> bytes:
+        # Only a digest is kept so the memo does not hold on to every raw row
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((tuple(row.items()), fleet_version)).encode())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[StoreIntent]:
+        with self._lock:
+            edge_zone = self._entries.get(key)
+            if edge_zone is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return edge_zone
+
+    def put(self, key: bytes, edge_zone: StoreIntent):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = edge_zone
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
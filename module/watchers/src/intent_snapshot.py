@@ -0,0 +1,128 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import AbstractSet, Dict, Optional, Set, Tuple
+from .store_intent import StoreIntent
+from .state_store import StateStore
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+@dataclass
+class IntentChangeset:
+    """
+    Stores whose intent was added, changed or removed since the last successful run.
+    `full_sweep` is set when every store has to be reconsidered regardless of changes.
+    """
+
+    added: Set[str] = field(default_factory=set)
+    changed: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    full_sweep: bool = True
+
+    def is_changed(self, store_id: str) -> bool:
+        return store_id in self.added or store_id in self.changed
+
+    def prioritise(self, stores: Dict[str, StoreIntent]) -> Dict[str, StoreIntent]:
+        """Returns the stores with added and changed stores first."""
+        return dict(sorted(stores.items(), key=lambda item: not self.is_changed(item[0])))
+
+    def select(self, config_zone_info: Dict[Tuple, Dict[str, StoreIntent]]) -> Dict[Tuple, Dict[str, StoreIntent]]:
+        """
+        Returns the part of the intent that has to be processed in this run: everything,
+        changed stores first, for a full sweep, otherwise only the added and changed stores.
+        """
+        selected = {}
+        for proj_loc_key, stores in config_zone_info.items():
+            if self.full_sweep:
+                selected[proj_loc_key] = self.prioritise(stores)
+            else:
+                changed_stores = {store_id: store for store_id, store in stores.items() if self.is_changed(store_id)}
+                if changed_stores:
+                    selected[proj_loc_key] = changed_stores
+        return selected
+
+class IntentSnapshot:
+    """
+    Persisted `store_id -> intent_hash` snapshot of the last successful run of a
+    watcher, used to compute the changeset of the next run. A full sweep is
+    forced every `full_sweep_interval` runs and whenever no snapshot exists.
+    Stores a run could not process keep their previous hash, so they still
+    show up as changed in the next run.
+    """
+
+    def __init__(self, store: Optional[StateStore], name: str, full_sweep_interval: int = 1):
+        self.store = store
+        self.key = f"{name}_intent_snapshot"
+        self.full_sweep_interval = full_sweep_interval
+        self.runs_since_full_sweep = 0
+        self.previous: Dict[str, str] = {}
+
+    def diff(self, config_zone_info: Dict[Tuple, Dict[str, StoreIntent]]) -> IntentChangeset:
+        current = self._get_hashes(config_zone_info)
+        state = self._load()
+
+        if state is None:
+            return IntentChangeset(added=set(current), full_sweep=True)
+
+        previous: Dict[str, str] = state.get("intent_hashes", {})
+        self.previous = previous
+        self.runs_since_full_sweep = state.get("runs_since_full_sweep", 0)
+
+        changeset = IntentChangeset(
+            added={store_id for store_id in current if store_id not in previous},
+            changed={store_id for store_id, intent_hash in current.items() if store_id in previous and previous[store_id] != intent_hash},
+            removed={store_id for store_id in previous if store_id not in current},
+            full_sweep=self.runs_since_full_sweep + 1 >= self.full_sweep_interval,
+        )
+
+        logger.info(f"Intent changeset: added={len(changeset.added)}, changed={len(changeset.changed)}, removed={len(changeset.removed)}, full_sweep={changeset.full_sweep}")
+        for store_id in changeset.removed:
+            logger.info(f"Store {store_id} was removed from the cluster intent")
+
+        return changeset
+
+    def save(self, config_zone_info: Dict[Tuple, Dict[str, StoreIntent]], changeset: IntentChangeset, unprocessed: AbstractSet[str] = frozenset()):
+        if self.store is None:
+            return
+
+        hashes = self._get_hashes(config_zone_info)
+        for store_id in unprocessed:
+            if store_id in self.previous:
+                hashes[store_id] = self.previous[store_id]
+            else:
+                hashes.pop(store_id, None)
+
+        if changeset.full_sweep and unprocessed:
+            # The sweep is not finished, the next run carries on with it
+            runs_since_full_sweep = self.full_sweep_interval - 1
+        elif changeset.full_sweep:
+            runs_since_full_sweep = 0
+        else:
+            runs_since_full_sweep = self.runs_since_full_sweep + 1
+
+        try:
+            self.store.save(self.key, {
+                "intent_hashes": hashes,
+                "runs_since_full_sweep": runs_since_full_sweep,
+            })
+        except Exception:
+            logger.exception(f"Unable to save intent snapshot {self.key}")
+
+    def _load(self) -> Optional[dict]:
+        if self.store is None:
+            return None
+
+        try:
+            return self.store.load(self.key)
+        except Exception:
+            logger.exception(f"Unable to load intent snapshot {self.key}, running a full sweep")
+            return None
+
+    @staticmethod
+    def _get_hashes(config_zone_info: Dict[Tuple, Dict[str, StoreIntent]]) -> Dict[str, str]:
+        return {
+            store_id: store.intent_hash
+            for stores in config_zone_info.values()
+            for store_id, store in stores.items()
+        }
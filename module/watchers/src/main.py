@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Dict, Set, Tuple
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import functions_framework
 import os
 import io
@@ -23,11 +24,9 @@ import logging
 import json
 import hashlib
 from google.api_core.operation import Operation
+from google.longrunning import operations_pb2
 from pydantic import ValidationError
-import requests
 import google_crc32c
-from requests.structures import CaseInsensitiveDict
-from urllib.parse import urlparse
 from google.api_core import exceptions
 import google.auth
 from google.cloud import edgecontainer
@@ -39,15 +38,29 @@ from google.cloud import monitoring_v3
 from google.protobuf.timestamp_pb2 import Timestamp
 from dateutil.parser import parse
 from .maintenance_windows import MaintenanceExclusionWindow
-from .build_history import BuildHistory
-from .acp_zone import ACPZone, get_zones
-from .acp_membership import get_memberships
-from .clients import GoogleClients
+from .build_history import BuildHistory, LazyBuildHistory, trigger_id_cache
+from .acp_zone import ACPZone, get_zones, get_zones_async, zone_cache
+from .acp_membership import ACPMembership, get_memberships, get_memberships_async
+from .clients import AsyncGoogleClients, GoogleClients
 from .cluster_intent_model import SourceOfTruthModel
+from .store_intent import StoreIntent
 from .fleet_config_model import FleetConfigModel
 from .watcher_settings import WatcherSettings
+from .source_of_truth_cache import SourceOfTruthCache
+from .intent_memo import IntentRowMemo
+from .bulk_validation import BulkIntentValidator
+from .git_token_cache import GitTokenCache
+from .intent_snapshot import IntentChangeset, IntentSnapshot
+from .state_store import get_state_store
+from .git_providers import create_session, get_git_provider, set_session_retries
+from .zone_inventory import ZoneInventory
+from .build_dispatcher import AsyncBuildDispatcher, BuildDispatcher
+from .adaptive_concurrency import AdaptiveConcurrency
+from .verify_signals import VerifyOperationLog, VerifySignalDispatcher
+from .sweep_cursor import RunDeadline, SweepCursor
+import asyncio
 import concurrent.futures
-import threading
+import itertools
 import time
 
 logger = logging.getLogger(__name__)
@@ -57,26 +70,161 @@ creds, auth_project = google.auth.default()
 
 clients = GoogleClients()
 
+sot_cache = SourceOfTruthCache()
 
-def _zone_watcher_worker(
+# Shared across invocations so warm instances reuse pooled keep-alive connections to the git provider
+http_session = create_session()
+
+intent_memo = IntentRowMemo()
+
+bulk_validator = BulkIntentValidator()
+
+# Number of source of truth rows validated together by the bulk validator
+BULK_VALIDATION_BATCH_SIZE = 1000
+
+git_token_cache = GitTokenCache()
+
+# Adaptive per-API concurrency limits of the thread execution mode, learned across warm invocations
+api_concurrency = AdaptiveConcurrency()
+
+# Verify cluster intent operations still pending, kept across warm invocations and in the state store
+verify_operations = VerifyOperationLog()
+
+
+@dataclass
+class ZoneBuildPlan:
+    """
+    What the zone watcher has to do for a store: signal the verification of the
+    cluster intent of `verify_zone` and/or trigger the cluster build `request`.
+    """
+
+    zone: str
+    verify_zone: Optional[str] = None
+    request: Optional[cloudbuild.RunBuildTriggerRequest] = None
+
+def _plan_zone_build(
+    store_id: str,
+    store_info: StoreIntent,
     machine_project: str,
     location: str,
-    stores: Dict[Tuple, Dict[str, SourceOfTruthModel]],
+    zones: Dict[str, ACPZone],
     params: WatcherSettings,
-    builds: BuildHistory,
-    machine_lists: Dict[str, list[edgecontainer.Machine]],
-    unprocessed_zones,
-    unprocessed_zones_lock,
-) -> int:
-    thread_start_time = time.perf_counter()
+    builds: LazyBuildHistory,
+    inventory: ZoneInventory,
+) -> Optional[ZoneBuildPlan]:
+    """
+    Decides what to do for a single store of the zone watcher without calling any API,
+    so the thread and asyncio workers share it. Returns None if the zone of the store
+    cannot be found.
+    """
+    zone_store_id = f'projects/{machine_project}/locations/{location}/zones/{store_id}'
 
-    cb_client = clients.get_cloudbuild_client()
-    count = 0
+    try:
+        if store_info.zone_name:
+            zone = store_info.zone_name
+            zone_name_retrieved_from_api = False
+        else:
+            zone = zones[zone_store_id].globally_unique_id
+            zone_name_retrieved_from_api = True
+    except Exception:
+        logger.error(f'Zone for store {store_id} cannot be found, skipping.')
+        return None
+
+    plan = ZoneBuildPlan(zone)
+
+    if not zone_name_retrieved_from_api:
+        logger.info(f'Zone name was provided directly in cluster intent for store: {store_id}. Skipping intent verification.')
+    elif zones[zone_store_id].cluster_intent_verified:
+        logger.info(f'Cluster intent is present and verification has already been set for Store: {store_id}. Skipping..')
+    else:
+        logger.info(f'Cluster intent is present but verification is not set on Store: {store_id}. Setting cluster intent verification.')
+        plan.verify_zone = zone_store_id
+
+    if zone not in inventory:
+        logger.warning(f'No machine found in zone {zone}')
+        return plan
+
+    inventory.mark_processed(zone)
+    count_of_free_machines = inventory.get_free_machine_count(zone)
+    cluster_exists = inventory.has_cluster(zone, store_info.cluster_name)
+
+    if cluster_exists and not builds.should_retry_zone_build(zone, store_info.intent_hash):
+        logger.info(f'Cluster already exists for {zone}. Skipping..')
+        return plan
+
+    if count_of_free_machines >= int(store_info.node_count):
+        logger.info(f'ZONE {zone}: There are enough free  nodes to create cluster')
+    else:
+        logger.info(f'ZONE {zone}: Not enough free  nodes to create cluster. Need {str(store_info.node_count)} but have {str(count_of_free_machines)} free nodes')
+        if not builds.should_retry_zone_build(zone, store_info.intent_hash):
+            return plan
+
+    zone_state = zones[zone_store_id].state
+    if zone_name_retrieved_from_api and not verify_zone_state(zone_state, zone_store_id, store_info.recreate_on_delete):
+        logger.info(f'Zone: {zone}, Store: {store_id} is not in expected state! skipping..')
+        return plan
+
+    # Determine the try count for the next build.
+    # If state is READY, it's a fresh start (or manual reset), so start at 1.
+    # If state is STARTED, it's a continuation of an attempt, so increment from history.
+    # If state is ACTIVE (recreation), we start at 1 if the latest attempt succeeded (or no history). If the latest attempt failed, we increment from history.
+    try_count = 1
+    if zone_state == Zone.State.READY_FOR_CUSTOMER_FACTORY_TURNUP_CHECKS:
+        logger.info(f'Zone {zone} is in {zone_state.name} state. Starting with try_count=1.')
+    elif zone_state == Zone.State.CUSTOMER_FACTORY_TURNUP_CHECKS_STARTED:
+        latest_try = builds.get_latest_try_count(zone, store_info.intent_hash)
+        try_count = latest_try + 1
+        logger.info(f'Zone {zone} is in {zone_state.name} state. Latest try_count from history was {latest_try}. Setting next try_count={try_count}.')
+    elif zone_state == Zone.State.ACTIVE:
+        summary = builds.get_summary(zone, store_info.intent_hash)
+        if summary and summary.latest_attempt_failed:
+            latest_try = builds.get_latest_try_count(zone, store_info.intent_hash)
+            try_count = latest_try + 1
+            logger.info(f'Zone {zone} is in ACTIVE state and failed before. Setting next try_count={try_count}.')
+        else:
+            try_count = 1
+            logger.info(f'Zone {zone} is in ACTIVE state and has no recent failures. Starting with try_count=1.')
+        
+    # Pre-emptively skip if we have exceeded the allowed attempts (max_retries + 1).
+    # This avoids triggering a build that we know will fail in the Bash script.
+    if try_count > params.max_retries + 1:
+        logger.info(f'Max retries reached for zone {zone} (try_count={try_count}, max_retries={params.max_retries}). Skipping..')
+        return plan
+
+    # A build still queued or working from a previous run, or triggered by another worker, provisions the zone already
+    if not builds.claim_zone_build(zone):
+        logger.info(f'A build is already in flight for zone {zone}. Skipping..')
+        return plan
+
+    # trigger cloudbuild to initiate the cluster building
+    repo_source = cloudbuild.RepoSource()
+    repo_source.branch_name = store_info.sync_branch
+    repo_source.substitutions = {
+        "_STORE_ID": store_id,
+        "_ZONE": zone,
+        "_INTENT_HASH": store_info.intent_hash,
+        "_TRY_COUNT": str(try_count)
+    }
+    plan.request = cloudbuild.RunBuildTriggerRequest(
+        name=params.cloud_build_trigger,
+        source=repo_source
+    )
+    logger.debug(plan.request)
+
+    return plan
 
+def _list_location_zones(
+    machine_project: str,
+    location: str,
+    params: WatcherSettings,
+) -> Optional[Dict[str, ACPZone]]:
+    """Lists the zones of a location and reports the HWM connectivity, returns None if they could not be listed."""
     hwm_status = 1
     failure_reason = ""
+    zones = None
     try:
-        zones = get_zones(machine_project, location)
+        with api_concurrency.slot("hwm"):
+            zones = get_zones(machine_project, location)
     except Exception as err:
         logger.exception(
             "Error listing zones (HWM API) for project: %s, location: %s",
@@ -97,247 +245,923 @@ def _zone_watcher_worker(
     )
 
     if hwm_status == 0:
-        thread_end_time = time.perf_counter()
-        logger.error(
-            "Thread zone_watcher(%s, %s) failed because HWM API was unreachable. Took %0.2f seconds",
+        logger.error(f"zone_watcher({machine_project}, {location}) skipped because HWM API was unreachable")
+
+    return zones
+
+def _zone_watcher_worker(
+    machine_project: str,
+    location: str,
+    stores: Dict[str, StoreIntent],
+    zones: Dict[str, ACPZone],
+    params: WatcherSettings,
+    builds: LazyBuildHistory,
+    inventory: ZoneInventory,
+    dispatcher: BuildDispatcher,
+    verifier: VerifySignalDispatcher,
+    sweep: SweepCursor,
+) -> int:
+    """Processes a chunk of the stores of a location, sharing the zones and machines listed for the location."""
+    thread_start_time = time.perf_counter()
+
+    build_futures: List[Tuple[str, str, concurrent.futures.Future]] = []
+
+    store_ids = list(stores)
+    for index, store_id in enumerate(store_ids):
+        if sweep.deadline.expired():
+            logger.warning(f"Deadline reached, zone_watcher({machine_project}, {location}) skipped {len(store_ids) - index} stores")
+            sweep.skip((machine_project, location), store_ids[index:])
+            break
+
+        plan = _plan_zone_build(store_id, stores[store_id], machine_project, location, zones, params, builds, inventory)
+        if plan is None:
+            continue
+
+        if plan.verify_zone:
+            verifier.submit(plan.verify_zone)
+
+        if plan.request:
+            build_futures.append((store_id, plan.zone, dispatcher.submit(plan.zone, plan.request)))
+
+    count = _count_triggered_builds(build_futures, sweep, (machine_project, location))
+
+    thread_end_time = time.perf_counter()
+    logger.info(f"Thread zone_watcher({machine_project}, {location}) took {thread_end_time - thread_start_time:0.2f} seconds for {len(store_ids)} stores)")
+
+    return count
+
+
+def _list_zone_machines(
+    ec_client: edgecontainer.EdgeContainerClient,
+    machine_project: str,
+    location: str,
+    params: WatcherSettings,
+    inventory: ZoneInventory,
+) -> bool:
+    """
+    Lists the machines of a location into the inventory and reports the EdgeContainer connectivity.
+    Returns False if the machines could not be listed.
+    """
+    edgecontainer_status = 1
+    failure_reason = ""
+    try:
+        with api_concurrency.slot("edgecontainer"):
+            res_pager = ec_client.list_machines(
+                edgecontainer.ListMachinesRequest(
+                    parent=ec_client.common_location_path(machine_project, location)
+                )
+            )
+            inventory.add_machines(machine_project, location, res_pager)
+    except Exception as err:
+        logger.exception(
+            "Error listing machines for project: %s, location: %s",
             machine_project,
             location,
-            thread_end_time - thread_start_time,
         )
-        return 0
+        edgecontainer_status = 0
+        failure_reason = _get_failure_reason(err)
+
+    report_api_connectivity_metric(
+        host_project_id=params.project_id,
+        api="edgecontainer",
+        project_type="machine_project",
+        project_id=machine_project,
+        location=location,
+        status=edgecontainer_status,
+        failure_reason=failure_reason,
+    )
+
+    return edgecontainer_status == 1
+
+@functions_framework.http
+def zone_watcher(req: flask.Request):
+    params = WatcherSettings()
+    deadline = RunDeadline(params.run_deadline_seconds)
+
+    logger.info(f'Running zone watcher for: proj_id={params.project_id},sot={params.source_of_truth_repo}/{params.source_of_truth_branch}/{params.source_of_truth_path}, cb_trigger={params.cloud_build_trigger}')
+    _configure_source_of_truth(params)
+    _configure_caches(params)
+    _configure_api_concurrency(params)
+    
+    state_store = get_state_store(params.state_store_uri)
+
+    config_zone_info = read_intent_data(params, 'machine_project_id')
+    snapshot = IntentSnapshot(state_store, "zone_watcher", params.full_sweep_interval)
+    changeset = snapshot.diff(config_zone_info)
+    sweep = SweepCursor(state_store, "zone_watcher", deadline)
+
+    def arrange(retriable_intent_hashes: Set[str]) -> Dict[Tuple, Dict[str, StoreIntent]]:
+        return sweep.arrange(
+            changeset.select(config_zone_info),
+            _get_priority_stores(config_zone_info, changeset, retriable_intent_hashes),
+            changeset.full_sweep,
+        )
+
+    # Stores with a build to retry are only known once the build history is loaded, the locations
+    # of the other stores are listed meanwhile
+    stores_to_process = arrange(set())
+
+    # Only the build history of the stores processed in this run is needed, without a state store its
+    # listing stops once all of it is found. It loads in the background while the locations are listed
+    history_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="build-history")
+    builds = LazyBuildHistory(history_executor.submit(
+        BuildHistory,
+        params.project_id,
+        params.region,
+        params.max_retries,
+        params.cloud_build_trigger_name,
+        state_store,
+        candidate_hashes={store_info.intent_hash for stores in stores_to_process.values() for store_info in stores.values()},
+        max_builds=params.build_history_max_builds,
+        intent_hashes={store_info.intent_hash for stores in config_zone_info.values() for store_info in stores.values()},
+        max_pending_age_seconds=params.build_history_max_pending_age_seconds,
+    ))
+    history_executor.shutdown(wait=False)
+    verify_operations.max_age_seconds = params.verify_operation_max_age_seconds
+    verify_operations.load(state_store)
+
+    ec_client = clients.get_edgecontainer_client()
+
+    inventory = ZoneInventory()
+
+    # The machines and zones of every location are listed side by side, each location moves on as
+    # soon as both are listed and the build history is loaded, so a slow location does not hold
+    # back the others, and its stores are split in chunks for any free worker
+    count = 0
+    if params.execution_mode == "asyncio":
+        count, stores_to_process = asyncio.run(_zone_watcher_async(stores_to_process, arrange, params, builds, inventory, sweep))
+    else:
+        with _create_build_dispatcher(params, deadline) as dispatcher, \
+                _create_verify_signal_dispatcher(params) as verifier, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=_get_worker_pool_size(params)) as executor:
+            pending: Dict[concurrent.futures.Future, Tuple[str, Optional[Tuple[str, str]]]] = {
+                executor.submit(_list_zone_machines, ec_client, machine_project, location, params, inventory): ("machines", (machine_project, location))
+                for (machine_project, location) in stores_to_process
+            }
+
+            # Forget the verify operations that are done before listing zones so their locations are listed afresh
+            verifier.refresh()
+
+            for (machine_project, location) in stores_to_process:
+                pending[executor.submit(_list_location_zones, machine_project, location, params)] = ("zones", (machine_project, location))
+            pending[builds.future] = ("builds", None)
+
+            listings_left = {proj_loc_key: 2 for proj_loc_key in stores_to_process}
+            location_zones: Dict[Tuple[str, str], Optional[Dict[str, ACPZone]]] = {}
+            # Locations whose machines could not be listed
+            unlisted_machines: Set[Tuple[str, str]] = set()
+            # Locations listed before the build history was loaded
+            listed: Dict[Tuple[str, str], Optional[Dict[str, ACPZone]]] = {}
+            # Stores handled by each worker, left for the next run if the worker fails
+            chunks: Dict[concurrent.futures.Future, Dict[str, StoreIntent]] = {}
+            history_loaded = False
+
+            def process_location(machine_project: str, location: str, zones: Optional[Dict[str, ACPZone]]):
+                stores = stores_to_process.get((machine_project, location))
+                if stores is None:
+                    return
+
+                if sweep.deadline.expired():
+                    logger.warning(f"Deadline reached, skipping zone_watcher({machine_project}, {location})")
+                    sweep.skip((machine_project, location), stores)
+                    return
+
+                if zones is None:
+                    # The zones or machines could not be listed, the stores are left for the next run
+                    sweep.skip((machine_project, location), stores)
+                    return
+
+                for chunk in _chunk_stores(stores, params.store_chunk_size):
+                    future = executor.submit(_zone_watcher_worker, machine_project, location, chunk, zones, params, builds, inventory, dispatcher, verifier, sweep)
+                    pending[future] = ("stores", (machine_project, location))
+                    chunks[future] = chunk
+
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stage, proj_loc_key = pending.pop(future)
+
+                    if stage == "stores":
+                        count += _get_worker_count(future, chunks.pop(future), sweep, proj_loc_key, "zone_watcher")
+                        continue
+
+                    if stage == "builds":
+                        stores_to_process = arrange(builds.get_retriable_intent_hashes())
+                        history_loaded = True
+                        # Locations swept earlier only hold stores with a build to retry, they are listed now
+                        for (machine_project, location) in stores_to_process:
+                            if (machine_project, location) not in listings_left:
+                                listings_left[(machine_project, location)] = 2
+                                pending[executor.submit(_list_zone_machines, ec_client, machine_project, location, params, inventory)] = ("machines", (machine_project, location))
+                                pending[executor.submit(_list_location_zones, machine_project, location, params)] = ("zones", (machine_project, location))
+                        for (machine_project, location), zones in listed.items():
+                            process_location(machine_project, location, zones)
+                        listed.clear()
+                        continue
+
+                    if stage == "zones":
+                        location_zones[proj_loc_key] = future.result()
+                    elif not future.result():
+                        unlisted_machines.add(proj_loc_key)
+
+                    listings_left[proj_loc_key] -= 1
+                    if listings_left[proj_loc_key] > 0:
+                        continue
+
+                    zones = location_zones.pop(proj_loc_key)
+                    if proj_loc_key in unlisted_machines:
+                        unlisted_machines.discard(proj_loc_key)
+                        zones = None
+                    if history_loaded:
+                        process_location(*proj_loc_key, zones)
+                    else:
+                        listed[proj_loc_key] = zones
+
+    logger.info(f'total zones triggered = {count}')
+
+    # Zones of unchanged stores are not looked at outside of a complete full sweep
+    if changeset.full_sweep and sweep.complete:
+        for zone, (machine_project, location) in inventory.get_unprocessed_zones().items():
+            logger.info(f'Zone found in environment but not in cluster source of truth. "projects/{machine_project}/locations/{location}/zones/{zone}"')
+
+    snapshot.save(config_zone_info, changeset, sweep.get_unprocessed())
+    sweep.save(stores_to_process)
+    verify_operations.save(state_store)
+    report_concurrency_limit_metrics(params, "zone_watcher")
+    report_suppressed_builds_metric(params, builds.get_suppressed_build_count())
+
+    return f'total zones triggered = {count}, sweep complete = {sweep.complete}'
+
+@dataclass
+class ClusterLocation:
+    """What the cluster watcher lists once per fleet project and location, shared by the chunks of its stores."""
+
+    zones: Dict[str, ACPZone]
+    memberships: Dict[str, ACPMembership]
+    clusters_by_zone: Dict[str, list[edgecontainer.Cluster]]
+
+def _list_cluster_location(
+    project_id: str,
+    location: str,
+    stores: Dict[str, StoreIntent],
+    params: WatcherSettings,
+) -> Optional[ClusterLocation]:
+    """Lists the zones, memberships and clusters of a location, returns None if the clusters could not be listed."""
+    ec_client = clients.get_edgecontainer_client()
+
+    zones: Dict[str, ACPZone] = {}
+
+    for machine_projects in _get_cluster_machine_projects(project_id, location, stores):
+        with api_concurrency.slot("hwm"):
+            zones.update(get_zones(machine_projects, location))
+
+    with api_concurrency.slot("gkehub"):
+        memberships = get_memberships(project_id, location)
+
+    req_c = edgecontainer.ListClustersRequest(
+        parent=ec_client.common_location_path(project_id, location)
+    )
+    
+    edgecontainer_status = 1
+    failure_reason = ""
+    try:
+        with api_concurrency.slot("edgecontainer"):
+            res_pager_c = ec_client.list_clusters(req_c)
+            clusters_by_zone = _group_clusters_by_zone(res_pager_c)
+    except Exception as err:
+        logger.exception(
+            "Error listing clusters for project: %s, location: %s",
+            project_id,
+            location,
+        )
+        edgecontainer_status = 0
+        failure_reason = _get_failure_reason(err)
+
+    report_api_connectivity_metric(
+        host_project_id=params.project_id,
+        api="edgecontainer",
+        project_type="fleet_project",
+        project_id=project_id,
+        location=location,
+        status=edgecontainer_status,
+        failure_reason=failure_reason,
+    )
+
+    if edgecontainer_status == 0:
+        return None
+
+    return ClusterLocation(zones, memberships, clusters_by_zone)
+
+def _cluster_watcher_worker(
+    project_id: str,
+    location: str,
+    stores: Dict[str, StoreIntent],
+    cluster_location: ClusterLocation,
+    params: WatcherSettings,
+    dispatcher: BuildDispatcher,
+    sweep: SweepCursor,
+) -> int:
+    """Processes a chunk of the stores of a location, sharing the data listed for the location."""
+    en_client = clients.get_edgenetwork_client()
+    build_futures: List[Tuple[str, str, concurrent.futures.Future]] = []
+
+    store_ids = list(stores)
+    for index, store_id in enumerate(store_ids):
+        if sweep.deadline.expired():
+            logger.warning(f"Deadline reached, cluster_watcher({project_id}, {location}) skipped {len(store_ids) - index} stores")
+            sweep.skip((project_id, location), store_ids[index:])
+            break
 
-    for store_id in stores:
         store_info = stores[store_id]
 
-        zone_store_id = f'projects/{machine_project}/locations/{location}/zones/{store_id}'
+        zone = _get_cluster_store_zone(store_id, store_info, location, cluster_location.zones)
+        if zone is None:
+            continue
 
-        try:
-            if store_info.zone_name:
-                zone = store_info.zone_name
-                zone_name_retrieved_from_api = False
-            else:
-                zone = zones[zone_store_id].globally_unique_id
-                zone_name_retrieved_from_api = True
-        except Exception:
-            logger.error(f'Zone for store {store_id} cannot be found, skipping.')
+        cluster = _get_zone_cluster(zone, cluster_location.clusters_by_zone)
+        if cluster is None:
             continue
 
-        try:                                       
-            if not zone_name_retrieved_from_api:
-                logger.info(f'Zone name was provided directly in cluster intent for store: {store_id}. Skipping intent verification.')
-            elif zones[zone_store_id].cluster_intent_verified:
-                logger.info(f'Cluster intent is present and verification has already been set for Store: {store_id}. Skipping..')
-            else:
-                logger.info(f'Cluster intent is present but verification is not set on Store: {store_id}. Setting cluster intent verification.')
-                operation = set_zone_state_verify_cluster_intent(zone_store_id)
-                logger.info(f'HW API Operation: {operation.operation.name}')
-        except Exception:
-            logger.error(
-                f'Cluster intent could not be checked for Store: {store_id}. Skipping',
-                exc_info=True,
-            )
+        req_n = edgenetwork.ListSubnetsRequest(
+            parent=f'{en_client.common_location_path(store_info.machine_project_id, location)}/zones/{zone}'
+        )
 
-        
-        if zone not in machine_lists:
-            logger.warning(f'No machine found in zone {zone}')
+        try:
+            with api_concurrency.slot("edgenetwork"):
+                subnet_list = _summarise_subnets(en_client.list_subnets(req_n))
+        except Exception as err:
+            logger.error(f"Error listing subnets for project: {project_id}, location: {location}, zone: {zone}")
+            logger.error(err)
             continue
 
-        count_of_free_machines = 0
-        cluster_exists = False
-        with unprocessed_zones_lock:
-            if zone in unprocessed_zones:
-                unprocessed_zones.pop(zone)
-        for m in machine_lists[zone]:
-            if len(m.hosted_node.strip()) > 0:  # if there is any value, consider there is a cluster
-                # check if target cluster already exists
-                if (m.hosted_node.split('/')[5] == store_info.cluster_name):
-                    cluster_exists = True
-                    break
-
-                logger.info(f'ZONE {zone}: {m.name} already used by {m.hosted_node}')
-            else:
-                logger.info(f'ZONE {zone}: {m.name} is a free node')
-                count_of_free_machines = count_of_free_machines+1
+        req = _plan_cluster_update(store_id, store_info, project_id, zone, cluster, subnet_list, cluster_location.memberships, params)
+        if req:
+            build_futures.append((store_id, zone, dispatcher.submit(zone, req)))
+
+    return _count_triggered_builds(build_futures, sweep, (project_id, location))
+
+def _get_priority_stores(
+    config_zone_info: Dict[Tuple, Dict[str, StoreIntent]],
+    changeset: IntentChangeset,
+    retriable_intent_hashes: Set[str],
+) -> Set[str]:
+    """Returns the stores with a changed intent or a build to retry, processed first in every run."""
+    return {
+        store_id
+        for stores in config_zone_info.values()
+        for store_id, store in stores.items()
+        if changeset.is_changed(store_id) or store.intent_hash in retriable_intent_hashes
+    }
 
-        if cluster_exists and not builds.should_retry_zone_build(zone, store_info.intent_hash):
-            logger.info(f'Cluster already exists for {zone}. Skipping..')
-            continue
+def _get_cluster_machine_projects(project_id: str, location: str, stores: Dict[str, StoreIntent]) -> Set[str]:
+    project_to_list_machines: Set[str] = set()
+
+    for store in stores.values():
+        if store.fleet_project_id == project_id and store.location == location:
+            project_to_list_machines.add(store.machine_project_id)
+
+    return project_to_list_machines
+
+def _group_clusters_by_zone(clusters: Iterable[edgecontainer.Cluster]) -> Dict[str, list[edgecontainer.Cluster]]:
+    clusters_by_zone: Dict[str, list[edgecontainer.Cluster]] = defaultdict(list)
+    for c in clusters:
+        clusters_by_zone[c.control_plane.local.node_location].append(c)
+    return clusters_by_zone
+
+def _get_cluster_store_zone(store_id: str, store_info: StoreIntent, location: str, zones: Dict[str, ACPZone]) -> Optional[str]:
+    zone_store_id = f'projects/{store_info.machine_project_id}/locations/{location}/zones/{store_id}'
+    try:
+        if store_info.zone_name:
+            return store_info.zone_name
+        return zones[zone_store_id].globally_unique_id
+    except Exception:
+        logger.error(f'Zone for store {store_id} cannot be found, skipping.')
+        return None
+
+def _get_zone_cluster(zone: str, clusters_by_zone: Dict[str, list[edgecontainer.Cluster]]) -> Optional[edgecontainer.Cluster]:
+    zone_cluster_list = clusters_by_zone.get(zone, [])
+    if len(zone_cluster_list) == 0:
+        logger.warning(f'No lcp cluster found in {zone}')
+        return None
+    elif len(zone_cluster_list) > 1:
+        logger.warning(f'More than 1 lcp clusters found in {zone}')
+    logger.debug(zone_cluster_list)
+
+    return zone_cluster_list[0]
+
+def _summarise_subnets(subnets: Iterable[edgenetwork.Subnet]) -> List[Dict]:
+    subnet_list = [{'vlan_id': net.vlan_id, 'ipv4_cidr': sorted(net.ipv4_cidr)} for net in subnets]
+    subnet_list.sort(key=lambda x: x['vlan_id'])
+    logger.debug(subnet_list)
+    return subnet_list
+
+def _plan_cluster_update(
+    store_id: str,
+    store_info: StoreIntent,
+    project_id: str,
+    zone: str,
+    cluster: edgecontainer.Cluster,
+    subnet_list: List[Dict],
+    memberships: Dict[str, ACPMembership],
+    params: WatcherSettings,
+) -> Optional[cloudbuild.RunBuildTriggerRequest]:
+    """
+    Compares the intent of a store with its cluster, subnets and membership without
+    calling any API, so the thread and asyncio workers share it. Returns the build
+    request to run if the cluster has to be updated.
+    """
+    rw = cluster.maintenance_policy.window.recurring_window
+    has_update = False
 
-        if count_of_free_machines >= int(store_info.node_count):
-            logger.info(f'ZONE {zone}: There are enough free  nodes to create cluster')
+    if (not store_info.maintenance_window_recurrence or
+        not store_info.maintenance_window_start or
+        not store_info.maintenance_window_end
+        ):
+        has_update = False
+    elif (rw.recurrence != store_info.maintenance_window_recurrence or
+            rw.window.start_time != parse(store_info.maintenance_window_start) or
+            rw.window.end_time != parse(store_info.maintenance_window_end)):
+        logger.info("Maintenance window requires update")
+        logger.info(f"Actual values (recurrence={rw.recurrence}, start_time={rw.window.start_time}, end_time={rw.window.end_time})")
+        logger.info(f"Desired values (recurrence={store_info.maintenance_window_recurrence}, start_time={store_info.maintenance_window_start}, end_time={store_info.maintenance_window_end})")
+        has_update = True
+    else:
+        defined_exclusion_windows = MaintenanceExclusionWindow.get_exclusion_windows_from_sot(store_info)
+        actual_exclusion_windows = MaintenanceExclusionWindow.get_exclusion_windows_from_cluster_response(cluster)
+        if defined_exclusion_windows != actual_exclusion_windows:
+            has_update = True
+
+    try:
+        for desired_subnet in store_info.subnet_vlans.split(','):
+            try:
+                vlan_id = int(desired_subnet)
+            except Exception as err:
+                logger.error("unable to convert vlan to an int", err)
+
+            if vlan_id not in [n['vlan_id'] for n in subnet_list]:
+                logger.info(f"No vlan created for vlan: {vlan_id}")
+                has_update = True
+
+        for actual_vlan_id in [n['vlan_id'] for n in subnet_list]:
+            if actual_vlan_id not in [int(v) for v in store_info.subnet_vlans.split(',')]:
+                logger.error(f"VLAN {actual_vlan_id} is defined in the environment, but not in the source of truth. The subnet will need to be manually deleted from the environment.")
+    except Exception as err:
+        logger.error(err)
+
+    cluster_name = store_info.cluster_name
+    if store_info.labels:
+        labels = store_info.labels.strip()
+    else:
+        labels = ""
+
+    if labels:
+        desired_labels = {}
+        for label in labels.split(","):
+            kv_pair = label.split("=")
+            desired_labels[kv_pair[0]] = kv_pair[1]
+
+        membership = memberships[f"projects/{project_id}/locations/global/memberships/{cluster_name}"]
+
+        membership_labels = membership.labels
+        if (desired_labels != membership_labels):
+            has_update = True
+
+    if not has_update:
+        return None
+
+    repo_source = cloudbuild.RepoSource()
+    repo_source.branch_name = store_info.sync_branch
+    repo_source.substitutions = {
+        "_STORE_ID": store_id,
+        "_ZONE": zone
+    }
+    req = cloudbuild.RunBuildTriggerRequest(
+        name=params.cloud_build_trigger,
+        source=repo_source
+    )
+    logger.debug(req)
+
+    return req
+
+def _configure_source_of_truth(params: WatcherSettings):
+    """Applies the settings of the source of truth state kept across warm invocations."""
+    sot_cache.spill_dir = params.source_of_truth_cache_dir
+    intent_memo.max_entries = params.intent_memo_max_entries
+    git_token_cache.ttl_seconds = params.git_token_cache_ttl_seconds
+    set_session_retries(http_session, params.source_of_truth_retries, params.source_of_truth_retry_backoff)
+
+def _configure_caches(params: WatcherSettings):
+    """Applies the TTLs of the API listings cached across warm invocations."""
+    zone_cache.ttl_seconds = params.zone_cache_ttl_seconds
+    trigger_id_cache.ttl_seconds = params.trigger_id_cache_ttl_seconds
+
+def _configure_api_concurrency(params: WatcherSettings):
+    api_concurrency.configure(
+        enabled=params.adaptive_concurrency,
+        initial_limit=params.max_workers,
+        max_limit=params.adaptive_max_workers,
+        latency_threshold=params.adaptive_latency_threshold,
+    )
+
+def _get_worker_pool_size(params: WatcherSettings) -> int:
+    # With adaptive concurrency the pool only bounds how far the limits can grow
+    if params.adaptive_concurrency:
+        return max(params.max_workers, params.adaptive_max_workers)
+    return params.max_workers
+
+def _chunk_stores(stores: Dict[str, StoreIntent], chunk_size: int) -> List[Dict[str, StoreIntent]]:
+    """Splits the stores of a location in chunks of at most chunk_size stores, keeping their order."""
+    items = iter(stores.items())
+    chunks = []
+    while chunk := dict(itertools.islice(items, chunk_size)):
+        chunks.append(chunk)
+    return chunks
+
+def _create_build_dispatcher(params: WatcherSettings, deadline: RunDeadline) -> BuildDispatcher:
+    return BuildDispatcher(
+        clients.get_cloudbuild_client(),
+        rate=params.build_trigger_rate,
+        burst=params.build_trigger_burst,
+        max_in_flight=params.max_builds_in_flight,
+        deadline=deadline,
+    )
+
+def _create_verify_signal_dispatcher(params: WatcherSettings) -> VerifySignalDispatcher:
+    return VerifySignalDispatcher(
+        _signal_verify_cluster_intent,
+        _get_hwm_operation,
+        verify_operations,
+        on_complete=_invalidate_signalled_zone,
+        max_in_flight=params.max_verify_signals_in_flight,
+    )
+
+def _signal_verify_cluster_intent(zone_store_id: str) -> Operation:
+    with api_concurrency.slot("hwm"):
+        return set_zone_state_verify_cluster_intent(zone_store_id)
+
+def _get_hwm_operation(name: str) -> operations_pb2.Operation:
+    with api_concurrency.slot("hwm"):
+        return clients.get_hardware_management_client().get_operation(operations_pb2.GetOperationRequest(name=name))
+
+def _get_worker_count(future: concurrent.futures.Future, stores: Dict[str, StoreIntent], sweep: SweepCursor, proj_loc_key: Tuple[str, str], watcher: str) -> int:
+    """Returns the builds triggered by a worker, the stores of a worker that failed are left for the next run."""
+    try:
+        return future.result()
+    except Exception:
+        logger.exception(f"{watcher}({proj_loc_key[0]}, {proj_loc_key[1]}) failed, {len(stores)} stores are left for the next run")
+        sweep.skip(proj_loc_key, stores)
+        return 0
+
+def _count_triggered_builds(build_futures: List[Tuple[str, str, concurrent.futures.Future]], sweep: SweepCursor, proj_loc_key: Tuple[str, str]) -> int:
+    """Waits for the builds handed to the dispatcher and returns how many were triggered."""
+    return _count_build_results(((store_id, zone, future.result()) for store_id, zone, future in build_futures), sweep, proj_loc_key)
+
+def _count_build_results(results: Iterable[Tuple[str, str, Optional[bool]]], sweep: SweepCursor, proj_loc_key: Tuple[str, str]) -> int:
+    """Counts the triggered builds, the stores whose build was not sent before the deadline are handed back to the sweep."""
+    count = 0
+    for store_id, zone, triggered in results:
+        if triggered is None:
+            sweep.skip(proj_loc_key, [store_id])
+        elif triggered:
+            count += 1
         else:
-            logger.info(f'ZONE {zone}: Not enough free  nodes to create cluster. Need {str(store_info.node_count)} but have {str(count_of_free_machines)} free nodes')
-            if not builds.should_retry_zone_build(zone, store_info.intent_hash):
-                continue
+            logger.warning(f'Cloud build for {zone} was not triggered')
+    return count
 
-        zone_state = zones[zone_store_id].state
-        if zone_name_retrieved_from_api and not verify_zone_state(zone_state, zone_store_id, store_info.recreate_on_delete):
-            logger.info(f'Zone: {zone}, Store: {store_id} is not in expected state! skipping..')
-            continue
+@dataclass
+class AsyncApis:
+    """The async clients of an asyncio run, with one concurrency limit per API."""
 
-        # Determine the try count for the next build.
-        # If state is READY, it's a fresh start (or manual reset), so start at 1.
-        # If state is STARTED, it's a continuation of an attempt, so increment from history.
-        # If state is ACTIVE (recreation), we start at 1 if the latest attempt succeeded (or no history). If the latest attempt failed, we increment from history.
-        try_count = 1
-        if zone_state == Zone.State.READY_FOR_CUSTOMER_FACTORY_TURNUP_CHECKS:
-            logger.info(f'Zone {zone} is in {zone_state.name} state. Starting with try_count=1.')
-        elif zone_state == Zone.State.CUSTOMER_FACTORY_TURNUP_CHECKS_STARTED:
-            latest_try = builds.get_latest_try_count(zone, store_info.intent_hash)
-            try_count = latest_try + 1
-            logger.info(f'Zone {zone} is in {zone_state.name} state. Latest try_count from history was {latest_try}. Setting next try_count={try_count}.')
-        elif zone_state == Zone.State.ACTIVE:
-            summary = builds.builds.get((zone, store_info.intent_hash))
-            if summary and summary.latest_attempt_failed:
-                latest_try = builds.get_latest_try_count(zone, store_info.intent_hash)
-                try_count = latest_try + 1
-                logger.info(f'Zone {zone} is in ACTIVE state and failed before. Setting next try_count={try_count}.')
-            else:
-                try_count = 1
-                logger.info(f'Zone {zone} is in ACTIVE state and has no recent failures. Starting with try_count=1.')
-            
-        # Pre-emptively skip if we have exceeded the allowed attempts (max_retries + 1).
-        # This avoids triggering a build that we know will fail in the Bash script.
-        if try_count > params.max_retries + 1:
-            logger.info(f'Max retries reached for zone {zone} (try_count={try_count}, max_retries={params.max_retries}). Skipping..')
-            continue
- 
-        # trigger cloudbuild to initiate the cluster building
-        repo_source = cloudbuild.RepoSource()
-        repo_source.branch_name = store_info.sync_branch
-        repo_source.substitutions = {
-            "_STORE_ID": store_id,
-            "_ZONE": zone,
-            "_INTENT_HASH": store_info.intent_hash,
-            "_TRY_COUNT": str(try_count)
-        }
-        req = cloudbuild.RunBuildTriggerRequest(
-            name=params.cloud_build_trigger,
-            source=repo_source
+    clients: AsyncGoogleClients
+    limits: Dict[str, asyncio.Semaphore]
+
+    @classmethod
+    def create(cls, params: WatcherSettings) -> 'AsyncApis':
+        return cls(
+            clients=AsyncGoogleClients(),
+            limits={api: asyncio.Semaphore(params.async_max_concurrency) for api in ("edgecontainer", "edgenetwork", "gkehub", "hwm")},
         )
-        logger.debug(req)
+
+def _create_async_build_dispatcher(params: WatcherSettings, apis: AsyncApis, deadline: RunDeadline) -> AsyncBuildDispatcher:
+    return AsyncBuildDispatcher(
+        apis.clients.get_cloudbuild_client(),
+        rate=params.build_trigger_rate,
+        burst=params.build_trigger_burst,
+        max_in_flight=params.max_builds_in_flight,
+        deadline=deadline,
+    )
+
+async def _zone_watcher_async(
+    stores_to_prefetch: Dict[Tuple, Dict[str, StoreIntent]],
+    arrange: Callable[[Set[str]], Dict[Tuple, Dict[str, StoreIntent]]],
+    params: WatcherSettings,
+    builds: LazyBuildHistory,
+    inventory: ZoneInventory,
+    sweep: SweepCursor,
+) -> Tuple[int, Dict[Tuple, Dict[str, StoreIntent]]]:
+    """
+    asyncio execution mode of the zone watcher, every location runs on a single event loop.
+    Returns the count of triggered builds and the stores arranged once the build history is loaded.
+    """
+    apis = AsyncApis.create(params)
+    dispatcher = _create_async_build_dispatcher(params, apis, sweep.deadline)
+    refresh = asyncio.ensure_future(_refresh_verify_operations_async(apis))
+    stores_to_process: Dict[Tuple, Dict[str, StoreIntent]] = {}
+
+    async def arrange_stores():
+        await asyncio.wrap_future(builds.future)
+        stores_to_process.update(arrange(builds.get_retriable_intent_hashes()))
+
+    arranging = asyncio.ensure_future(arrange_stores())
+
+    async def list_zones(machine_project: str, location: str) -> Optional[Dict[str, ACPZone]]:
+        # Locations of the zones whose verify operation is done have to be listed afresh
+        await refresh
+        return await _list_location_zones_async(apis, machine_project, location, params)
+
+    async def process_location(machine_project: str, location: str) -> int:
+        zones = None
+        if not sweep.deadline.expired():
+            machines_listed, zones = await asyncio.gather(
+                _list_zone_machines_async(apis, machine_project, location, params, inventory),
+                list_zones(machine_project, location),
+            )
+            if not machines_listed:
+                zones = None
+
+        await arranging
+        stores = stores_to_process.get((machine_project, location))
+        if stores is None:
+            return 0
+
+        if sweep.deadline.expired():
+            logger.warning(f"Deadline reached, skipping zone_watcher({machine_project}, {location})")
+            sweep.skip((machine_project, location), stores)
+            return 0
+
+        if zones is None:
+            # The zones or machines could not be listed, the stores are left for the next run
+            sweep.skip((machine_project, location), stores)
+            return 0
+
         try:
-            logger.info(f'triggering cloud build for {zone}')
-            logger.info(f'trigger: {params.cloud_build_trigger}')
-            cb_client.run_build_trigger(request=req)
-            count += 1
-            # response = opr.result()
+            return await _zone_watcher_worker_async(apis, machine_project, location, stores, zones, params, builds, inventory, dispatcher, sweep)
+        except Exception:
+            logger.exception(f"zone_watcher({machine_project}, {location}) failed, {len(stores)} stores are left for the next run")
+            sweep.skip((machine_project, location), stores)
+            return 0
+
+    async def process_other_locations() -> int:
+        # Locations swept earlier only hold stores with a build to retry, they are listed once these are known
+        await arranging
+        counts = await asyncio.gather(*(
+            process_location(machine_project, location)
+            for (machine_project, location) in stores_to_process
+            if (machine_project, location) not in stores_to_prefetch
+        ))
+        return sum(counts)
+
+    try:
+        counts = await asyncio.gather(
+            *(process_location(machine_project, location) for (machine_project, location) in stores_to_prefetch),
+            process_other_locations(),
+        )
+        await refresh
+    finally:
+        arranging.cancel()
+        await apis.clients.close()
+
+    return sum(counts), stores_to_process
+
+async def _refresh_verify_operations_async(apis: AsyncApis):
+    """asyncio counterpart of `VerifySignalDispatcher.refresh`."""
+    client = apis.clients.get_hardware_management_client()
+    pending = verify_operations.get_pending()
+
+    async def is_done(name: str) -> bool:
+        try:
+            async with apis.limits["hwm"]:
+                operation = await client.get_operation(operations_pb2.GetOperationRequest(name=name))
+            return operation.done
+        except exceptions.NotFound:
+            return True
         except Exception as err:
-            logger.error(err)
+            logger.warning(f'Unable to get verify operation {name}, keeping it pending: {err}')
+            return False
+
+    results = await asyncio.gather(*(is_done(name) for name in pending.values()))
+    for zone, done in zip(pending, results):
+        if done:
+            verify_operations.complete(zone)
+            _invalidate_signalled_zone(zone)
+
+async def _list_zone_machines_async(
+    apis: AsyncApis,
+    machine_project: str,
+    location: str,
+    params: WatcherSettings,
+    inventory: ZoneInventory,
+) -> bool:
+    """asyncio counterpart of `_list_zone_machines`."""
+    ec_client = apis.clients.get_edgecontainer_client()
+
+    edgecontainer_status = 1
+    failure_reason = ""
+    try:
+        async with apis.limits["edgecontainer"]:
+            res_pager = await ec_client.list_machines(
+                edgecontainer.ListMachinesRequest(
+                    parent=ec_client.common_location_path(machine_project, location)
+                )
+            )
+            machines = [m async for m in res_pager]
+        inventory.add_machines(machine_project, location, machines)
+    except Exception as err:
+        logger.exception(
+            "Error listing machines for project: %s, location: %s",
+            machine_project,
+            location,
+        )
+        edgecontainer_status = 0
+        failure_reason = _get_failure_reason(err)
+
+    await report_api_connectivity_metric_async(
+        apis.clients.get_monitoring_client(),
+        host_project_id=params.project_id,
+        api="edgecontainer",
+        project_type="machine_project",
+        project_id=machine_project,
+        location=location,
+        status=edgecontainer_status,
+        failure_reason=failure_reason,
+    )
+
+    return edgecontainer_status == 1
+
+async def _list_location_zones_async(
+    apis: AsyncApis,
+    machine_project: str,
+    location: str,
+    params: WatcherSettings,
+) -> Optional[Dict[str, ACPZone]]:
+    """asyncio counterpart of `_list_location_zones`."""
+    hwm_status = 1
+    failure_reason = ""
+    zones = None
+    try:
+        async with apis.limits["hwm"]:
+            zones = await get_zones_async(apis.clients.get_hardware_management_client(), machine_project, location)
+    except Exception as err:
+        logger.exception(
+            "Error listing zones (HWM API) for project: %s, location: %s",
+            machine_project,
+            location,
+        )
+        hwm_status = 0
+        failure_reason = _get_failure_reason(err)
+
+    await report_api_connectivity_metric_async(
+        apis.clients.get_monitoring_client(),
+        host_project_id=params.project_id,
+        api="hwm",
+        project_type="machine_project",
+        project_id=machine_project,
+        location=location,
+        status=hwm_status,
+        failure_reason=failure_reason,
+    )
+
+    if hwm_status == 0:
+        logger.error(f"zone_watcher({machine_project}, {location}) skipped because HWM API was unreachable")
+
+    return zones
+
+async def _zone_watcher_worker_async(
+    apis: AsyncApis,
+    machine_project: str,
+    location: str,
+    stores: Dict[str, StoreIntent],
+    zones: Dict[str, ACPZone],
+    params: WatcherSettings,
+    builds: LazyBuildHistory,
+    inventory: ZoneInventory,
+    dispatcher: AsyncBuildDispatcher,
+    sweep: SweepCursor,
+) -> int:
+    start_time = time.perf_counter()
+
+    verifications = []
+    builds_to_trigger = []
+    store_ids = list(stores)
+    for index, store_id in enumerate(store_ids):
+        if sweep.deadline.expired():
+            logger.warning(f"Deadline reached, zone_watcher({machine_project}, {location}) skipped {len(store_ids) - index} stores")
+            sweep.skip((machine_project, location), store_ids[index:])
+            break
+
+        plan = _plan_zone_build(store_id, stores[store_id], machine_project, location, zones, params, builds, inventory)
+        if plan is None:
+            continue
+
+        if plan.verify_zone:
+            verifications.append(_verify_cluster_intent_async(apis, store_id, plan.verify_zone))
+        if plan.request:
+            builds_to_trigger.append((store_id, plan.zone, dispatcher.trigger(plan.zone, plan.request)))
+
+    await asyncio.gather(*verifications)
+    results = await asyncio.gather(*(trigger for _, _, trigger in builds_to_trigger))
+    count = _count_build_results(
+        ((store_id, zone, triggered) for (store_id, zone, _), triggered in zip(builds_to_trigger, results)),
+        sweep,
+        (machine_project, location),
+    )
 
-    thread_end_time = time.perf_counter()
-    logger.info(f"Thread zone_watcher({machine_project}, {location}) took {thread_end_time - thread_start_time:0.2f} seconds)")
+    logger.info(f"Task zone_watcher({machine_project}, {location}) took {time.perf_counter() - start_time:0.2f} seconds)")
 
     return count
 
-@functions_framework.http
-def zone_watcher(req: flask.Request):
-    params = WatcherSettings()
-
-    logger.info(f'Running zone watcher for: proj_id={params.project_id},sot={params.source_of_truth_repo}/{params.source_of_truth_branch}/{params.source_of_truth_path}, cb_trigger={params.cloud_build_trigger}')
-    
-    config_zone_info = read_intent_data(params, 'machine_project_id')
-    
-    ec_client = clients.get_edgecontainer_client()
-    builds = BuildHistory(params.project_id, params.region, params.max_retries, params.cloud_build_trigger_name)
+async def _verify_cluster_intent_async(apis: AsyncApis, store_id: str, zone_store_id: str):
+    if verify_operations.is_pending(zone_store_id):
+        logger.info(f'Cluster intent verification of zone {zone_store_id} is still pending. Skipping..')
+        return
 
-    machine_lists: Dict[str, list[edgecontainer.Machine]] = {}
-    unprocessed_zones: Dict[str, Tuple] = {}
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=params.max_workers) as executor:
-        machine_futures = {
-            executor.submit(
-                ec_client.list_machines,
-                edgecontainer.ListMachinesRequest(
-                    parent=ec_client.common_location_path(machine_project, location)
-                ),
-            ): (machine_project, location)
-            for (machine_project, location) in config_zone_info
-        }
-        for future in concurrent.futures.as_completed(machine_futures):
-            machine_project, location = machine_futures[future]
-            edgecontainer_status = 1
-            failure_reason = ""
-            try:
-                res_pager = future.result()
-                for m in res_pager:
-                    if m.zone not in machine_lists:
-                        machine_lists[m.zone] = [m]
-                        unprocessed_zones[m.zone] = (machine_project, location)
-                    else:
-                        machine_lists[m.zone].append(m)
-            except Exception as err:
-                logger.exception(
-                    "Error listing machines for project: %s, location: %s",
-                    machine_project,
-                    location,
-                )
-                edgecontainer_status = 0
-                failure_reason = _get_failure_reason(err)
-
-            report_api_connectivity_metric(
-                host_project_id=params.project_id,
-                api="edgecontainer",
-                project_type="machine_project",
-                project_id=machine_project,
-                location=location,
-                status=edgecontainer_status,
-                failure_reason=failure_reason,
-            )
+    try:
+        async with apis.limits["hwm"]:
+            operation = await set_zone_state_verify_cluster_intent_async(apis.clients.get_hardware_management_client(), zone_store_id)
+        logger.info(f'HW API Operation: {operation.operation.name}')
+        verify_operations.record(zone_store_id, operation.operation.name)
+    except Exception:
+        logger.error(
+            f'Cluster intent could not be checked for Store: {store_id}. Skipping',
+            exc_info=True,
+        )
 
-    count = 0
-    unprocessed_zones_lock = threading.Lock()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=params.max_workers) as executor:
-        watcher_futures = []
-        for (machine_project, location), stores in config_zone_info.items():
-            future = executor.submit(_zone_watcher_worker, machine_project, location, stores, params, builds, machine_lists, unprocessed_zones, unprocessed_zones_lock)
-            watcher_futures.append(future)
-        
-        for future in concurrent.futures.as_completed(watcher_futures):
-            count += future.result()
+async def _cluster_watcher_async(stores_to_process: Dict[Tuple, Dict[str, StoreIntent]], params: WatcherSettings, sweep: SweepCursor) -> int:
+    """asyncio execution mode of the cluster watcher, every location runs on a single event loop."""
+    apis = AsyncApis.create(params)
+    dispatcher = _create_async_build_dispatcher(params, apis, sweep.deadline)
 
-    logger.info(f'total zones triggered = {count}')
+    async def process_location(project_id: str, location: str, stores: Dict[str, StoreIntent]) -> int:
+        try:
+            return await _cluster_watcher_worker_async(apis, project_id, location, stores, params, dispatcher, sweep)
+        except Exception:
+            logger.exception(f"cluster_watcher({project_id}, {location}) failed, {len(stores)} stores are left for the next run")
+            sweep.skip((project_id, location), stores)
+            return 0
 
-    for zone, (machine_project, location) in unprocessed_zones.items():
-        logger.info(f'Zone found in environment but not in cluster source of truth. "projects/{machine_project}/locations/{location}/zones/{zone}"')
+    try:
+        counts = await asyncio.gather(*(
+            process_location(project_id, location, stores)
+            for (project_id, location), stores in stores_to_process.items()
+        ))
+    finally:
+        await apis.clients.close()
 
-    return f'total zones triggered = {count}'
+    return sum(counts)
 
-def _cluster_watcher_worker(
+async def _cluster_watcher_worker_async(
+    apis: AsyncApis,
     project_id: str,
     location: str,
-    stores: Dict[str, SourceOfTruthModel],
+    stores: Dict[str, StoreIntent],
     params: WatcherSettings,
+    dispatcher: AsyncBuildDispatcher,
+    sweep: SweepCursor,
 ) -> int:
-    ec_client = clients.get_edgecontainer_client()
-    en_client = clients.get_edgenetwork_client()
-    cb_client = clients.get_cloudbuild_client()
-    count = 0
-
-    project_to_list_machines: Set[str] = set()
-
-    for store in stores.values():
-        if store.fleet_project_id == project_id and store.location == location:
-            project_to_list_machines.add(store.machine_project_id)
+    if sweep.deadline.expired():
+        logger.warning(f"Deadline reached, skipping cluster_watcher({project_id}, {location})")
+        sweep.skip((project_id, location), stores)
+        return 0
 
-    zones: Dict[str, ACPZone] = {}
+    ec_client = apis.clients.get_edgecontainer_client()
+    en_client = apis.clients.get_edgenetwork_client()
 
-    for machine_projects in project_to_list_machines:
-        zones.update(get_zones(machine_projects, location))
+    async def list_zones(machine_project: str) -> Dict[str, ACPZone]:
+        async with apis.limits["hwm"]:
+            return await get_zones_async(apis.clients.get_hardware_management_client(), machine_project, location)
 
-    memberships = get_memberships(project_id, location)
+    async def list_memberships() -> Dict[str, ACPMembership]:
+        async with apis.limits["gkehub"]:
+            return await get_memberships_async(apis.clients.get_gkehub_client(), project_id, location)
 
-    req_c = edgecontainer.ListClustersRequest(
-        parent=ec_client.common_location_path(project_id, location)
+    zones: Dict[str, ACPZone] = {}
+    *zone_listings, memberships = await asyncio.gather(
+        *(list_zones(machine_project) for machine_project in _get_cluster_machine_projects(project_id, location, stores)),
+        list_memberships(),
     )
-    
+    for zone_listing in zone_listings:
+        zones.update(zone_listing)
+
     edgecontainer_status = 1
     failure_reason = ""
     try:
-        res_pager_c = ec_client.list_clusters(req_c)
-        clusters_by_zone: Dict[str, list[edgecontainer.Cluster]] = defaultdict(list)
-        for c in res_pager_c:
-            clusters_by_zone[c.control_plane.local.node_location].append(c)
+        async with apis.limits["edgecontainer"]:
+            res_pager_c = await ec_client.list_clusters(
+                edgecontainer.ListClustersRequest(
+                    parent=ec_client.common_location_path(project_id, location)
+                )
+            )
+            clusters_by_zone = _group_clusters_by_zone([c async for c in res_pager_c])
     except Exception as err:
         logger.exception(
             "Error listing clusters for project: %s, location: %s",
@@ -347,7 +1171,8 @@ def _cluster_watcher_worker(
         edgecontainer_status = 0
         failure_reason = _get_failure_reason(err)
 
-    report_api_connectivity_metric(
+    await report_api_connectivity_metric_async(
+        apis.clients.get_monitoring_client(),
         host_project_id=params.project_id,
         api="edgecontainer",
         project_type="fleet_project",
@@ -358,146 +1183,111 @@ def _cluster_watcher_worker(
     )
 
     if edgecontainer_status == 0:
+        # The clusters could not be listed, the stores are left for the next run
+        sweep.skip((project_id, location), stores)
         return 0
 
-    for store_id in stores:
-        store_info = stores[store_id]
-
-        machine_project_id = store_info.machine_project_id
-        zone_store_id = f'projects/{machine_project_id}/locations/{location}/zones/{store_id}'
-        try:
-            if store_info.zone_name:
-                zone = store_info.zone_name
-            else:
-                zone = zones[zone_store_id].globally_unique_id
-        except Exception:
-            logger.error(f'Zone for store {store_id} cannot be found, skipping.')
-            continue
-
-        zone_cluster_list = clusters_by_zone[zone]
-        if len(zone_cluster_list) == 0:
-            logger.warning(f'No lcp cluster found in {zone}')
-            continue
-        elif len(zone_cluster_list) > 1:
-            logger.warning(f'More than 1 lcp clusters found in {zone}')
-        logger.debug(zone_cluster_list)
+    async def process_store(store_id: str, store_info: StoreIntent) -> Optional[Tuple[str, str, Optional[bool]]]:
+        if sweep.deadline.expired():
+            sweep.skip((project_id, location), [store_id])
+            return None
 
-        cluster = zone_cluster_list[0]
-        rw = cluster.maintenance_policy.window.recurring_window
-        has_update = False
+        zone = _get_cluster_store_zone(store_id, store_info, location, zones)
+        if zone is None:
+            return None
 
-        if (not store_info.maintenance_window_recurrence or
-            not store_info.maintenance_window_start or
-            not store_info.maintenance_window_end
-            ):
-            has_update = False
-        elif (rw.recurrence != store_info.maintenance_window_recurrence or
-                rw.window.start_time != parse(store_info.maintenance_window_start) or
-                rw.window.end_time != parse(store_info.maintenance_window_end)):
-            logger.info("Maintenance window requires update")
-            logger.info(f"Actual values (recurrence={rw.recurrence}, start_time={rw.window.start_time}, end_time={rw.window.end_time})")
-            logger.info(f"Desired values (recurrence={store_info.maintenance_window_recurrence}, start_time={store_info.maintenance_window_start}, end_time={store_info.maintenance_window_end})")
-            has_update = True
-        else:
-            defined_exclusion_windows = MaintenanceExclusionWindow.get_exclusion_windows_from_sot(store_info)
-            actual_exclusion_windows = MaintenanceExclusionWindow.get_exclusion_windows_from_cluster_response(cluster)
-            if defined_exclusion_windows != actual_exclusion_windows:
-                has_update = True
+        cluster = _get_zone_cluster(zone, clusters_by_zone)
+        if cluster is None:
+            return None
 
         req_n = edgenetwork.ListSubnetsRequest(
             parent=f'{en_client.common_location_path(store_info.machine_project_id, location)}/zones/{zone}'
         )
 
         try:
-            res_pager_n = en_client.list_subnets(req_n)
-            subnet_list = [{'vlan_id': net.vlan_id, 'ipv4_cidr': sorted(net.ipv4_cidr)} for net in res_pager_n]
+            async with apis.limits["edgenetwork"]:
+                res_pager_n = await en_client.list_subnets(req_n)
+                subnet_list = _summarise_subnets([net async for net in res_pager_n])
         except Exception as err:
             logger.error(f"Error listing subnets for project: {project_id}, location: {location}, zone: {zone}")
             logger.error(err)
-            continue
-            
-        subnet_list.sort(key=lambda x: x['vlan_id'])
-        logger.debug(subnet_list)
-        try:
-            for desired_subnet in store_info.subnet_vlans.split(','):
-                try:
-                    vlan_id = int(desired_subnet)
-                except Exception as err:
-                    logger.error("unable to convert vlan to an int", err)
-
-                if vlan_id not in [n['vlan_id'] for n in subnet_list]:
-                    logger.info(f"No vlan created for vlan: {vlan_id}")
-                    has_update = True
-
-            for actual_vlan_id in [n['vlan_id'] for n in subnet_list]:
-                if actual_vlan_id not in [int(v) for v in store_info.subnet_vlans.split(',')]:
-                    logger.error(f"VLAN {actual_vlan_id} is defined in the environment, but not in the source of truth. The subnet will need to be manually deleted from the environment.")
-        except Exception as err:
-            logger.error(err)
-
-        cluster_name = store_info.cluster_name
-        if store_info.labels:
-            labels = store_info.labels.strip()
-        else:
-            labels = ""
+            return None
 
-        if labels:
-            desired_labels = {}
-            for label in labels.split(","):
-                kv_pair = label.split("=")
-                desired_labels[kv_pair[0]] = kv_pair[1]
+        req = _plan_cluster_update(store_id, store_info, project_id, zone, cluster, subnet_list, memberships, params)
+        if req is None:
+            return None
 
-            membership = memberships[f"projects/{project_id}/locations/global/memberships/{cluster_name}"]
+        return store_id, zone, await dispatcher.trigger(zone, req)
 
-            membership_labels = membership.labels
-            if (desired_labels != membership_labels):
-                has_update = True
+    results = await asyncio.gather(*(process_store(store_id, store_info) for store_id, store_info in stores.items()))
 
-        if not has_update:
-            continue
+    return _count_build_results((result for result in results if result is not None), sweep, (project_id, location))
 
-        repo_source = cloudbuild.RepoSource()
-        repo_source.branch_name = store_info.sync_branch
-        repo_source.substitutions = {
-            "_STORE_ID": store_id,
-            "_ZONE": zone
-        }
-        req = cloudbuild.RunBuildTriggerRequest(
-            name=params.cloud_build_trigger,
-            source=repo_source
-        )
-        logger.debug(req)
-        try:
-            logger.info(f'triggering cloud build for {zone}')
-            logger.info(f'trigger: {params.cloud_build_trigger}')
-            cb_client.run_build_trigger(request=req)
-            count += 1
-        except Exception as err:
-            logger.error(f'failed to trigger cloud build for {zone}')
-            logger.error(err)
-            continue
-    return count
 
 @functions_framework.http
 def cluster_watcher(req: flask.Request):
     params = WatcherSettings()
+    deadline = RunDeadline(params.run_deadline_seconds)
 
     logger.info(f'proj_id = {params.project_id}')
     logger.info(f'cb_trigger = {params.cloud_build_trigger}')
+    _configure_source_of_truth(params)
+    _configure_caches(params)
+    _configure_api_concurrency(params)
 
     config_zone_info = read_intent_data(params, 'fleet_project_id')
     count = 0
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=params.max_workers) as executor:
-        futures = []
-        for (project_id, location), stores in config_zone_info.items():
-            future = executor.submit(_cluster_watcher_worker, project_id, location, stores, params)
-            futures.append(future)
-        
-        for future in concurrent.futures.as_completed(futures):
-            count += future.result()
+    state_store = get_state_store(params.state_store_uri)
+    snapshot = IntentSnapshot(state_store, "cluster_watcher", params.full_sweep_interval)
+    changeset = snapshot.diff(config_zone_info)
+
+    sweep = SweepCursor(state_store, "cluster_watcher", deadline)
+    stores_to_process = sweep.arrange(
+        changeset.select(config_zone_info),
+        _get_priority_stores(config_zone_info, changeset, set()),
+        changeset.full_sweep,
+    )
+
+    if params.execution_mode == "asyncio":
+        count = asyncio.run(_cluster_watcher_async(stores_to_process, params, sweep))
+    else:
+        with _create_build_dispatcher(params, deadline) as dispatcher, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=_get_worker_pool_size(params)) as executor:
+            location_futures = {
+                executor.submit(_list_cluster_location, project_id, location, stores, params): (project_id, location)
+                for (project_id, location), stores in stores_to_process.items()
+            }
+
+            # The stores of a location are split in chunks for any free worker as soon as it is listed
+            futures: Dict[concurrent.futures.Future, Tuple[Tuple[str, str], Dict[str, StoreIntent]]] = {}
+            for future in concurrent.futures.as_completed(location_futures):
+                project_id, location = location_futures[future]
+                try:
+                    cluster_location = future.result()
+                except Exception:
+                    logger.exception(
+                        "Error listing zones, memberships or clusters for project: %s, location: %s",
+                        project_id,
+                        location,
+                    )
+                    cluster_location = None
+                if cluster_location is None:
+                    # The clusters could not be listed, the stores are left for the next run
+                    sweep.skip((project_id, location), stores_to_process[(project_id, location)])
+                    continue
+                for chunk in _chunk_stores(stores_to_process[(project_id, location)], params.store_chunk_size):
+                    futures[executor.submit(_cluster_watcher_worker, project_id, location, chunk, cluster_location, params, dispatcher, sweep)] = ((project_id, location), chunk)
+            
+            for future in concurrent.futures.as_completed(futures):
+                proj_loc_key, chunk = futures[future]
+                count += _get_worker_count(future, chunk, sweep, proj_loc_key, "cluster_watcher")
 
-    return f'total zones triggered = {count}'
+    snapshot.save(config_zone_info, changeset, sweep.get_unprocessed())
+    sweep.save(stores_to_process)
+    report_concurrency_limit_metrics(params, "cluster_watcher")
+
+    return f'total zones triggered = {count}, sweep complete = {sweep.complete}'
 
 
 @functions_framework.http
@@ -506,13 +1296,12 @@ def zone_active_metric(req: flask.Request):
 
     logger.info(
         f'Running zone active watcher in: proj_id={params.project_id}, sot={params.source_of_truth_repo}/{params.source_of_truth_branch}/{params.source_of_truth_path}')
+    _configure_source_of_truth(params)
+    _configure_caches(params)
 
-    token = get_git_token_from_secrets_manager(params.secrets_project_id, params.git_secret_id)
-    intent_reader = ClusterIntentReader(
-        params.source_of_truth_repo, params.source_of_truth_branch,
-        params.source_of_truth_path, token)
-    zone_config_fio = intent_reader.retrieve_source_of_truth()
-    rdr = csv.DictReader(io.StringIO(zone_config_fio))  # will raise exception if csv parsing fails
+    zone_config_fios, _ = load_intent_files(params, include_fleet_config=False)
+    # will raise exception if csv parsing fails
+    rdr = itertools.chain.from_iterable(csv.DictReader(io.StringIO(fio)) for fio in zone_config_fios)
 
     time_series_data = []
     zones: Dict[str, ACPZone] = {}
@@ -632,43 +1421,217 @@ def report_api_connectivity_metric(
         status,
         failure_reason,
     )
+    try:
+        m_client = clients.get_monitoring_client()
+        m_client.create_time_series(_get_connectivity_metric_request(host_project_id, api, project_type, project_id, location, status, failure_reason))
+    except Exception as e:
+        logger.error("Failed to report API connectivity metric: %s", e, exc_info=True)
+
+def report_suppressed_builds_metric(params: WatcherSettings, count: int):
+    """Reports the count of builds not triggered by the run because their zone had a build in flight."""
+    logger.info(f'duplicate builds suppressed = {count}')
+
     try:
         m_client = clients.get_monitoring_client()
         timestamp = Timestamp()
         timestamp.GetCurrentTime()
-        data_point = {
-            'interval': {'end_time': timestamp},
-            'value': {'int64_value': status}
-        }
-        time_series_point = {
-            'metric': {
-                'type': 'custom.googleapis.com/gdc_api_connectivity',
-                'labels': {
-                    'api': api,
-                    'project_type': project_type,
-                    'target_project_id': project_id,
-                    'location': location,
-                    'failure_reason': failure_reason,
-                }
-            },
-            'resource': {
-                'type': 'global',
-                'labels': {
-                    'project_id': host_project_id
-                }
-            },
-            'points': [data_point]
-        }
-        request = monitoring_v3.CreateTimeSeriesRequest({
-            'name': f'projects/{host_project_id}',
-            'time_series': [time_series_point]
-        })
-        m_client.create_time_series(request)
+        m_client.create_time_series(monitoring_v3.CreateTimeSeriesRequest({
+            'name': f'projects/{params.project_id}',
+            'time_series': [{
+                'metric': {
+                    'type': 'custom.googleapis.com/gdc_watcher_duplicate_builds_suppressed',
+                    'labels': {
+                        'watcher': 'zone_watcher',
+                    }
+                },
+                'resource': {
+                    'type': 'global',
+                    'labels': {
+                        'project_id': params.project_id
+                    }
+                },
+                'points': [{
+                    'interval': {'end_time': timestamp},
+                    'value': {'int64_value': count}
+                }]
+            }]
+        }))
+    except Exception as e:
+        logger.error("Failed to report duplicate builds suppressed metric: %s", e, exc_info=True)
+
+def report_concurrency_limit_metrics(params: WatcherSettings, watcher: str):
+    """Reports the adaptive concurrency limit of every API called by the run to Cloud Monitoring."""
+    if not params.adaptive_concurrency or params.execution_mode == "asyncio":
+        return
+
+    limits = api_concurrency.get_limits()
+    logger.info(f'Adaptive concurrency limits: {limits}')
+    if not limits:
+        return
+
+    try:
+        m_client = clients.get_monitoring_client()
+        timestamp = Timestamp()
+        timestamp.GetCurrentTime()
+        time_series = [
+            {
+                'metric': {
+                    'type': 'custom.googleapis.com/gdc_watcher_concurrency_limit',
+                    'labels': {
+                        'api': api,
+                        'watcher': watcher,
+                    }
+                },
+                'resource': {
+                    'type': 'global',
+                    'labels': {
+                        'project_id': params.project_id
+                    }
+                },
+                'points': [{
+                    'interval': {'end_time': timestamp},
+                    'value': {'int64_value': limit}
+                }]
+            }
+            for api, limit in limits.items()
+        ]
+        m_client.create_time_series(monitoring_v3.CreateTimeSeriesRequest({
+            'name': f'projects/{params.project_id}',
+            'time_series': time_series
+        }))
+    except Exception as e:
+        logger.error("Failed to report concurrency limit metric: %s", e, exc_info=True)
+
+async def report_api_connectivity_metric_async(
+    m_client: monitoring_v3.MetricServiceAsyncClient,
+    host_project_id: str,
+    api: str,
+    project_type: str,
+    project_id: str,
+    location: str,
+    status: int,  # 1 for success, 0 for failure
+    failure_reason: str = "",
+):
+    """asyncio counterpart of `report_api_connectivity_metric`."""
+    logger.info(
+        "Reporting API connectivity metric: api=%s, project_type=%s, "
+        "project_id=%s, location=%s, status=%d, failure_reason=%s",
+        api,
+        project_type,
+        project_id,
+        location,
+        status,
+        failure_reason,
+    )
+    try:
+        await m_client.create_time_series(_get_connectivity_metric_request(host_project_id, api, project_type, project_id, location, status, failure_reason))
     except Exception as e:
         logger.error("Failed to report API connectivity metric: %s", e, exc_info=True)
 
+def _get_connectivity_metric_request(
+    host_project_id: str,
+    api: str,
+    project_type: str,
+    project_id: str,
+    location: str,
+    status: int,
+    failure_reason: str,
+) -> monitoring_v3.CreateTimeSeriesRequest:
+    timestamp = Timestamp()
+    timestamp.GetCurrentTime()
+    data_point = {
+        'interval': {'end_time': timestamp},
+        'value': {'int64_value': status}
+    }
+    time_series_point = {
+        'metric': {
+            'type': 'custom.googleapis.com/gdc_api_connectivity',
+            'labels': {
+                'api': api,
+                'project_type': project_type,
+                'target_project_id': project_id,
+                'location': location,
+                'failure_reason': failure_reason,
+            }
+        },
+        'resource': {
+            'type': 'global',
+            'labels': {
+                'project_id': host_project_id
+            }
+        },
+        'points': [data_point]
+    }
+    return monitoring_v3.CreateTimeSeriesRequest({
+        'name': f'projects/{host_project_id}',
+        'time_series': [time_series_point]
+    })
+
+
+def load_intent_files(params, include_fleet_config=True, stream=False) -> Tuple[List[str], str]:
+    """Retrieves the git token and downloads the cluster intent shards and fleet config files.
+
+    The git token is served from the process-wide token cache. If the git provider rejects
+    a cached token, it is dropped and the download is retried once with a fresh token.
+
+    Args:
+        params: WatcherParams
+        include_fleet_config: whether the fleet config file should be downloaded as well
+        stream: whether the cluster intent should be returned as a stream of lines, see retrieve_intent_files
+    Returns:
+        A tuple of the cluster intent shard contents and the fleet config file content.
+    """
+    token = get_git_token_from_secrets_manager(params.secrets_project_id, params.git_secret_id)
+    try:
+        return retrieve_intent_files(params, token, include_fleet_config, stream)
+    except SourceOfTruthAuthError as err:
+        logger.warning(f"Git provider rejected the cached token ({err}), refreshing it from Secret Manager")
+        git_token_cache.invalidate()
+        token = get_git_token_from_secrets_manager(params.secrets_project_id, params.git_secret_id)
+        return retrieve_intent_files(params, token, include_fleet_config, stream)
+
+def retrieve_intent_files(params, token, include_fleet_config=True, stream=False) -> Tuple[List[str], str]:
+    """Downloads the cluster intent shards and the fleet config file concurrently.
+
+    Args:
+        params: WatcherParams
+        token: git token used to authenticate against the source of truth repository
+        include_fleet_config: whether the fleet config file should be downloaded as well
+        stream: if set, each cluster intent shard is returned as an iterator of lines that is
+            read from the network as it is consumed, instead of the whole file content. Streamed
+            downloads bypass the source of truth cache.
+    Returns:
+        A tuple of the cluster intent shard contents, in the order of `source_of_truth_paths`, and
+        the fleet config file content. The fleet config is None if it was not requested or could
+        not be retrieved.
+    """
+    intent_readers = [
+        ClusterIntentReader(params.source_of_truth_repo, params.source_of_truth_branch, path, token, sot_cache, timeout=params.source_of_truth_timeout)
+        for path in params.source_of_truth_paths
+    ]
+    fleet_reader = ClusterIntentReader(params.source_of_truth_repo, params.source_of_truth_branch, params.fleet_config_path, token, sot_cache, timeout=params.source_of_truth_timeout)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(intent_readers) + 1) as executor:
+        intent_futures = [
+            executor.submit(reader.stream_source_of_truth if stream else reader.retrieve_source_of_truth)
+            for reader in intent_readers
+        ]
+        fleet_future = executor.submit(fleet_reader.retrieve_source_of_truth) if include_fleet_config else None
+
+        fleet_config_fio = None
+        if fleet_future:
+            try:
+                fleet_config_fio = fleet_future.result()
+            except Exception as e:
+                logger.warning(f"Failed to read fleet config file at {params.fleet_config_path}: {e}. Fleet-level version validation will be skipped.")
+
+        zone_config_fios = [future.result() for future in intent_futures]
+
+    logger.info(f"Source of truth cache stats: {sot_cache.get_stats()}")
+
+    return zone_config_fios, fleet_config_fio
 
-def read_intent_data(params, named_key) -> Dict[Tuple, Dict[str, SourceOfTruthModel]]:
+def read_intent_data(params, named_key) -> Dict[Tuple, Dict[str, StoreIntent]]:
     """Returns a data structure containing project, location, and store information  
 
     For example:
@@ -687,21 +1650,12 @@ def read_intent_data(params, named_key) -> Dict[Tuple, Dict[str, SourceOfTruthMo
         A dictionary with the structure described above.
     """
 
-    config_zone_info = {}
-    token = get_git_token_from_secrets_manager(params.secrets_project_id, params.git_secret_id)
-    intent_reader = ClusterIntentReader(params.source_of_truth_repo, params.source_of_truth_branch, params.source_of_truth_path, token)
-    zone_config_fio = intent_reader.retrieve_source_of_truth()
-    rdr = csv.DictReader(io.StringIO(zone_config_fio))  # will raise exception if csv parsing fails
-    
+    # In streaming mode rows are validated while the rest of the file is still being downloaded
+    zone_config_fios, fleet_config_fio = load_intent_files(params, stream=params.source_of_truth_streaming)
+
     # Read fleet config for fleet-level version verification
-    fleet_reader = ClusterIntentReader(params.source_of_truth_repo, params.source_of_truth_branch, params.fleet_config_path, token)
     fleet_versions = {}
-    try:
-        fleet_config_fio = fleet_reader.retrieve_source_of_truth()
-        fleet_rdr = csv.DictReader(io.StringIO(fleet_config_fio))
-    except Exception as e:
-        logger.warning(f"Failed to read fleet config file at {params.fleet_config_path}: {e}. Fleet-level version validation will be skipped.")
-        fleet_rdr = []
+    fleet_rdr = csv.DictReader(io.StringIO(fleet_config_fio)) if fleet_config_fio is not None else []
 
     for f_row in fleet_rdr:
         try:
@@ -714,54 +1668,165 @@ def read_intent_data(params, named_key) -> Dict[Tuple, Dict[str, SourceOfTruthMo
     if fleet_versions:
         logger.info(f"Successfully loaded fleet versions for {len(fleet_versions)} projects.")
 
+    # Shards are merged in path order. Streamed shards are read side by side so their downloads
+    # overlap, validation itself holds the GIL so buffered shards are validated one after the other
+    if params.source_of_truth_streaming:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(zone_config_fios)) as executor:
+            shard_futures = [
+                executor.submit(_read_intent_shard, csv.DictReader(zone_config_fio), named_key, fleet_versions)  # will raise exception if csv parsing fails
+                for zone_config_fio in zone_config_fios
+            ]
+            shards = [future.result() for future in shard_futures]
+    else:
+        shards = [
+            _read_intent_shard(csv.DictReader(io.StringIO(zone_config_fio)), named_key, fleet_versions)  # will raise exception if csv parsing fails
+            for zone_config_fio in zone_config_fios
+        ]
+
+    config_zone_info = _merge_intent_shards(params.source_of_truth_paths, shards)
+
+    logger.info(f"Intent row memo stats: {intent_memo.get_stats()}")
+
+    for key in config_zone_info:
+        logger.debug(f'Stores to check in {key[0]}, {key[1]} => {len(config_zone_info[key])}')
+    if len(config_zone_info) == 0:
+        raise Exception('no valid zone listed in config file')
+    
+    return config_zone_info
+
+def _read_intent_shard(rdr, named_key, fleet_versions: Dict[str, str]) -> Dict[Tuple, Dict[str, StoreIntent]]:
+    """Validates the rows of a single source of truth shard, see read_intent_data for the returned structure.
+
+    Rows are consumed in batches so rows missing from the memo can be validated column-wise by the
+    bulk validator, while keeping memory flat when the shard is streamed.
+    """
+    config_zone_info = {}
+    batch = []
+
     for row in rdr:
+        batch.append((rdr.line_num, row))
+        if len(batch) >= BULK_VALIDATION_BATCH_SIZE:
+            _read_intent_batch(batch, named_key, fleet_versions, config_zone_info)
+            batch = []
+
+    _read_intent_batch(batch, named_key, fleet_versions, config_zone_info)
+
+    return config_zone_info
+
+def _read_intent_batch(batch: List[Tuple[int, Dict[str, str]]], named_key, fleet_versions: Dict[str, str], config_zone_info: Dict[Tuple, Dict[str, StoreIntent]]):
+    memo_keys = []
+    row_fleet_versions = []
+    edge_zones = []
+    misses = []
+
+    for line_num, row in batch:
+        fleet_version = fleet_versions.get(row.get('fleet_project_id'))
+        memo_key = IntentRowMemo.get_key(row, fleet_version)
+        memo_keys.append(memo_key)
+        row_fleet_versions.append(fleet_version)
+        edge_zones.append(intent_memo.get(memo_key))
+        if edge_zones[-1] is None:
+            misses.append(len(edge_zones) - 1)
+
+    if misses:
+        bulk_validated = bulk_validator.validate([batch[i][1] for i in misses])
+        for i, edge_zone in zip(misses, bulk_validated):
+            line_num, row = batch[i]
+            fleet_version = row_fleet_versions[i]
+            if edge_zone is None:
+                # Let pydantic report why the row is invalid (or validate what the bulk checks could not)
+                edge_zone = _validate_intent_row(row, fleet_version, line_num)
+            else:
+                edge_zone = _resolve_intent_row(edge_zone, fleet_version)
+            if edge_zone is not None:
+                edge_zone = StoreIntent.from_model(edge_zone)
+                intent_memo.put(memo_keys[i], edge_zone)
+            edge_zones[i] = edge_zone
+
+    for (line_num, row), edge_zone in zip(batch, edge_zones):
         proj_loc_key = (row[named_key], row['location'])
 
         if proj_loc_key not in config_zone_info.keys():
             config_zone_info[proj_loc_key] = {}
 
-        try:
-            edge_zone = SourceOfTruthModel.model_validate(row)
-            
-            if not edge_zone.cluster_version:
-                fleet_version = fleet_versions.get(edge_zone.fleet_project_id)
-                if not fleet_version:
-                    logger.error(f"[CONFIG_VALIDATION_FAILED][cluster:{edge_zone.cluster_name}] Cluster version missing in cluster intent and no fleet default found for project {edge_zone.fleet_project_id}")
-                    continue
-                else:
-                    logger.info(f"Store {edge_zone.store_id}: Using fleet default version {fleet_version} for project {edge_zone.fleet_project_id}")
-                    edge_zone.cluster_version = fleet_version
-            
-            # Calculate hash of the resolved model
-            row_str = edge_zone.model_dump_json()
-            edge_zone.intent_hash = hashlib.sha256(row_str.encode()).hexdigest()
-            
-            # Validate Robin CNS support
-            if edge_zone.enable_robin_cns:
-                version_to_check = edge_zone.cluster_version
-                try:
-                    version_parts = version_to_check.split('-')[0].split('.')
-                    major = int(version_parts[0])
-                    minor = int(version_parts[1])
-                    if major < 1 or (major == 1 and minor < 12):
-                        logger.error(f"[INVALID_ROBIN_REQUEST][cluster:{edge_zone.cluster_name}] Robin CNS is only supported for GDC versions 1.12.0 or higher. Got {version_to_check}")
-                        continue
-                except (IndexError, ValueError):
-                    logger.error(f"[INVALID_ROBIN_REQUEST][cluster:{edge_zone.cluster_name}] Invalid cluster version format: {version_to_check}")
-                    continue
-        except ValidationError as e:
-            cluster_name = row.get('cluster_name', 'unknown')
-            logger.error(f"[CONFIG_VALIDATION_FAILED][cluster:{cluster_name}] Invalid row detected in source of truth: {e.errors()}")
+        if edge_zone is None:
             continue
 
         config_zone_info[proj_loc_key][row['store_id']] = edge_zone
-    for key in config_zone_info:
-        logger.debug(f'Stores to check in {key[0]}, {key[1]} => {len(config_zone_info[proj_loc_key])}')
-    if len(config_zone_info) == 0:
-        raise Exception('no valid zone listed in config file')
-    
+
+def _merge_intent_shards(paths: List[str], shards: List[Dict[Tuple, Dict[str, StoreIntent]]]) -> Dict[Tuple, Dict[str, StoreIntent]]:
+    """Merges validated shards in order. A store_id already defined by an earlier shard is rejected."""
+    config_zone_info = {}
+    store_paths: Dict[str, str] = {}
+
+    for path, shard in zip(paths, shards):
+        for proj_loc_key, stores in shard.items():
+            merged_stores = config_zone_info.setdefault(proj_loc_key, {})
+
+            for store_id, edge_zone in stores.items():
+                if store_paths.get(store_id, path) != path:
+                    logger.error(f"[CONFIG_VALIDATION_FAILED][cluster:{edge_zone.cluster_name}] Store {store_id} in {path} is already defined in {store_paths[store_id]}. Skipping")
+                    continue
+
+                store_paths[store_id] = path
+                merged_stores[store_id] = edge_zone
+
     return config_zone_info
 
+def _validate_intent_row(row: Dict[str, str], fleet_version: str, line_num: int = None) -> SourceOfTruthModel:
+    """Validates a single source of truth row and resolves its cluster version and intent hash.
+
+    Args:
+        row: the raw csv row
+        fleet_version: the fleet default cluster version for the row's fleet project, if any
+        line_num: the line of the row in the source of truth, used in error messages
+    Returns:
+        The validated model, or None if the row is invalid. Validation errors are logged.
+    """
+    try:
+        edge_zone = SourceOfTruthModel.model_validate(row)
+    except ValidationError as e:
+        cluster_name = row.get('cluster_name', 'unknown')
+        location = f" at line {line_num}" if line_num is not None else ""
+        logger.error(f"[CONFIG_VALIDATION_FAILED][cluster:{cluster_name}] Invalid row detected in source of truth{location}: {e.errors()}")
+        return None
+
+    return _resolve_intent_row(edge_zone, fleet_version)
+
+def _resolve_intent_row(edge_zone: SourceOfTruthModel, fleet_version: str) -> SourceOfTruthModel:
+    """Resolves the cluster version and intent hash of a validated row and checks Robin CNS support.
+
+    Returns:
+        The resolved model, or None if the row is invalid. Validation errors are logged.
+    """
+    if not edge_zone.cluster_version:
+        if not fleet_version:
+            logger.error(f"[CONFIG_VALIDATION_FAILED][cluster:{edge_zone.cluster_name}] Cluster version missing in cluster intent and no fleet default found for project {edge_zone.fleet_project_id}")
+            return None
+        else:
+            logger.info(f"Store {edge_zone.store_id}: Using fleet default version {fleet_version} for project {edge_zone.fleet_project_id}")
+            edge_zone.cluster_version = fleet_version
+
+    # Calculate hash of the resolved model
+    row_str = edge_zone.model_dump_json()
+    edge_zone.intent_hash = hashlib.sha256(row_str.encode()).hexdigest()
+
+    # Validate Robin CNS support
+    if edge_zone.enable_robin_cns:
+        version_to_check = edge_zone.cluster_version
+        try:
+            version_parts = version_to_check.split('-')[0].split('.')
+            major = int(version_parts[0])
+            minor = int(version_parts[1])
+            if major < 1 or (major == 1 and minor < 12):
+                logger.error(f"[INVALID_ROBIN_REQUEST][cluster:{edge_zone.cluster_name}] Robin CNS is only supported for GDC versions 1.12.0 or higher. Got {version_to_check}")
+                return None
+        except (IndexError, ValueError):
+            logger.error(f"[INVALID_ROBIN_REQUEST][cluster:{edge_zone.cluster_name}] Invalid cluster version format: {version_to_check}")
+            return None
+
+    return edge_zone
+
 def set_zone_state_verify_cluster_intent(store_id: str) -> Operation:
     '''Return Zone info.
     Args:
@@ -769,11 +1834,36 @@ def set_zone_state_verify_cluster_intent(store_id: str) -> Operation:
     '''
     client = clients.get_hardware_management_client()
 
-    request = gdchardwaremanagement_v1alpha.SignalZoneStateRequest(
+    operation = client.signal_zone_state(request=_get_verify_cluster_intent_request(store_id))
+    _invalidate_signalled_zone(store_id)
+
+    return operation
+
+async def set_zone_state_verify_cluster_intent_async(
+    client: gdchardwaremanagement_v1alpha.GDCHardwareManagementAsyncClient,
+    store_id: str,
+):
+    """asyncio counterpart of `set_zone_state_verify_cluster_intent`."""
+    operation = await client.signal_zone_state(request=_get_verify_cluster_intent_request(store_id))
+    _invalidate_signalled_zone(store_id)
+
+    return operation
+
+def _get_verify_cluster_intent_request(store_id: str) -> gdchardwaremanagement_v1alpha.SignalZoneStateRequest:
+    return gdchardwaremanagement_v1alpha.SignalZoneStateRequest(
         name=store_id,
         state_signal=SignalZoneStateRequest.StateSignal.VERIFY_CLUSTER_INTENT_PRESENCE,
     )
-    return client.signal_zone_state(request=request)
+
+def _invalidate_signalled_zone(store_id: str):
+    # The zone changes state, do not serve the cached listing of its location anymore. Zones are
+    # listed and cached per location: dropping the zone alone would make it look deleted, and
+    # refreshing it alone would cost a GetZone call for each zone when the next listing of the
+    # location, one call, fetches it anyway
+    # projects/{project}/locations/{location}/zones/{zone}
+    name_parts = store_id.split('/')
+    if len(name_parts) > 3:
+        zone_cache.invalidate(name_parts[1], name_parts[3])
 
 
 def verify_zone_state(state: Zone.State,store_id: str, recreate_on_delete: bool) -> bool:
@@ -796,60 +1886,100 @@ def verify_zone_state(state: Zone.State,store_id: str, recreate_on_delete: bool)
     
     return False
 
+class SourceOfTruthAuthError(Exception):
+    """Raised when the git provider rejects the token used to read the source of truth."""
+
+
 class ClusterIntentReader:
-    def __init__(self, repo, branch, sourceOfTruth, token):
+    def __init__(self, repo, branch, sourceOfTruth, token, cache: SourceOfTruthCache = None, timeout: Optional[Tuple[float, float]] = None):
         self.repo = repo
         self.branch = branch
         self.sourceOfTruth = sourceOfTruth
         self.token = token
+        self.cache = cache
+        # (connect, read) timeouts in seconds
+        self.timeout = timeout
+        self.provider = get_git_provider(repo, branch, token)
 
     def retrieve_source_of_truth(self):
         url = self._get_url()
-
-        resp = requests.get(url, headers=self._get_headers())
-
-        if resp.status_code == 200:
+        headers = self._get_headers()
+
+        # Revalidate a previously downloaded copy instead of fetching it again
+        cached = self.cache.get(url) if self.cache else None
+        if cached:
+            headers.update(cached.get_conditional_headers())
+
+        resp = http_session.get(url, headers=headers, timeout=self.timeout)
+
+        if resp.status_code == 304 and cached:
+            logger.debug(f"Source of truth {self.sourceOfTruth} not modified, using cached copy")
+            self.cache.record_hit(cached)
+            return cached.body
+        elif resp.status_code == 200:
+            if self.cache:
+                self.cache.record_miss()
+                self.cache.put(url, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.text)
             return resp.text
+        elif resp.status_code in (401, 403):
+            raise SourceOfTruthAuthError(f"Unable to retrieve source of truth with status code ({resp.status_code})")
         else:
             raise Exception(f"Unable to retrieve source of truth with status code ({resp.status_code})")
 
-    def _get_url(self):
-        parse_result = urlparse(f"https://{self.repo}")
+    def stream_source_of_truth(self, chunk_size=64 * 1024) -> Iterator[str]:
+        """Opens the source of truth and returns an iterator over its lines, line endings included.
 
-        if parse_result.netloc == "github.com":
-            # Remove .git suffix used in git web url
-            path = parse_result.path.split('.')[0]
+        The status code is checked before returning so errors surface immediately, while the
+        body is only read from the network as the iterator is consumed.
+        """
+        url = self._get_url()
 
-            return f"https://raw.githubusercontent.com{path}/{self.branch}/{self.sourceOfTruth}"
-        elif parse_result.netloc == "gitlab.com":
-            path = parse_result.path.split('.')[0]
+        resp = http_session.get(url, headers=self._get_headers(), timeout=self.timeout, stream=True)
 
-            # projectid is url encoded: org%2Fproject%2Frepo_name
-            project_id = path[1:].replace('/', '%2F')
+        if resp.status_code != 200:
+            resp.close()
+            if resp.status_code in (401, 403):
+                raise SourceOfTruthAuthError(f"Unable to retrieve source of truth with status code ({resp.status_code})")
+            raise Exception(f"Unable to retrieve source of truth with status code ({resp.status_code})")
 
-            return f"https://gitlab.com/api/v4/projects/{project_id}/repository/files/{self.sourceOfTruth}/raw?ref={self.branch}&private_token={self.token}"
-        else:
-            raise Exception("Unsupported git provider")
+        if not resp.encoding:
+            resp.encoding = "utf-8"
 
-    def _get_headers(self):
-        headers = CaseInsensitiveDict()
+        return self._iter_lines(resp, chunk_size)
 
-        parse_result = urlparse(f"https://{self.repo}")
+    @staticmethod
+    def _iter_lines(resp, chunk_size) -> Iterator[str]:
+        # Line endings are kept so the csv module can handle quoted fields spanning lines
+        # Lines are only split on "\n", as the buffered reader does, since str.splitlines also
+        # splits on characters such as "\x0c" or "\u2028" that may appear within a field
+        pending = ""
+        try:
+            for chunk in resp.iter_content(chunk_size=chunk_size, decode_unicode=True):
+                lines = (pending + chunk).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield line + "\n"
+            if pending:
+                yield pending
+        finally:
+            resp.close()
 
-        if parse_result.netloc == "github.com":
-            headers["Authorization"] = f"token {self.token}"
-            return headers
-        elif parse_result.netloc == "gitlab.com":
-            return headers
-        else:
-            raise Exception("Unsupported git provider")
+    def _get_url(self):
+        return self.provider.get_url(self.sourceOfTruth)
 
+    def _get_headers(self):
+        return self.provider.get_headers()
 
-def get_git_token_from_secrets_manager(secrets_project_id, secret_id, version_id="latest"):
-    client = clients.get_secret_manager_client()
 
+def get_git_token_from_secrets_manager(secrets_project_id, secret_id, version_id="latest"):
     name = f"projects/{secrets_project_id}/secrets/{secret_id}/versions/{version_id}"
 
+    token = git_token_cache.get(name)
+    if token is not None:
+        return token
+
+    client = clients.get_secret_manager_client()
+
     response = client.access_secret_version(request={"name": name})
 
     crc32c = google_crc32c.Checksum()
@@ -857,4 +1987,7 @@ def get_git_token_from_secrets_manager(secrets_project_id, secret_id, version_id
     if response.payload.data_crc32c != int(crc32c.hexdigest(), 16):
         raise Exception("Data corruption detected.")
 
-    return response.payload.data.decode("UTF-8")
\ No newline at end of file
+    token = response.payload.data.decode("UTF-8")
+    git_token_cache.put(name, token)
+
+    return token
\ No newline at end of file
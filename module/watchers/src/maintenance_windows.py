@@ -3,6 +3,7 @@ from typing import Self
 from google.cloud import edgecontainer
 
 from .cluster_intent_model import SourceOfTruthModel
+from .store_intent import StoreIntent
 
 class MaintenanceExclusionWindow:
     def __init__(self, name, start_time, end_time):
@@ -17,18 +18,12 @@ class MaintenanceExclusionWindow:
         return hash((self.name, self.start_time, self.end_time))
 
     @staticmethod
-    def get_exclusion_windows_from_sot(store_info: SourceOfTruthModel) -> set[Self]:
+    def get_exclusion_windows_from_sot(store_info: SourceOfTruthModel | StoreIntent) -> set[Self]:
         exclusions = set()
 
-        for i in range(3):
-            exclusion_name = getattr(store_info, f"maintenance_exclusion_name_{i+1}")
-            exclusion_start = getattr(store_info, f"maintenance_exclusion_start_{i+1}")
-            exclusion_end = getattr(store_info, f"maintenance_exclusion_end_{i+1}")
-
-            # Only consider exclusions that are fully defined
-            if (exclusion_name and exclusion_start and exclusion_end):
-                exclusion_window = MaintenanceExclusionWindow(exclusion_name, parse(exclusion_start), parse(exclusion_end))
-                exclusions.add(exclusion_window)
+        for exclusion_name, exclusion_start, exclusion_end in store_info.get_maintenance_exclusions():
+            exclusion_window = MaintenanceExclusionWindow(exclusion_name, parse(exclusion_start), parse(exclusion_end))
+            exclusions.add(exclusion_window)
 
         return exclusions
 
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+@dataclass
+class CachedSourceOfTruth:
+    """
+    A previously downloaded source of truth file along with the validators
+    returned by the git provider, used to issue conditional requests.
+    """
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: str
+
+    def get_conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class SourceOfTruthCache:
+    """
+    Process-wide cache of source of truth files keyed by request URL.
+
+    Entries are kept in memory so warm Cloud Function instances can answer a
+    `304 Not Modified` without downloading the file again. When `spill_dir` is
+    set, entries are also written to disk so they survive a restart of the
+    process on the same instance. URLs may embed credentials (GitLab
+    `private_token`), so only a digest of the URL is ever used as a key.
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None):
+        self.spill_dir = spill_dir
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._entries: Dict[str, CachedSourceOfTruth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedSourceOfTruth]:
+        key = self._get_key(url)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None and self.spill_dir:
+            entry = self._read_spill(key)
+            if entry is not None:
+                with self._lock:
+                    self._entries[key] = entry
+
+        return entry
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        if not etag and not last_modified:
+            # Without a validator the entry could never be revalidated
+            return
+
+        key = self._get_key(url)
+        entry = CachedSourceOfTruth(etag=etag, last_modified=last_modified, body=body)
+
+        with self._lock:
+            self._entries[key] = entry
+
+        if self.spill_dir:
+            self._write_spill(key, entry)
+
+    def record_hit(self, entry: CachedSourceOfTruth):
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(entry.body.encode())
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes_saved": self.bytes_saved}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.bytes_saved = 0
+
+    @staticmethod
+    def _get_key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _read_spill(self, key: str) -> Optional[CachedSourceOfTruth]:
+        path = os.path.join(self.spill_dir, f"{key}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return CachedSourceOfTruth(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logger.warning(f"Ignoring unreadable source of truth cache file {path}: {err}")
+            return None
+
+    def _write_spill(self, key: str, entry: CachedSourceOfTruth):
+        path = os.path.join(self.spill_dir, f"{key}.json")
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"etag": entry.etag, "last_modified": entry.last_modified, "body": entry.body}, f)
+            os.replace(tmp_path, path)
+        except Exception as err:
+            logger.warning(f"Unable to write source of truth cache file {path}: {err}")
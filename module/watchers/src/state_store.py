@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+from typing import Optional
+from urllib.parse import urlparse
+from .clients import GoogleClients
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+clients = GoogleClients()
+
+class StateStore:
+    """
+    Persists small JSON documents between watcher runs, e.g. intent snapshots.
+    Implementations must treat a missing document as `None` rather than an error.
+    """
+
+    def load(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def save(self, key: str, state: dict):
+        raise NotImplementedError
+
+class LocalFileStateStore(StateStore):
+    """
+    Stores each document as a JSON file in a local directory. Only survives on
+    warm instances when used inside a Cloud Function, which makes it suitable
+    as a stand-in for tests and local runs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._get_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, state: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._get_path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+class GCSStateStore(StateStore):
+    """
+    Stores each document as a JSON object in a Cloud Storage bucket so state is
+    shared by every instance of a watcher.
+    """
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def load(self, key: str) -> Optional[dict]:
+        blob = clients.get_storage_client().bucket(self.bucket).blob(self._get_object_name(key))
+        if not blob.exists():
+            return None
+        return json.loads(blob.download_as_text())
+
+    def save(self, key: str, state: dict):
+        blob = clients.get_storage_client().bucket(self.bucket).blob(self._get_object_name(key))
+        blob.upload_from_string(json.dumps(state), content_type="application/json")
+
+    def _get_object_name(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json" if self.prefix else f"{key}.json"
+
+def get_state_store(uri: Optional[str]) -> Optional[StateStore]:
+    """
+    Returns the state store for a `gs://bucket/prefix` URI or a local directory path,
+    or `None` if no URI is configured.
+    """
+    if not uri:
+        return None
+
+    parse_result = urlparse(uri)
+    if parse_result.scheme == "gs":
+        return GCSStateStore(parse_result.netloc, parse_result.path)
+
+    return LocalFileStateStore(uri)
@@ -0,0 +1,61 @@
+import sys
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from .cluster_intent_model import SourceOfTruthModel
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # Project ids, locations, branches and versions repeat across thousands of stores
+    return sys.intern(value) if value is not None else None
+
+@dataclass(frozen=True, slots=True)
+class StoreIntent:
+    """
+    A compact, immutable representation of a validated store intent. It only
+    contains the subset of the fields of SourceOfTruthModel used by the watchers,
+    in order to keep memory requirements low with tens of thousands of stores.
+    Values shared by many stores are interned, and the maintenance exclusions are
+    kept as raw strings until MaintenanceExclusionWindow parses them.
+    """
+
+    store_id: str
+    zone_name: Optional[str]
+    machine_project_id: str
+    fleet_project_id: str
+    cluster_name: str
+    location: str
+    node_count: int
+    sync_branch: str
+    cluster_version: Optional[str]
+    intent_hash: str
+    recreate_on_delete: Optional[bool] = None
+    maintenance_window_recurrence: Optional[str] = None
+    maintenance_window_start: Optional[str] = None
+    maintenance_window_end: Optional[str] = None
+    maintenance_exclusions: Tuple[Tuple[str, str, str], ...] = ()
+    subnet_vlans: Optional[str] = None
+    labels: Optional[str] = None
+
+    @classmethod
+    def from_model(cls, edge_zone: SourceOfTruthModel) -> 'StoreIntent':
+        return cls(
+            store_id=edge_zone.store_id,
+            zone_name=edge_zone.zone_name,
+            machine_project_id=_intern(edge_zone.machine_project_id),
+            fleet_project_id=_intern(edge_zone.fleet_project_id),
+            cluster_name=edge_zone.cluster_name,
+            location=_intern(edge_zone.location),
+            node_count=edge_zone.node_count,
+            sync_branch=_intern(edge_zone.sync_branch),
+            cluster_version=_intern(edge_zone.cluster_version),
+            intent_hash=edge_zone.intent_hash,
+            recreate_on_delete=edge_zone.recreate_on_delete,
+            maintenance_window_recurrence=_intern(edge_zone.maintenance_window_recurrence),
+            maintenance_window_start=_intern(edge_zone.maintenance_window_start),
+            maintenance_window_end=_intern(edge_zone.maintenance_window_end),
+            maintenance_exclusions=tuple(edge_zone.get_maintenance_exclusions()),
+            subnet_vlans=_intern(edge_zone.subnet_vlans),
+            labels=edge_zone.labels,
+        )
+
+    def get_maintenance_exclusions(self) -> Tuple[Tuple[str, str, str], ...]:
+        return self.maintenance_exclusions
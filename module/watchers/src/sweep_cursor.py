@@ -0,0 +1,144 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+from .store_intent import StoreIntent
+from .state_store import StateStore
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+class RunDeadline:
+    """Time budget of a watcher run, `None` for a run without deadline."""
+
+    def __init__(self, budget_seconds: Optional[float]):
+        self.budget_seconds = budget_seconds
+        self._expires_at = None if budget_seconds is None else time.monotonic() + budget_seconds
+
+    def expired(self) -> bool:
+        return self._expires_at is not None and time.monotonic() >= self._expires_at
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, `None` for a run without deadline."""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+class SweepCursor:
+    """
+    Position of a watcher in a full sweep that did not fit in the deadline of
+    a single run, persisted in the state store so the next run resumes from
+    there instead of processing the same early locations again.
+
+    Priority stores (changed intents, pending retries) are processed first in
+    every run. The other stores of a location are swept in store id order;
+    the cursor keeps the first of them a run had to skip and the locations
+    that were swept completely. Workers report with `skip` the stores they
+    skip once the deadline has expired, and the stores of a location that
+    could not be listed, so neither counts as swept.
+    """
+
+    def __init__(self, store: Optional[StateStore], name: str, deadline: RunDeadline):
+        self.store = store
+        self.key = f"{name}_sweep_cursor"
+        self.deadline = deadline
+        self._resume_from: Dict[str, str] = {}
+        self._completed: Set[str] = set()
+        self._priority: Set[str] = set()
+        self._resumable = False
+        self._skipped: Dict[Tuple, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def arrange(
+        self,
+        stores_to_process: Dict[Tuple, Dict[str, StoreIntent]],
+        priority: Set[str],
+        full_sweep: bool,
+    ) -> Dict[Tuple, Dict[str, StoreIntent]]:
+        """
+        Returns the stores to process in this run, priority stores and the locations
+        holding them first. A full sweep resumes from the cursor of the previous run.
+        """
+        self._priority = priority
+        # Only runs with a deadline can leave a sweep unfinished
+        self._resumable = full_sweep and self.deadline.budget_seconds is not None
+        if self._resumable:
+            self._load()
+
+        arranged = {}
+        for proj_loc_key, stores in stores_to_process.items():
+            location = self._get_location(proj_loc_key)
+            priority_stores = {store_id: store for store_id, store in stores.items() if store_id in priority}
+            if self._resumable and location in self._completed:
+                other_stores = {}
+            else:
+                resume_from = self._resume_from.get(location, "") if self._resumable else ""
+                other_stores = {
+                    store_id: stores[store_id]
+                    for store_id in sorted(stores)
+                    if store_id not in priority and store_id >= resume_from
+                }
+            if priority_stores or other_stores:
+                arranged[proj_loc_key] = {**priority_stores, **other_stores}
+
+        if self._resumable and (self._resume_from or self._completed):
+            logger.info(f"Resuming sweep: {len(self._completed)} locations already swept, {len(self._resume_from)} partially swept")
+
+        return dict(sorted(arranged.items(), key=lambda item: not any(store_id in priority for store_id in item[1])))
+
+    def skip(self, proj_loc_key: Tuple, store_ids: Iterable[str]):
+        with self._lock:
+            self._skipped.setdefault(proj_loc_key, set()).update(store_ids)
+
+    @property
+    def complete(self) -> bool:
+        with self._lock:
+            return not any(self._skipped.values())
+
+    def get_unprocessed(self) -> Set[str]:
+        with self._lock:
+            return {store_id for store_ids in self._skipped.values() for store_id in store_ids}
+
+    def save(self, stores_to_process: Dict[Tuple, Dict[str, StoreIntent]]):
+        if not self._resumable or self.store is None:
+            return
+
+        if self.complete:
+            logger.info("Sweep complete")
+            state = {}
+        else:
+            completed = set(self._completed)
+            resume_from = dict(self._resume_from)
+            for proj_loc_key in stores_to_process:
+                location = self._get_location(proj_loc_key)
+                skipped = [store_id for store_id in self._skipped.get(proj_loc_key, ()) if store_id not in self._priority]
+                if skipped:
+                    resume_from[location] = min(skipped)
+                else:
+                    completed.add(location)
+                    resume_from.pop(location, None)
+            logger.info(f"Sweep not finished: {len(completed)} locations swept, {len(resume_from)} partially swept")
+            state = {"resume_from": resume_from, "completed": sorted(completed)}
+
+        try:
+            self.store.save(self.key, state)
+        except Exception:
+            logger.exception(f"Unable to save sweep cursor {self.key}")
+
+    def _load(self):
+        if self.store is None:
+            return
+
+        try:
+            state = self.store.load(self.key) or {}
+        except Exception:
+            logger.exception(f"Unable to load sweep cursor {self.key}, starting a new sweep")
+            state = {}
+
+        self._resume_from = state.get("resume_from", {})
+        self._completed = set(state.get("completed", []))
+
+    @staticmethod
+    def _get_location(proj_loc_key: Tuple) -> str:
+        return "/".join(proj_loc_key)
@@ -0,0 +1,178 @@
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from google.api_core import exceptions
+from google.api_core.operation import Operation
+from google.longrunning import operations_pb2
+from .state_store import StateStore
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+class VerifyOperationLog:
+    """
+    Record of the verify cluster intent operations started on zones that are not
+    known to be done yet, so a zone is not signalled again while its operation
+    is pending. It is kept in memory by warm instances and persisted in the
+    state store, if one is configured, to be shared by every instance.
+
+    Operations older than `max_age_seconds` are forgotten so an operation that
+    can no longer be looked up does not block its zone forever.
+    """
+
+    KEY = "zone_watcher_verify_operations"
+
+    def __init__(self, max_age_seconds: float = 3600):
+        self.max_age_seconds = max_age_seconds
+        # zone -> (operation name, start time in seconds since the epoch)
+        self._operations: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, store: Optional[StateStore]):
+        if store is None:
+            return
+
+        try:
+            state = store.load(self.KEY)
+        except Exception:
+            logger.exception(f"Unable to load verify operations {self.KEY}, using the operations known to this instance")
+            return
+
+        if state is None:
+            return
+
+        with self._lock:
+            self._operations = {
+                zone: (operation["name"], operation["started_at"])
+                for zone, operation in state.get("operations", {}).items()
+            }
+
+    def save(self, store: Optional[StateStore]):
+        if store is None:
+            return
+
+        with self._lock:
+            operations = {
+                zone: {"name": name, "started_at": started_at}
+                for zone, (name, started_at) in self._operations.items()
+            }
+
+        try:
+            store.save(self.KEY, {"operations": operations})
+        except Exception:
+            logger.exception(f"Unable to save verify operations {self.KEY}")
+
+    def is_pending(self, zone: str) -> bool:
+        with self._lock:
+            entry = self._operations.get(zone)
+            return entry is not None and time.time() - entry[1] < self.max_age_seconds
+
+    def record(self, zone: str, operation_name: str):
+        with self._lock:
+            self._operations[zone] = (operation_name, time.time())
+
+    def complete(self, zone: str):
+        with self._lock:
+            self._operations.pop(zone, None)
+
+    def get_pending(self) -> Dict[str, str]:
+        """Returns zone -> operation name of the pending operations, forgetting the expired ones."""
+        now = time.time()
+        with self._lock:
+            for zone in [zone for zone, (_, started_at) in self._operations.items() if now - started_at >= self.max_age_seconds]:
+                logger.warning(f'Verify operation {self._operations[zone][0]} of zone {zone} expired, forgetting it')
+                del self._operations[zone]
+            return {zone: name for zone, (name, _) in self._operations.items()}
+
+    def clear(self):
+        with self._lock:
+            self._operations.clear()
+
+class VerifySignalDispatcher:
+    """
+    Sends the verify cluster intent signals of the zone watcher workers
+    concurrently, at most `max_in_flight` at a time, and records their
+    operations in the operation log. Zones whose previous operation is still
+    pending are skipped.
+
+    `refresh` polls the pending operations and calls `on_complete` with the
+    zone of every operation that is done, e.g. to drop the cached listing of
+    its location.
+    """
+
+    def __init__(
+        self,
+        signal: Callable[[str], Operation],
+        get_operation: Callable[[str], operations_pb2.Operation],
+        operation_log: VerifyOperationLog,
+        on_complete: Callable[[str], None],
+        max_in_flight: int = 10,
+    ):
+        self.signal = signal
+        self.get_operation = get_operation
+        self.operation_log = operation_log
+        self.on_complete = on_complete
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="verify-signals")
+
+    def refresh(self) -> List[str]:
+        """Forgets the operations that are done and returns their zones."""
+        futures = {
+            self._executor.submit(self._is_done, name): zone
+            for zone, name in self.operation_log.get_pending().items()
+        }
+
+        completed = []
+        for future in concurrent.futures.as_completed(futures):
+            zone = futures[future]
+            if future.result():
+                self.operation_log.complete(zone)
+                self.on_complete(zone)
+                completed.append(zone)
+
+        if futures:
+            logger.info(f'{len(completed)} of {len(futures)} pending verify operations are done')
+
+        return completed
+
+    def submit(self, zone: str) -> Optional[concurrent.futures.Future]:
+        """Signals a zone in the background, returns None if its previous signal is still pending."""
+        if self.operation_log.is_pending(zone):
+            logger.info(f'Cluster intent verification of zone {zone} is still pending. Skipping..')
+            return None
+
+        return self._executor.submit(self._signal, zone)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'VerifySignalDispatcher':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _signal(self, zone: str) -> bool:
+        try:
+            operation = self.signal(zone)
+        except Exception:
+            logger.error(
+                f'Cluster intent could not be checked for zone: {zone}. Skipping',
+                exc_info=True,
+            )
+            return False
+
+        logger.info(f'HW API Operation: {operation.operation.name}')
+        self.operation_log.record(zone, operation.operation.name)
+        return True
+
+    def _is_done(self, operation_name: str) -> bool:
+        try:
+            return self.get_operation(operation_name).done
+        except exceptions.NotFound:
+            return True
+        except Exception as err:
+            logger.warning(f'Unable to get verify operation {operation_name}, keeping it pending: {err}')
+            return False
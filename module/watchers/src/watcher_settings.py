@@ -1,4 +1,5 @@
-from typing import Optional
+from typing import List, Literal, Optional, Tuple
+from urllib.parse import urlparse
 from pydantic import Field, computed_field, field_validator, model_validator
 from pydantic_settings import BaseSettings
 
@@ -7,13 +8,60 @@ class WatcherSettings(BaseSettings):
     secrets_project_id: Optional[str] = Field(default=None, alias="PROJECT_ID_SECRETS")
     region: str = Field(..., alias="REGION")
     git_secret_id: str = Field(..., alias="GIT_SECRET_ID")
+    # Seconds the git token read from Secret Manager is reused by warm instances
+    git_token_cache_ttl_seconds: float = Field(default=300, gt=0, alias="GIT_TOKEN_CACHE_TTL_SECONDS")
     source_of_truth_repo: str = Field(..., alias="SOURCE_OF_TRUTH_REPO")
     source_of_truth_branch: str = Field(..., alias="SOURCE_OF_TRUTH_BRANCH")
     source_of_truth_path: str = Field(..., alias="SOURCE_OF_TRUTH_PATH")
     fleet_config_path: str = Field(..., alias="FLEET_CONFIG_PATH")
+    # Retries of connection errors and transient statuses, and (connect, read) timeouts in seconds of source of truth downloads
+    source_of_truth_retries: int = Field(default=3, ge=0, alias="SOURCE_OF_TRUTH_RETRIES")
+    source_of_truth_retry_backoff: float = Field(default=0.5, ge=0, alias="SOURCE_OF_TRUTH_RETRY_BACKOFF")
+    source_of_truth_connect_timeout: float = Field(default=10, gt=0, alias="SOURCE_OF_TRUTH_CONNECT_TIMEOUT")
+    source_of_truth_read_timeout: float = Field(default=60, gt=0, alias="SOURCE_OF_TRUTH_READ_TIMEOUT")
+    source_of_truth_streaming: bool = Field(default=False, alias="SOURCE_OF_TRUTH_STREAMING")
+    # Directory where downloaded source of truth files are kept to survive a restart of the process
+    source_of_truth_cache_dir: Optional[str] = Field(default=None, alias="SOURCE_OF_TRUTH_CACHE_DIR")
+    # Validated source of truth rows memoized across warm invocations
+    intent_memo_max_entries: int = Field(default=100000, gt=0, alias="INTENT_MEMO_MAX_ENTRIES")
     cloud_build_trigger_name: str = Field(..., alias="CB_TRIGGER_NAME")
     max_retries: int = Field(default=0, ge=0, le=5, alias="MAX_RETRIES")
+    # Seconds the ids of the Cloud Build trigger are reused by warm instances, 0 disables the cache
+    trigger_id_cache_ttl_seconds: float = Field(default=600, ge=0, alias="TRIGGER_ID_CACHE_TTL_SECONDS")
+    # Safety ceiling of the builds listed to find the build history of the intent
+    build_history_max_builds: int = Field(default=1000, ge=1, alias="BUILD_HISTORY_MAX_BUILDS")
+    # Seconds a build may stay pending or unknown before the build history checkpoint stops waiting for it
+    build_history_max_pending_age_seconds: float = Field(default=86400, gt=0, alias="BUILD_HISTORY_MAX_PENDING_AGE_SECONDS")
     max_workers: int = Field(default=1, ge=1, le=100, alias="MAX_WORKERS")
+    # Stores of a location are processed in chunks of this size by any free worker
+    store_chunk_size: int = Field(default=100, ge=1, alias="STORE_CHUNK_SIZE")
+    # Cloud Build trigger runs per second, bursts and concurrent requests allowed by the build dispatcher.
+    # Trigger runs are not rate limited unless BUILD_TRIGGER_RATE is set
+    build_trigger_rate: Optional[float] = Field(default=None, gt=0, alias="BUILD_TRIGGER_RATE")
+    build_trigger_burst: int = Field(default=5, ge=1, alias="BUILD_TRIGGER_BURST")
+    max_builds_in_flight: int = Field(default=5, ge=1, le=100, alias="MAX_BUILDS_IN_FLIGHT")
+    # Seconds the HWM zone listings are reused by warm instances, 0 disables the cache
+    zone_cache_ttl_seconds: float = Field(default=60, ge=0, alias="ZONE_CACHE_TTL_SECONDS")
+    # Verify cluster intent signals sent concurrently by the zone watcher
+    max_verify_signals_in_flight: int = Field(default=10, ge=1, le=100, alias="MAX_VERIFY_SIGNALS_IN_FLIGHT")
+    # Seconds a verify cluster intent operation keeps its zone from being signalled again
+    verify_operation_max_age_seconds: float = Field(default=3600, gt=0, alias="VERIFY_OPERATION_MAX_AGE_SECONDS")
+    # Adapt the concurrency of each API between 1 and adaptive_max_workers, starting from max_workers
+    adaptive_concurrency: bool = Field(default=False, alias="ADAPTIVE_CONCURRENCY")
+    adaptive_max_workers: int = Field(default=100, ge=1, le=500, alias="ADAPTIVE_MAX_WORKERS")
+    # Calls slower than this many seconds stop the limits from growing
+    adaptive_latency_threshold: float = Field(default=2.0, gt=0, alias="ADAPTIVE_LATENCY_THRESHOLD")
+    # Fan out with thread pools of max_workers, or with the async clients on a single event loop
+    execution_mode: Literal["threads", "asyncio"] = Field(default="threads", alias="EXECUTION_MODE")
+    # Concurrent calls allowed per API in the asyncio execution mode
+    async_max_concurrency: int = Field(default=200, ge=1, le=5000, alias="ASYNC_MAX_CONCURRENCY")
+    # gs://bucket/prefix or a local directory used to persist state between runs
+    state_store_uri: Optional[str] = Field(default=None, alias="STATE_STORE_URI")
+    # Run a full sweep every N runs, only changed stores are processed in between
+    full_sweep_interval: int = Field(default=1, ge=1, alias="FULL_SWEEP_INTERVAL")
+    # Stop picking up new stores this many seconds into a run, keep it below the function timeout.
+    # The next run resumes the sweep where it stopped if a state store is configured
+    run_deadline_seconds: Optional[float] = Field(default=None, gt=0, alias="RUN_DEADLINE_SECONDS")
 
     @model_validator(mode='after')
     def set_secrets_project_fallback(self) -> 'WatcherSettings':
@@ -27,10 +75,25 @@ class WatcherSettings(BaseSettings):
     def cloud_build_trigger(self) -> str:
         return f'projects/{self.project_id}/locations/{self.region}/triggers/{self.cloud_build_trigger_name}'
     
+    @computed_field
+    @property
+    def source_of_truth_paths(self) -> List[str]:
+        """SOURCE_OF_TRUTH_PATH may list several comma separated shards, e.g. per region."""
+        return [path.strip() for path in self.source_of_truth_path.split(',') if path.strip()]
+
+    @computed_field
+    @property
+    def source_of_truth_timeout(self) -> Tuple[float, float]:
+        return (self.source_of_truth_connect_timeout, self.source_of_truth_read_timeout)
+
     @field_validator('source_of_truth_repo')
     @classmethod
     def check_repo_protocol(cls, v: str) -> str:
-        """Validate that the repo URL does not contain a protocol."""
-        if v.lower().startswith(('http://', 'https://')):
+        """
+        Validate that GitHub and GitLab repo URLs do not contain a protocol. Other
+        http/https URLs are served by the generic HTTP provider, which only sends
+        the git token over https.
+        """
+        if v.lower().startswith(('http://', 'https://')) and urlparse(v.lower()).hostname in ('github.com', 'gitlab.com'):
             raise ValueError('must not include the http/https protocol')
         return v
\ No newline at end of file
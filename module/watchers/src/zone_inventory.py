@@ -0,0 +1,70 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Set, Tuple
+from google.cloud import edgecontainer
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+@dataclass
+class ZoneMachines:
+    """Summary of the machines of a single zone."""
+
+    machine_count: int = 0
+    free_machine_count: int = 0
+    hosted_clusters: Set[str] = field(default_factory=set)
+
+class ZoneInventory:
+    """
+    Index of the machines listed by the zone watcher, built once per listing so
+    the capacity and cluster-exists checks of every store are O(1).
+
+    It also keeps track of the zones that were found in the environment but not
+    processed by any store of the source of truth. Zones are only ever added by
+    `add_machines` and removed by `mark_processed`, both single dict operations,
+    so workers can share an inventory without a lock.
+    """
+
+    def __init__(self):
+        self._zones: Dict[str, ZoneMachines] = {}
+        self._unprocessed_zones: Dict[str, Tuple[str, str]] = {}
+
+    def add_machines(self, machine_project: str, location: str, machines: Iterable[edgecontainer.Machine]):
+        zones: Dict[str, ZoneMachines] = {}
+
+        for m in machines:
+            zone = zones.setdefault(m.zone, ZoneMachines())
+            zone.machine_count += 1
+
+            hosted_node = m.hosted_node.strip()
+            if not hosted_node:
+                zone.free_machine_count += 1
+                continue
+
+            # projects/{project}/locations/{location}/clusters/{cluster}/nodePools/...
+            parts = hosted_node.split('/')
+            if len(parts) > 5:
+                zone.hosted_clusters.add(parts[5])
+
+        for zone_name, zone in zones.items():
+            logger.debug(f'ZONE {zone_name}: {zone.free_machine_count} free of {zone.machine_count} machines, hosting clusters {sorted(zone.hosted_clusters)}')
+            self._unprocessed_zones.setdefault(zone_name, (machine_project, location))
+
+        self._zones.update(zones)
+
+    def __contains__(self, zone: str) -> bool:
+        return zone in self._zones
+
+    def get_free_machine_count(self, zone: str) -> int:
+        return self._zones[zone].free_machine_count
+
+    def has_cluster(self, zone: str, cluster_name: str) -> bool:
+        return cluster_name in self._zones[zone].hosted_clusters
+
+    def mark_processed(self, zone: str):
+        self._unprocessed_zones.pop(zone, None)
+
+    def get_unprocessed_zones(self) -> Dict[str, Tuple[str, str]]:
+        """Returns zone -> (machine_project, location) for the zones no store has claimed."""
+        return dict(self._unprocessed_zones)
@@ -1,10 +1,15 @@
+import asyncio
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
-from src.acp_zone import ACPZone, get_zones
+from src.acp_zone import ACPZone, ZoneCache, get_zones, zone_cache
 from google.cloud import gdchardwaremanagement_v1alpha
 
 class TestACPZone(unittest.TestCase):
 
+    def setUp(self):
+        zone_cache.invalidate()
+
     @patch('src.acp_zone.clients')
     def test_get_zones(self, mock_clients):
         mock_hw_mgmt_client = MagicMock()
@@ -34,5 +39,133 @@ class TestACPZone(unittest.TestCase):
         )
         mock_hw_mgmt_client.list_zones.assert_called_once_with(expected_request)
 
+    @patch('src.acp_zone.clients')
+    def test_get_zones_cached(self, mock_clients):
+        mock_hw_mgmt_client = mock_clients.get_hardware_management_client.return_value
+        mock_hw_mgmt_client.list_zones.return_value = []
+
+        get_zones("test-project", "test-region")
+        get_zones("test-project", "test-region")
+        self.assertEqual(mock_hw_mgmt_client.list_zones.call_count, 1)
+
+        get_zones("test-project", "other-region")
+        self.assertEqual(mock_hw_mgmt_client.list_zones.call_count, 2)
+
+        get_zones("test-project", "test-region", force_refresh=True)
+        self.assertEqual(mock_hw_mgmt_client.list_zones.call_count, 3)
+
+class TestZoneCache(unittest.TestCase):
+
+    def test_expiry(self):
+        cache = ZoneCache(ttl_seconds=60)
+        load = MagicMock(return_value={})
+
+        with patch('src.acp_zone.time.monotonic', return_value=100):
+            cache.get(("project", "region"), load)
+            cache.get(("project", "region"), load)
+        with patch('src.acp_zone.time.monotonic', return_value=161):
+            cache.get(("project", "region"), load)
+
+        self.assertEqual(load.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        cache = ZoneCache()
+        load = MagicMock(side_effect=[Exception("unreachable"), {}])
+
+        with self.assertRaises(Exception):
+            cache.get(("project", "region"), load)
+        self.assertEqual(cache.get(("project", "region"), load), {})
+
+    def test_single_flight(self):
+        cache = ZoneCache()
+        release = threading.Event()
+        zones = {"zone": MagicMock()}
+        load = MagicMock(side_effect=lambda: release.wait(timeout=5) and zones)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get(("project", "region"), load))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(results, [zones] * 5)
+
+    def test_single_flight_async(self):
+        cache = ZoneCache()
+        zones = {"zone": MagicMock()}
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return zones
+
+        async def get_concurrently():
+            return await asyncio.gather(*(cache.get_async(("project", "region"), load) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(get_concurrently()), [zones] * 5)
+        self.assertEqual(len(calls), 1)
+        # Cached for the synchronous callers as well
+        self.assertIs(cache.get(("project", "region"), MagicMock()), zones)
+
+    def test_cancelled_async_listing_is_not_reused(self):
+        cache = ZoneCache()
+        zones = {"zone": MagicMock()}
+
+        async def hang():
+            await asyncio.sleep(60)
+
+        async def get_cancelled():
+            task = asyncio.ensure_future(cache.get_async(("project", "region"), hang))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        async def load():
+            return zones
+
+        asyncio.run(get_cancelled())
+        self.assertEqual(cache._in_flight_async, {})
+        # A later run, on another event loop, lists the zones again
+        self.assertIs(asyncio.run(cache.get_async(("project", "region"), load)), zones)
+
+    def test_async_listing_in_flight_is_not_shared_across_event_loops(self):
+        cache = ZoneCache()
+        zones = {"zone": MagicMock()}
+        started = threading.Event()
+        release = threading.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.get_running_loop().run_in_executor(None, release.wait)
+            return {"first": MagicMock()}
+
+        async def load():
+            return zones
+
+        first = threading.Thread(target=lambda: asyncio.run(cache.get_async(("project", "region"), hang)))
+        first.start()
+        started.wait()
+        try:
+            self.assertIs(asyncio.run(cache.get_async(("project", "region"), load)), zones)
+        finally:
+            release.set()
+            first.join()
+
+    def test_invalidate_detaches_listing_in_flight(self):
+        cache = ZoneCache()
+
+        def load():
+            cache.invalidate("project", "region")
+            return {"stale": MagicMock()}
+
+        cache.get(("project", "region"), load)
+
+        self.assertEqual(cache.get(("project", "region"), lambda: {}), {})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,157 @@
+import threading
+import unittest
+from unittest.mock import patch
+from google.api_core import exceptions
+from src.adaptive_concurrency import AdaptiveConcurrency, AdaptiveLimiter
+
+def call(limiter: AdaptiveLimiter, error: Exception = None):
+    with limiter.slot():
+        if error is not None:
+            raise error
+
+class TestAdaptiveLimiter(unittest.TestCase):
+
+    def test_grows_by_about_one_per_round_of_fast_calls(self):
+        limiter = AdaptiveLimiter("hwm", initial_limit=4, max_limit=10)
+
+        for _ in range(5):
+            call(limiter)
+
+        self.assertEqual(limiter.limit, 5)
+
+    def test_does_not_grow_past_max_limit(self):
+        limiter = AdaptiveLimiter("hwm", initial_limit=4, max_limit=5)
+
+        for _ in range(50):
+            call(limiter)
+
+        self.assertEqual(limiter.limit, 5)
+
+    @patch('src.adaptive_concurrency.time')
+    def test_slow_calls_do_not_grow_the_limit(self, mock_time):
+        mock_time.monotonic.side_effect = [0.0, 5.0] * 4
+        limiter = AdaptiveLimiter("hwm", initial_limit=4, latency_threshold=2.0)
+
+        for _ in range(4):
+            call(limiter)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_halves_on_resource_exhausted(self):
+        limiter = AdaptiveLimiter("edgecontainer", initial_limit=8)
+
+        with self.assertRaises(exceptions.ResourceExhausted):
+            call(limiter, exceptions.ResourceExhausted("quota"))
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_other_errors_leave_the_limit_untouched(self):
+        limiter = AdaptiveLimiter("edgecontainer", initial_limit=8)
+
+        with self.assertRaises(exceptions.NotFound):
+            call(limiter, exceptions.NotFound("missing"))
+
+        self.assertEqual(limiter.limit, 8)
+
+    def test_halves_once_per_round(self):
+        limiter = AdaptiveLimiter("edgecontainer", initial_limit=8)
+        started = threading.Barrier(3)
+
+        def throttled_call():
+            try:
+                with limiter.slot():
+                    started.wait()
+                    started.wait()
+                    raise exceptions.ResourceExhausted("quota")
+            except exceptions.ResourceExhausted:
+                pass
+
+        threads = [threading.Thread(target=throttled_call) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        # Both calls were in flight before either failed, only the first one backs off
+        started.wait()
+        started.wait()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(limiter.limit, 4)
+
+        with self.assertRaises(exceptions.ResourceExhausted):
+            call(limiter, exceptions.ResourceExhausted("quota"))
+        self.assertEqual(limiter.limit, 2)
+
+    def test_does_not_drop_below_min_limit(self):
+        limiter = AdaptiveLimiter("edgecontainer", initial_limit=1)
+
+        with self.assertRaises(exceptions.ResourceExhausted):
+            call(limiter, exceptions.ResourceExhausted("quota"))
+
+        self.assertEqual(limiter.limit, 1)
+
+    def test_blocks_calls_beyond_the_limit(self):
+        limiter = AdaptiveLimiter("gkehub", initial_limit=1)
+        release = threading.Event()
+        in_first_call = threading.Event()
+        second_call_done = threading.Event()
+
+        def first_call():
+            with limiter.slot():
+                in_first_call.set()
+                release.wait()
+
+        def second_call():
+            with limiter.slot():
+                second_call_done.set()
+
+        first = threading.Thread(target=first_call)
+        first.start()
+        in_first_call.wait()
+        second = threading.Thread(target=second_call)
+        second.start()
+
+        self.assertFalse(second_call_done.wait(0.1))
+        release.set()
+        self.assertTrue(second_call_done.wait(5))
+        first.join()
+        second.join()
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+
+    def test_disabled_slots_are_not_limited(self):
+        concurrency = AdaptiveConcurrency()
+        concurrency.configure(enabled=False, initial_limit=1, max_limit=10, latency_threshold=2.0)
+
+        with concurrency.slot("hwm"):
+            with concurrency.slot("hwm"):
+                pass
+
+        self.assertEqual(concurrency.get_limits(), {})
+
+    def test_limits_are_kept_per_api(self):
+        concurrency = AdaptiveConcurrency()
+        concurrency.configure(enabled=True, initial_limit=4, max_limit=10, latency_threshold=2.0)
+
+        with self.assertRaises(exceptions.ServiceUnavailable):
+            with concurrency.slot("hwm"):
+                raise exceptions.ServiceUnavailable("unavailable")
+        with concurrency.slot("gkehub"):
+            pass
+
+        self.assertEqual(concurrency.get_limits(), {"hwm": 2, "gkehub": 4})
+
+    def test_limits_are_kept_across_runs_with_the_same_settings(self):
+        concurrency = AdaptiveConcurrency()
+        concurrency.configure(enabled=True, initial_limit=4, max_limit=10, latency_threshold=2.0)
+        with self.assertRaises(exceptions.ResourceExhausted):
+            with concurrency.slot("hwm"):
+                raise exceptions.ResourceExhausted("quota")
+
+        concurrency.configure(enabled=True, initial_limit=4, max_limit=10, latency_threshold=2.0)
+        self.assertEqual(concurrency.get_limits(), {"hwm": 2})
+
+        concurrency.configure(enabled=True, initial_limit=8, max_limit=10, latency_threshold=2.0)
+        self.assertEqual(concurrency.get_limits(), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from google.api_core import exceptions
+from google.cloud.devtools import cloudbuild
+from src.build_dispatcher import AsyncBuildDispatcher, BuildDispatcher, TokenBucket
+from src.sweep_cursor import RunDeadline
+
+def create_request() -> cloudbuild.RunBuildTriggerRequest:
+    return cloudbuild.RunBuildTriggerRequest(name="projects/p/locations/l/triggers/t")
+
+class TestTokenBucket(unittest.TestCase):
+
+    @patch('src.build_dispatcher.time')
+    def test_waits_for_tokens_once_burst_is_spent(self, mock_time):
+        now = [100.0]
+        mock_time.monotonic.side_effect = lambda: now[0]
+        mock_time.sleep.side_effect = lambda seconds: now.__setitem__(0, now[0] + seconds)
+        bucket = TokenBucket(rate=2, capacity=2)
+
+        for _ in range(4):
+            bucket.acquire()
+
+        # Two tokens from the burst, then one every half second
+        self.assertAlmostEqual(now[0], 101.0)
+
+class TestBuildDispatcher(unittest.TestCase):
+
+    def test_triggers_builds(self):
+        cb_client = MagicMock()
+
+        with BuildDispatcher(cb_client, rate=100, burst=10) as dispatcher:
+            futures = [dispatcher.submit(f"zone{i}", create_request()) for i in range(3)]
+
+        self.assertEqual([future.result() for future in futures], [True, True, True])
+        self.assertEqual(cb_client.run_build_trigger.call_count, 3)
+
+    @patch('src.build_dispatcher.time.sleep')
+    def test_retries_resource_exhausted(self, mock_sleep):
+        cb_client = MagicMock()
+        cb_client.run_build_trigger.side_effect = [exceptions.ResourceExhausted("quota"), exceptions.ResourceExhausted("quota"), MagicMock()]
+
+        with BuildDispatcher(cb_client, rate=100, burst=10, initial_backoff=1) as dispatcher:
+            self.assertTrue(dispatcher.submit("zone1", create_request()).result())
+
+        self.assertEqual(cb_client.run_build_trigger.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertLessEqual(mock_sleep.call_args_list[1].args[0], 2)
+
+    @patch('src.build_dispatcher.time.sleep')
+    def test_gives_up_after_max_attempts(self, mock_sleep):
+        cb_client = MagicMock()
+        cb_client.run_build_trigger.side_effect = exceptions.ResourceExhausted("quota")
+
+        with BuildDispatcher(cb_client, rate=100, burst=10, max_attempts=3) as dispatcher:
+            self.assertFalse(dispatcher.submit("zone1", create_request()).result())
+
+        self.assertEqual(cb_client.run_build_trigger.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        cb_client = MagicMock()
+        cb_client.run_build_trigger.side_effect = exceptions.PermissionDenied("denied")
+
+        with BuildDispatcher(cb_client, rate=100, burst=10) as dispatcher:
+            self.assertFalse(dispatcher.submit("zone1", create_request()).result())
+
+        self.assertEqual(cb_client.run_build_trigger.call_count, 1)
+
+    def test_max_in_flight(self):
+        lock = threading.Lock()
+        in_flight = [0]
+        max_seen = [0]
+
+        def run_build_trigger(request):
+            with lock:
+                in_flight[0] += 1
+                max_seen[0] = max(max_seen[0], in_flight[0])
+            threading.Event().wait(0.01)
+            with lock:
+                in_flight[0] -= 1
+
+        cb_client = MagicMock()
+        cb_client.run_build_trigger.side_effect = run_build_trigger
+
+        with BuildDispatcher(cb_client, rate=1000, burst=100, max_in_flight=2) as dispatcher:
+            futures = [dispatcher.submit(f"zone{i}", create_request()) for i in range(10)]
+
+        self.assertTrue(all(future.result() for future in futures))
+        self.assertLessEqual(max_seen[0], 2)
+    @patch('src.build_dispatcher.time.sleep')
+    def test_not_rate_limited_by_default(self, mock_sleep):
+        cb_client = MagicMock()
+
+        with BuildDispatcher(cb_client) as dispatcher:
+            futures = [dispatcher.submit(f"zone{i}", create_request()) for i in range(100)]
+
+        self.assertTrue(all(future.result() for future in futures))
+        self.assertIsNone(dispatcher.bucket)
+        mock_sleep.assert_not_called()
+
+    def test_skips_builds_once_deadline_expired(self):
+        cb_client = MagicMock()
+
+        with BuildDispatcher(cb_client, deadline=RunDeadline(1e-9)) as dispatcher:
+            self.assertIsNone(dispatcher.submit("zone1", create_request()).result())
+
+        cb_client.run_build_trigger.assert_not_called()
+
+    @patch('src.build_dispatcher.time.sleep')
+    def test_does_not_wait_for_tokens_past_deadline(self, mock_sleep):
+        cb_client = MagicMock()
+
+        # The second token is only available in 100s, after the deadline
+        with BuildDispatcher(cb_client, rate=0.01, burst=1, max_in_flight=1, deadline=RunDeadline(60)) as dispatcher:
+            futures = [dispatcher.submit(f"zone{i}", create_request()) for i in range(2)]
+
+        self.assertEqual([future.result() for future in futures], [True, None])
+        self.assertEqual(cb_client.run_build_trigger.call_count, 1)
+        mock_sleep.assert_not_called()
+
+class TestAsyncBuildDispatcher(unittest.TestCase):
+
+    def test_skips_builds_once_deadline_expired(self):
+        cb_client = MagicMock()
+        cb_client.run_build_trigger = AsyncMock()
+        dispatcher = AsyncBuildDispatcher(cb_client, deadline=RunDeadline(1e-9))
+
+        self.assertIsNone(asyncio.run(dispatcher.trigger("zone1", create_request())))
+        cb_client.run_build_trigger.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,17 @@
+import concurrent.futures
+import threading
 import unittest
 from unittest.mock import patch, MagicMock, call
 import os
+import tempfile
 from google.cloud.devtools import cloudbuild
 from google.protobuf.timestamp_pb2 import Timestamp
 from google.cloud.devtools.cloudbuild import Build
 
 # Assuming the classes are in a file named 'build_history.py'
 # If not, adjust the import path accordingly
-from src.build_history import BuildHistory, BuildSummary
+from src.build_history import BuildHistory, BuildSummary, InFlightBuildIndex, LazyBuildHistory, TriggerIdCache, trigger_id_cache
+from src.state_store import LocalFileStateStore
 
 Status = Build.Status
 
@@ -112,10 +116,11 @@ class TestBuildSummary(unittest.TestCase):
         self.assertFalse(summary.retriable)
 
 
-@patch('google.cloud.devtools.cloudbuild.CloudBuildClient') # Patch the client in the module where it's used
+@patch('src.build_history.clients') # Patch the shared clients of the module where they're used
 class TestBuildHistory(unittest.TestCase):
 
     def setUp(self):
+        trigger_id_cache.invalidate()
         # Set environment variable for logging if needed, though we don't assert logs here
         os.environ["LOG_LEVEL"] = "DEBUG"
         self.project_id = "test-project"
@@ -130,8 +135,8 @@ class TestBuildHistory(unittest.TestCase):
         if "LOG_LEVEL" in os.environ:
             del os.environ["LOG_LEVEL"]
 
-    def test_init(self, MockCloudBuildClient):
-        instance = MockCloudBuildClient.return_value
+    def test_init(self, MockClients):
+        instance = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -145,17 +150,16 @@ class TestBuildHistory(unittest.TestCase):
         self.assertEqual(history.trigger_name, self.trigger_name)
         self.assertIs(history.client, instance)
         self.assertIsNotNone(history.builds)
-        MockCloudBuildClient.assert_called_once()
 
-    def test_get_build_history_no_triggers(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_no_triggers(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_client.list_build_triggers.return_value = [] # No triggers found
 
         with self.assertRaises(Exception):
             BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
 
-    def test_get_build_history_no_matching_triggers(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_no_matching_triggers(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = "other-trigger-name"
         mock_trigger.id = "other-id"
@@ -164,8 +168,8 @@ class TestBuildHistory(unittest.TestCase):
         with self.assertRaises(Exception):
             BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
 
-    def test_get_build_history_matching_trigger_no_builds(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_matching_trigger_no_builds(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -182,8 +186,8 @@ class TestBuildHistory(unittest.TestCase):
             parent=self.parent
         ))
 
-    def test_get_build_history_with_builds(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_with_builds(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -218,8 +222,8 @@ class TestBuildHistory(unittest.TestCase):
 
         mock_client.list_builds.assert_called_once()
 
-    def test_get_build_history_groups_by_hash(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_groups_by_hash(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -239,8 +243,8 @@ class TestBuildHistory(unittest.TestCase):
         self.assertIn(("zone-a", "hash-2"), build_dict)
         self.assertEqual(len(build_dict), 2)
 
-    def test_get_build_history_extracts_try_count(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_extracts_try_count(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -257,8 +261,8 @@ class TestBuildHistory(unittest.TestCase):
         self.assertEqual(history.get_latest_try_count("zone-a", "hash-1"), 3)
 
     @patch('src.build_history.BuildSummary')
-    def test_get_build_history_optimizes_traversal(self, MockBuildSummary, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_optimizes_traversal(self, MockBuildSummary, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -285,8 +289,8 @@ class TestBuildHistory(unittest.TestCase):
         # Verify that flag_first_non_failure_build was only called ONCE!
         self.assertEqual(mock_summary.flag_first_non_failure_build.call_count, 1)
 
-    def test_latest_attempt_failed(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_latest_attempt_failed(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -308,8 +312,8 @@ class TestBuildHistory(unittest.TestCase):
         summary = history.builds[("zone-b", "hash-2")]
         self.assertFalse(summary.latest_attempt_failed)
 
-    def test_should_retry_independent_per_hash(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_independent_per_hash(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -327,8 +331,8 @@ class TestBuildHistory(unittest.TestCase):
         self.assertTrue(history.should_retry_zone_build("zone-a", "hash-1"))
         self.assertFalse(history.should_retry_zone_build("zone-a", "hash-2"))
 
-    def test_get_build_history_backward_compatibility(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_backward_compatibility(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -345,8 +349,8 @@ class TestBuildHistory(unittest.TestCase):
         # Verify it uses empty string as hash
         self.assertIn(("zone-a", ""), build_dict)
 
-    def test_get_latest_try_count_empty_history(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_latest_try_count_empty_history(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -358,8 +362,8 @@ class TestBuildHistory(unittest.TestCase):
         # Verify it returns 0 for non-existent history
         self.assertEqual(history.get_latest_try_count("zone-a", "hash-1"), 0)
 
-    def test_get_build_history_multiple_matching_triggers(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_get_build_history_multiple_matching_triggers(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         trigger1 = MagicMock(); trigger1.name = self.trigger_name; trigger1.id = "id1"
         trigger2 = MagicMock(); trigger2.name = "other-trigger"; trigger2.id = "id-other"
         trigger3 = MagicMock(); trigger3.name = self.trigger_name; trigger3.id = "id3"
@@ -376,8 +380,8 @@ class TestBuildHistory(unittest.TestCase):
             parent=self.parent
         ))
 
-    def test_should_retry_zone_build_zone_not_found(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_zone_build_zone_not_found(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
         mock_client.list_build_triggers.return_value = [mock_trigger]
         build1_zone1 = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"})
@@ -388,8 +392,8 @@ class TestBuildHistory(unittest.TestCase):
         self.assertFalse(history.should_retry_zone_build("zone-b", ""))
         self.assertIn(("zone-a", ""), history.builds) # History should be populated
 
-    def test_should_retry_zone_build_is_retriable(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_zone_build_is_retriable(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
         mock_client.list_build_triggers.return_value = [mock_trigger]
         build1_zone1 = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"})
@@ -398,8 +402,8 @@ class TestBuildHistory(unittest.TestCase):
         history = BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name) # max_retries = 2
         self.assertTrue(history.should_retry_zone_build("zone-a", ""))
 
-    def test_should_retry_zone_build_not_retriable_max_exceeded(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_zone_build_not_retriable_max_exceeded(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
         mock_client.list_build_triggers.return_value = [mock_trigger]
         build1 = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"})
@@ -410,8 +414,8 @@ class TestBuildHistory(unittest.TestCase):
         history = BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name) # max_retries = 2
         self.assertTrue(history.should_retry_zone_build("zone-a", ""))
 
-    def test_should_retry_zone_build_not_retriable_status_success(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_zone_build_not_retriable_status_success(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
         mock_client.list_build_triggers.return_value = [mock_trigger]
         build1 = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"})
@@ -421,8 +425,8 @@ class TestBuildHistory(unittest.TestCase):
         history = BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
         self.assertFalse(history.should_retry_zone_build("zone-a", ""))
 
-    def test_should_retry_zone_build_not_retriable_status_working(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_zone_build_not_retriable_status_working(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
         mock_client.list_build_triggers.return_value = [mock_trigger]
         build1 = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"})
@@ -432,8 +436,8 @@ class TestBuildHistory(unittest.TestCase):
         history = BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
         self.assertFalse(history.should_retry_zone_build("zone-a", ""))
 
-    def test_should_retry_zone_build_eager_load(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_zone_build_eager_load(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
         mock_client.list_build_triggers.return_value = [mock_trigger]
         build1 = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"})
@@ -451,8 +455,8 @@ class TestBuildHistory(unittest.TestCase):
         self.assertTrue(history.should_retry_zone_build("zone-a", ""))
         mock_client.list_builds.assert_not_called() # Should not call again
 
-    def test_should_retry_zone_build_missing_zone_name(self, MockCloudBuildClient):
-        mock_client = MockCloudBuildClient.return_value
+    def test_should_retry_zone_build_missing_zone_name(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
         mock_trigger = MagicMock()
         mock_trigger.name = self.trigger_name
         mock_trigger.id = self.trigger_id
@@ -463,4 +467,367 @@ class TestBuildHistory(unittest.TestCase):
         with self.assertRaisesRegex(Exception, 'missing zone_name'):
             history.should_retry_zone_build(None, "")
         with self.assertRaisesRegex(Exception, 'missing zone_name'):
-            history.should_retry_zone_build("", "")
\ No newline at end of file
+            history.should_retry_zone_build("", "")
+    def create_candidate_history(self, MockClients, builds, candidate_hashes, max_builds=1000):
+        mock_client = MockClients.get_cloudbuild_client.return_value
+        mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
+        mock_client.list_build_triggers.return_value = [mock_trigger]
+        listed = []
+
+        def list_builds(request):
+            for build in builds:
+                listed.append(build.id)
+                yield build
+
+        mock_client.list_builds.side_effect = list_builds
+        history = BuildHistory(
+            self.project_id, self.region, self.max_retries, self.trigger_name,
+            candidate_hashes=candidate_hashes, max_builds=max_builds,
+        )
+        return history, listed
+
+    def test_listing_stops_once_candidates_are_settled(self, MockClients):
+        builds = [
+            create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"}),
+            create_mock_build("b2", Status.SUCCESS, {"_ZONE": "zone-b", "_INTENT_HASH": "hash-2"}),
+            create_mock_build("b3", Status.FAILURE, {"_ZONE": "zone-c", "_INTENT_HASH": "hash-3"}),
+            create_mock_build("b4", Status.WORKING, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"}),
+            create_mock_build("b5", Status.FAILURE, {"_ZONE": "zone-b", "_INTENT_HASH": "hash-2"}),
+        ]
+
+        history, listed = self.create_candidate_history(MockClients, builds, {"hash-1", "hash-2"})
+
+        self.assertEqual(listed, ["b1", "b2", "b3", "b4"])
+        self.assertFalse(history.should_retry_zone_build("zone-a", "hash-1"))
+        self.assertEqual(history.builds[("zone-a", "hash-1")].latest_non_failure_status, Status.WORKING)
+        self.assertFalse(history.should_retry_zone_build("zone-b", "hash-2"))
+
+    def test_failed_candidates_are_listed_up_to_the_ceiling(self, MockClients):
+        builds = [
+            create_mock_build(f"b{i}", Status.FAILURE, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"})
+            for i in range(5)
+        ]
+
+        history, listed = self.create_candidate_history(MockClients, builds, {"hash-1"}, max_builds=3)
+
+        self.assertEqual(listed, ["b0", "b1", "b2", "b3"])
+        self.assertTrue(history.should_retry_zone_build("zone-a", "hash-1"))
+
+    def test_candidates_without_builds_are_listed_up_to_the_ceiling(self, MockClients):
+        builds = [
+            create_mock_build(f"b{i}", Status.SUCCESS, {"_ZONE": f"zone-{i}", "_INTENT_HASH": f"hash-{i}"})
+            for i in range(5)
+        ]
+
+        history, listed = self.create_candidate_history(MockClients, builds, {"hash-new"}, max_builds=2)
+
+        self.assertEqual(listed, ["b0", "b1", "b2"])
+        self.assertEqual(len(history.builds), 2)
+
+    def test_trigger_ids_are_cached(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
+        mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
+        mock_client.list_build_triggers.return_value = [mock_trigger]
+        mock_client.list_builds.return_value = [create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"})]
+
+        BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
+        history = BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
+
+        mock_client.list_build_triggers.assert_called_once()
+        self.assertEqual(mock_client.list_builds.call_count, 2)
+        self.assertTrue(history.should_retry_zone_build("zone-a", ""))
+
+    def test_cached_trigger_ids_without_builds_are_resolved_again(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
+        old_trigger = MagicMock(); old_trigger.name = self.trigger_name; old_trigger.id = "old-id"
+        new_trigger = MagicMock(); new_trigger.name = self.trigger_name; new_trigger.id = "new-id"
+        mock_client.list_build_triggers.return_value = [old_trigger]
+        mock_client.list_builds.return_value = [create_mock_build("b1", Status.SUCCESS, {"_ZONE": "zone-a"})]
+        BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
+
+        # The trigger was recreated, its old id has no builds anymore
+        mock_client.list_build_triggers.return_value = [new_trigger]
+        mock_client.list_builds.side_effect = lambda request: (
+            [create_mock_build("b2", Status.FAILURE, {"_ZONE": "zone-a"})] if request.filter == "trigger_id=new-id" else []
+        )
+        history = BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
+
+        self.assertEqual(mock_client.list_build_triggers.call_count, 2)
+        self.assertTrue(history.should_retry_zone_build("zone-a", ""))
+        self.assertEqual(trigger_id_cache.get((self.project_id, self.region, self.trigger_name)), ["new-id"])
+
+    def test_zones_with_a_build_in_flight_are_not_claimed(self, MockClients):
+        mock_client = MockClients.get_cloudbuild_client.return_value
+        mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = self.trigger_id
+        mock_client.list_build_triggers.return_value = [mock_trigger]
+        mock_client.list_builds.return_value = [
+            create_mock_build("b3", Status.QUEUED, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"}),
+            create_mock_build("b2", Status.FAILURE, {"_ZONE": "zone-b", "_INTENT_HASH": "hash-2"}),
+            create_mock_build("b1", Status.WORKING, {"_ZONE": "zone-b", "_INTENT_HASH": "hash-2"}),
+        ]
+
+        history = BuildHistory(self.project_id, self.region, self.max_retries, self.trigger_name)
+
+        # zone-b has an older build still working
+        self.assertFalse(history.claim_zone_build("zone-a"))
+        self.assertFalse(history.claim_zone_build("zone-b"))
+        self.assertTrue(history.claim_zone_build("zone-c"))
+        # The build just triggered for zone-c is in flight too
+        self.assertFalse(history.claim_zone_build("zone-c"))
+        self.assertEqual(history.get_suppressed_build_count(), 3)
+
+
+@patch('src.build_history.clients')
+class TestIncrementalBuildHistory(unittest.TestCase):
+
+    def setUp(self):
+        trigger_id_cache.invalidate()
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = LocalFileStateStore(self.directory.name)
+        self.project_id = "test-project"
+        self.region = "us-central1"
+        self.trigger_name = "my-cool-trigger"
+        self.parent = f"projects/{self.project_id}/locations/{self.region}"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_history(self, MockClients, builds, trigger_id="trigger-123", **kwargs):
+        mock_client = MockClients.get_cloudbuild_client.return_value
+        mock_trigger = MagicMock(); mock_trigger.name = self.trigger_name; mock_trigger.id = trigger_id
+        mock_client.list_build_triggers.return_value = [mock_trigger]
+        mock_client.list_builds.reset_mock()
+        mock_client.list_builds.return_value = builds
+        return BuildHistory(self.project_id, self.region, 2, self.trigger_name, self.store, **kwargs)
+
+    def get_listing_filter(self, MockClients):
+        return MockClients.get_cloudbuild_client.return_value.list_builds.call_args.kwargs["request"].filter
+
+    def test_first_run_lists_the_whole_history(self, MockClients):
+        build = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1", "_TRY_COUNT": "1"}, 100)
+
+        history = self.create_history(MockClients, [build])
+
+        self.assertEqual(self.get_listing_filter(MockClients), "trigger_id=trigger-123")
+        self.assertTrue(history.should_retry_zone_build("zone-a", "hash-1"))
+        checkpoint = self.store.load(BuildHistory.CHECKPOINT_KEY)
+        self.assertEqual(checkpoint["watermark"], 100)
+        self.assertEqual([record["id"] for record in checkpoint["builds"]], ["b1"])
+
+    def test_checkpoint_keeps_the_history_of_other_candidates(self, MockClients):
+        b3 = create_mock_build("b3", Status.SUCCESS, {"_ZONE": "zone-1", "_INTENT_HASH": "hash-1", "_TRY_COUNT": "0"}, 300)
+        b2 = create_mock_build("b2", Status.FAILURE, {"_ZONE": "zone-2", "_INTENT_HASH": "hash-2", "_TRY_COUNT": "2"}, 200)
+        b1 = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-2", "_INTENT_HASH": "hash-2", "_TRY_COUNT": "1"}, 100)
+        self.create_history(MockClients, [b3, b2, b1], candidate_hashes={"hash-1"})
+
+        # The next run only lists the builds created since the first one and looks for another hash
+        history = self.create_history(MockClients, [b3], candidate_hashes={"hash-2"})
+
+        self.assertEqual(history.get_latest_try_count("zone-2", "hash-2"), 2)
+        self.assertTrue(history.should_retry_zone_build("zone-2", "hash-2"))
+
+    def test_next_runs_only_list_newer_builds(self, MockClients):
+        success = create_mock_build("b1", Status.SUCCESS, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1", "_TRY_COUNT": "0"}, 100)
+        self.create_history(MockClients, [success])
+
+        failure = create_mock_build("b2", Status.FAILURE, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1", "_TRY_COUNT": "1"}, 200)
+        history = self.create_history(MockClients, [failure])
+
+        self.assertEqual(
+            self.get_listing_filter(MockClients),
+            '(trigger_id=trigger-123) AND create_time>="1970-01-01T00:01:40.000000Z"',
+        )
+        summary = history.builds[("zone-a", "hash-1")]
+        # The checkpointed success still counts, the newest build gives the try count
+        self.assertEqual(summary.latest_non_failure_status, Status.SUCCESS)
+        self.assertFalse(summary.retriable)
+        self.assertTrue(summary.latest_attempt_failed)
+        self.assertEqual(summary.latest_try_count, 1)
+        self.assertEqual(self.store.load(BuildHistory.CHECKPOINT_KEY)["watermark"], 200)
+
+    def test_watermark_does_not_pass_running_builds(self, MockClients):
+        working = create_mock_build("b1", Status.WORKING, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"}, 100)
+        other = create_mock_build("b2", Status.SUCCESS, {"_ZONE": "zone-b", "_INTENT_HASH": "hash-2"}, 200)
+        history = self.create_history(MockClients, [other, working])
+
+        self.assertFalse(history.should_retry_zone_build("zone-a", "hash-1"))
+        self.assertEqual(self.store.load(BuildHistory.CHECKPOINT_KEY)["watermark"], 100)
+
+        # The running build is listed again and its final status replaces the checkpointed one
+        failed = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"}, 100)
+        history = self.create_history(MockClients, [other, failed])
+
+        self.assertTrue(history.should_retry_zone_build("zone-a", "hash-1"))
+        self.assertFalse(history.should_retry_zone_build("zone-b", "hash-2"))
+        self.assertEqual(self.store.load(BuildHistory.CHECKPOINT_KEY)["watermark"], 200)
+
+    def test_builds_older_than_a_success_are_not_checkpointed(self, MockClients):
+        builds = [
+            create_mock_build("b3", Status.FAILURE, {"_ZONE": "zone-a"}, 300),
+            create_mock_build("b2", Status.SUCCESS, {"_ZONE": "zone-a"}, 200),
+            create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"}, 100),
+            create_mock_build("b0", Status.FAILURE, {}, 50),
+        ]
+
+        self.create_history(MockClients, builds)
+
+        checkpoint = self.store.load(BuildHistory.CHECKPOINT_KEY)
+        self.assertEqual([record["id"] for record in checkpoint["builds"]], ["b3", "b2"])
+
+    def test_too_many_new_builds_list_the_whole_history(self, MockClients):
+        self.create_history(MockClients, [create_mock_build("b1", Status.SUCCESS, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"}, 100)])
+
+        builds = [create_mock_build(f"b{i}", Status.FAILURE, {"_ZONE": f"zone-{i}", "_INTENT_HASH": "hash-2"}, 100 + i) for i in range(5, 1, -1)]
+        history = self.create_history(MockClients, builds, max_builds=3)
+
+        mock_client = MockClients.get_cloudbuild_client.return_value
+        self.assertEqual(
+            [request.kwargs["request"].filter for request in mock_client.list_builds.call_args_list],
+            ['(trigger_id=trigger-123) AND create_time>="1970-01-01T00:01:40.000000Z"', "trigger_id=trigger-123"],
+        )
+        self.assertEqual(set(history.builds), {("zone-5", "hash-2"), ("zone-4", "hash-2"), ("zone-3", "hash-2")})
+        self.assertEqual(self.store.load(BuildHistory.CHECKPOINT_KEY)["watermark"], 105)
+
+    def test_rebuilt_checkpoint_is_not_cut_short_by_the_candidates(self, MockClients):
+        builds = [
+            create_mock_build("b3", Status.SUCCESS, {"_ZONE": "zone-1", "_INTENT_HASH": "hash-1"}, 300),
+            create_mock_build("b2", Status.FAILURE, {"_ZONE": "zone-2", "_INTENT_HASH": "hash-2", "_TRY_COUNT": "1"}, 200),
+        ]
+        self.create_history(MockClients, builds[:1])
+
+        # The checkpoint could not be loaded, then the trigger was recreated
+        for run, load_error, trigger_id in (("load error", OSError("unavailable"), "trigger-123"), ("trigger recreated", None, "trigger-456")):
+            with self.subTest(run=run):
+                trigger_id_cache.invalidate()
+                with patch.object(self.store, "load", side_effect=load_error, wraps=self.store.load):
+                    self.create_history(MockClients, builds, trigger_id=trigger_id, candidate_hashes={"hash-1"})
+
+                checkpoint = self.store.load(BuildHistory.CHECKPOINT_KEY)
+                self.assertEqual([record["id"] for record in checkpoint["builds"]], ["b3", "b2"])
+
+    def test_stale_pending_builds_do_not_hold_the_watermark(self, MockClients):
+        builds = [
+            create_mock_build("b3", Status.SUCCESS, {"_ZONE": "zone-c", "_INTENT_HASH": "hash-3"}, 5000),
+            create_mock_build("b2", Status.WORKING, {"_ZONE": "zone-b", "_INTENT_HASH": "hash-2"}, 4500),
+            create_mock_build("b1", Status.PENDING, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-1"}, 100),
+        ]
+
+        history = self.create_history(MockClients, builds, max_pending_age_seconds=1000)
+
+        # The pending build still counts in this run, but is given up on in the checkpoint
+        self.assertFalse(history.claim_zone_build("zone-a"))
+        checkpoint = self.store.load(BuildHistory.CHECKPOINT_KEY)
+        self.assertEqual(checkpoint["watermark"], 4500)
+        self.assertEqual([record["id"] for record in checkpoint["builds"]], ["b3", "b2"])
+
+    def test_builds_of_superseded_intent_hashes_are_not_checkpointed(self, MockClients):
+        builds = [
+            create_mock_build("b4", Status.FAILURE, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-new"}, 400),
+            create_mock_build("b3", Status.QUEUED, {"_ZONE": "zone-b", "_INTENT_HASH": "hash-old"}, 300),
+            create_mock_build("b2", Status.FAILURE, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-old"}, 200),
+            create_mock_build("b1", Status.SUCCESS, {"_ZONE": "zone-a", "_INTENT_HASH": "hash-old"}, 100),
+        ]
+
+        self.create_history(MockClients, builds, intent_hashes={"hash-new"})
+
+        # Builds still running are kept whatever their intent hash
+        checkpoint = self.store.load(BuildHistory.CHECKPOINT_KEY)
+        self.assertEqual([record["id"] for record in checkpoint["builds"]], ["b4", "b3"])
+
+    def test_checkpoint_of_other_triggers_is_ignored(self, MockClients):
+        build = create_mock_build("b1", Status.FAILURE, {"_ZONE": "zone-a"}, 100)
+        self.create_history(MockClients, [build])
+
+        # The trigger was recreated and its cached id expired
+        trigger_id_cache.invalidate()
+        history = self.create_history(MockClients, [], trigger_id="trigger-456")
+
+        self.assertEqual(self.get_listing_filter(MockClients), "trigger_id=trigger-456")
+        self.assertEqual(history.builds, {})
+
+
+class TestTriggerIdCache(unittest.TestCase):
+
+    @patch('src.build_history.time')
+    def test_entries_expire(self, mock_time):
+        cache = TriggerIdCache(ttl_seconds=60)
+        key = ("test-project", "us-central1", "my-cool-trigger")
+
+        mock_time.monotonic.return_value = 0
+        cache.put(key, ["trigger-123"])
+        mock_time.monotonic.return_value = 59
+        self.assertEqual(cache.get(key), ["trigger-123"])
+        mock_time.monotonic.return_value = 60
+        self.assertIsNone(cache.get(key))
+
+    def test_disabled_with_no_ttl(self):
+        cache = TriggerIdCache(ttl_seconds=0)
+        key = ("test-project", "us-central1", "my-cool-trigger")
+
+        cache.put(key, ["trigger-123"])
+
+        self.assertIsNone(cache.get(key))
+
+    def test_invalidate(self):
+        cache = TriggerIdCache()
+        key = ("test-project", "us-central1", "my-cool-trigger")
+        other_key = ("test-project", "us-central1", "other-trigger")
+        cache.put(key, ["trigger-123"])
+        cache.put(other_key, ["trigger-456"])
+
+        cache.invalidate(key)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.get(other_key), ["trigger-456"])
+
+        cache.invalidate()
+        self.assertIsNone(cache.get(other_key))
+
+
+class TestLazyBuildHistory(unittest.TestCase):
+
+    def test_lookups_wait_for_the_build_history(self):
+        future = concurrent.futures.Future()
+        history = LazyBuildHistory(future)
+        loaded = MagicMock()
+        loaded.should_retry_zone_build.return_value = True
+        loaded.get_latest_try_count.return_value = 2
+        summary = BuildSummary()
+        loaded.get_summary.return_value = summary
+
+        threading.Timer(0.05, future.set_result, [loaded]).start()
+
+        self.assertTrue(history.should_retry_zone_build("zone-a", "hash-1"))
+        self.assertEqual(history.get_latest_try_count("zone-a", "hash-1"), 2)
+        self.assertIs(history.get_summary("zone-a", "hash-1"), summary)
+        loaded.should_retry_zone_build.assert_called_once_with("zone-a", "hash-1")
+
+    def test_lookups_raise_the_loading_error(self):
+        future = concurrent.futures.Future()
+        future.set_exception(Exception("No triggers found named my-cool-trigger"))
+        history = LazyBuildHistory(future)
+
+        with self.assertRaisesRegex(Exception, "No triggers found"):
+            history.get_retriable_intent_hashes()
+
+
+class TestInFlightBuildIndex(unittest.TestCase):
+
+    def test_a_zone_is_claimed_once(self):
+        index = InFlightBuildIndex(["zone-a"])
+        results = []
+        barrier = threading.Barrier(4)
+
+        def claim():
+            barrier.wait()
+            results.append(index.claim("zone-b"))
+
+        threads = [threading.Thread(target=claim) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [False, False, False, True])
+        self.assertIn("zone-a", index)
+        self.assertIn("zone-b", index)
+        self.assertEqual(index.suppressed, 3)
@@ -0,0 +1,88 @@
+import unittest
+from src.bulk_validation import BulkIntentValidator
+from src.cluster_intent_model import SourceOfTruthModel
+
+def create_row(**overrides):
+    row = {
+        "store_id": "store1",
+        "zone_name": "",
+        "machine_project_id": "machine-project",
+        "fleet_project_id": "fleet-project",
+        "cluster_name": "cluster1",
+        "location": "us-central1",
+        "node_count": "3",
+        "cluster_ipv4_cidr": "10.0.0.0/16",
+        "services_ipv4_cidr": "10.1.0.0/16",
+        "external_load_balancer_ipv4_address_pools": "1.1.1.1-1.1.1.10",
+        "sync_repo": "https://github.com/org/repo",
+        "sync_branch": "main",
+        "sync_dir": ".",
+        "secrets_project_id": "secrets-project",
+        "git_token_secrets_manager_name": "git-sec",
+        "cluster_version": "1.12.0",
+        "maintenance_window_recurrence": "FREQ=WEEKLY;BYDAY=SA",
+        "maintenance_window_start": "2024-01-01T00:00:00Z",
+        "maintenance_window_end": "2024-01-01T04:00:00Z",
+        "subnet_vlans": "100,200",
+        "labels": "env=prod",
+        "recreate_on_delete": "false",
+        "enable_robin_cns": "",
+    }
+    row.update(overrides)
+    return row
+
+class TestBulkIntentValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = BulkIntentValidator()
+
+    def assert_same_as_pydantic(self, row):
+        [edge_zone] = self.validator.validate([row])
+        self.assertIsNotNone(edge_zone)
+        self.assertEqual(edge_zone.model_dump_json(), SourceOfTruthModel.model_validate(row).model_dump_json())
+
+    def test_valid_rows_match_pydantic(self):
+        self.assert_same_as_pydantic(create_row())
+        self.assert_same_as_pydantic(create_row(zone_name="zone-1", node_count="-1", cluster_version=" "))
+        self.assert_same_as_pydantic(create_row(custom_column="custom value", another_column=""))
+
+        missing_optional = create_row()
+        del missing_optional["labels"]
+        self.assert_same_as_pydantic(missing_optional)
+
+    def test_boolean_values_match_pydantic(self):
+        for value in ["true", "True", "TRUE", "t", "yes", "Y", "on", "1", "false", "F", "no", "n", "off", "0"]:
+            with self.subTest(value=value):
+                self.assert_same_as_pydantic(create_row(recreate_on_delete=value, enable_robin_cns=value))
+
+    def test_invalid_rows_fall_back(self):
+        invalid_rows = [
+            create_row(store_id="Store_1"),
+            create_row(machine_project_id="short"),
+            create_row(cluster_name=""),
+            create_row(node_count="three"),
+            create_row(cluster_ipv4_cidr="10.0.0.1/16"),
+            create_row(services_ipv4_cidr="not-a-cidr"),
+            create_row(sync_branch=None),
+            create_row(recreate_on_delete="maybe"),
+        ]
+        surplus_values = create_row()
+        surplus_values[None] = ["surplus"]
+        invalid_rows.append(surplus_values)
+        missing_required = create_row()
+        del missing_required["sync_dir"]
+        invalid_rows.append(missing_required)
+
+        results = self.validator.validate(invalid_rows + [create_row()])
+
+        self.assertEqual(results[:-1], [None] * len(invalid_rows))
+        self.assertIsNotNone(results[-1])
+
+    def test_ambiguous_values_fall_back(self):
+        # Accepted by pydantic, but outside of what the bulk validator vouches for
+        for row in [create_row(node_count="3.0"), create_row(node_count=" 3"), create_row(recreate_on_delete=" true ")]:
+            with self.subTest(row=row):
+                self.assertEqual(self.validator.validate([row]), [None])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from src.clients import GoogleClients
+from src.clients import AsyncGoogleClients, GoogleClients
 
 class TestGoogleClients(unittest.TestCase):
 
@@ -11,7 +11,8 @@ class TestGoogleClients(unittest.TestCase):
     @patch('src.clients.secretmanager.SecretManagerServiceClient')
     @patch('src.clients.cloudbuild.CloudBuildClient')
     @patch('src.clients.monitoring_v3.MetricServiceClient')
-    def test_client_initialization(self, mock_monitoring, mock_cloudbuild, mock_secretmanager, mock_hw_mgmt, mock_gkehub, mock_edgenetwork, mock_edgecontainer):
+    @patch('src.clients.storage.Client')
+    def test_client_initialization(self, mock_storage, mock_monitoring, mock_cloudbuild, mock_secretmanager, mock_hw_mgmt, mock_gkehub, mock_edgenetwork, mock_edgecontainer):
         clients = GoogleClients()
         self.assertIsNotNone(clients.get_edgecontainer_client())
         self.assertIsNotNone(clients.get_edgenetwork_client())
@@ -19,4 +20,25 @@ class TestGoogleClients(unittest.TestCase):
         self.assertIsNotNone(clients.get_hardware_management_client())
         self.assertIsNotNone(clients.get_secret_manager_client())
         self.assertIsNotNone(clients.get_cloudbuild_client())
-        self.assertIsNotNone(clients.get_monitoring_client())
\ No newline at end of file
+        self.assertIsNotNone(clients.get_monitoring_client())
+        self.assertIsNotNone(clients.get_storage_client())
+
+
+class TestAsyncGoogleClients(unittest.TestCase):
+
+    @patch.dict('os.environ', {"EDGE_CONTAINER_API_ENDPOINT_OVERRIDE": "https://edgecontainer.example.com/"})
+    @patch('src.clients.edgecontainer.EdgeContainerAsyncClient')
+    @patch('src.clients.edgenetwork.EdgeNetworkAsyncClient')
+    @patch('src.clients.gkehub_v1.GkeHubAsyncClient')
+    @patch('src.clients.gdchardwaremanagement_v1alpha.GDCHardwareManagementAsyncClient')
+    @patch('src.clients.cloudbuild.CloudBuildAsyncClient')
+    @patch('src.clients.monitoring_v3.MetricServiceAsyncClient')
+    def test_client_initialization(self, mock_monitoring, mock_cloudbuild, mock_hw_mgmt, mock_gkehub, mock_edgenetwork, mock_edgecontainer):
+        clients = AsyncGoogleClients()
+
+        self.assertIs(clients.get_edgecontainer_client(), mock_edgecontainer.return_value)
+        self.assertEqual(mock_edgecontainer.call_args.kwargs["client_options"].api_endpoint, "edgecontainer.example.com")
+        self.assertIsNone(mock_edgenetwork.call_args.kwargs["client_options"])
+        self.assertIs(clients.get_hardware_management_client(), mock_hw_mgmt.return_value)
+        self.assertIs(clients.get_cloudbuild_client(), mock_cloudbuild.return_value)
+        self.assertIs(clients.get_monitoring_client(), mock_monitoring.return_value)
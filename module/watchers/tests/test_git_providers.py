@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from pydantic import ValidationError
+from src.git_providers import (
+    GitHubProvider,
+    GitLabProvider,
+    HttpProvider,
+    LocalFileProvider,
+    create_session,
+    get_git_provider,
+    set_session_retries,
+)
+from .test_watcher_settings import create_settings
+
+class TestGitProviders(unittest.TestCase):
+
+    def test_github(self):
+        provider = get_git_provider("github.com/org/repo.git", "main", "token")
+
+        self.assertIsInstance(provider, GitHubProvider)
+        self.assertEqual(provider.get_url("intent.csv"), "https://raw.githubusercontent.com/org/repo/main/intent.csv")
+        self.assertEqual(provider.get_headers()["Authorization"], "token token")
+
+    def test_gitlab(self):
+        provider = get_git_provider("gitlab.com/org/project/repo.git", "main", "token")
+
+        self.assertIsInstance(provider, GitLabProvider)
+        self.assertEqual(
+            provider.get_url("intent.csv"),
+            "https://gitlab.com/api/v4/projects/org%2Fproject%2Frepo/repository/files/intent.csv/raw?ref=main&private_token=token",
+        )
+        self.assertNotIn("Authorization", provider.get_headers())
+
+    def test_http(self):
+        provider = get_git_provider("http://localhost:8000/repo/", "main", None)
+
+        self.assertIsInstance(provider, HttpProvider)
+        self.assertEqual(provider.get_url("intent.csv"), "http://localhost:8000/repo/main/intent.csv")
+        self.assertNotIn("Authorization", provider.get_headers())
+
+    def test_http_never_sends_the_token_in_cleartext(self):
+        provider = get_git_provider("http://mirror.example.com/repo", "main", "token")
+
+        self.assertIsInstance(provider, HttpProvider)
+        self.assertNotIn("Authorization", provider.get_headers())
+
+    def test_http_from_settings(self):
+        params = create_settings(SOURCE_OF_TRUTH_REPO="https://mirror.example.com/repo", SOURCE_OF_TRUTH_BRANCH="main")
+        provider = get_git_provider(params.source_of_truth_repo, params.source_of_truth_branch, "token")
+
+        self.assertIsInstance(provider, HttpProvider)
+        self.assertEqual(provider.get_url("intent.csv"), "https://mirror.example.com/repo/main/intent.csv")
+        self.assertEqual(provider.get_headers()["Authorization"], "token token")
+
+    def test_github_and_gitlab_settings_reject_protocol(self):
+        for repo in ("https://github.com/org/repo.git", "http://gitlab.com/org/project/repo.git"):
+            with self.subTest(repo=repo), self.assertRaises(ValidationError):
+                create_settings(SOURCE_OF_TRUTH_REPO=repo)
+
+    def test_unsupported(self):
+        with self.assertRaisesRegex(Exception, "Unsupported git provider"):
+            get_git_provider("bitbucket.org/org/repo.git", "main", "token")
+
+    def test_local_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "intent.csv"), "w") as f:
+                f.write("store_id\nstore1\n")
+
+            provider = get_git_provider(f"file://{directory}", "main", None)
+            session = create_session()
+
+            self.assertIsInstance(provider, LocalFileProvider)
+            resp = session.get(provider.get_url("intent.csv"))
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.text, "store_id\nstore1\n")
+            self.assertIn("Last-Modified", resp.headers)
+
+            self.assertEqual(session.get(provider.get_url("missing.csv")).status_code, 404)
+
+    def test_session_retries_transient_errors(self):
+        session = create_session(retries=5, backoff_factor=1)
+        retry = session.get_adapter("https://raw.githubusercontent.com").max_retries
+
+        self.assertEqual(retry.total, 5)
+        self.assertEqual(retry.backoff_factor, 1)
+        self.assertIn(503, retry.status_forcelist)
+        self.assertNotIn(401, retry.status_forcelist)
+
+    def test_set_session_retries(self):
+        session = create_session()
+        adapter = session.get_adapter("https://raw.githubusercontent.com")
+
+        set_session_retries(session, retries=0, backoff_factor=2)
+
+        self.assertIs(session.get_adapter("https://raw.githubusercontent.com"), adapter)
+        self.assertEqual(adapter.max_retries.total, 0)
+        self.assertEqual(adapter.max_retries.backoff_factor, 2)
+        self.assertEqual(session.get_adapter("http://localhost").max_retries.total, 0)
+
+if __name__ == '__main__':
+    unittest.main()
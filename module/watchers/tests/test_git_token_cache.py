@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch
+from src.git_token_cache import GitTokenCache
+
+class TestGitTokenCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        cache = GitTokenCache(ttl_seconds=60)
+        self.assertIsNone(cache.get("secret"))
+
+        cache.put("secret", "token")
+        self.assertEqual(cache.get("secret"), "token")
+
+    @patch('src.git_token_cache.time.monotonic')
+    def test_expiry(self, mock_monotonic):
+        cache = GitTokenCache(ttl_seconds=60)
+        mock_monotonic.return_value = 100
+        cache.put("secret", "token")
+
+        mock_monotonic.return_value = 159
+        self.assertEqual(cache.get("secret"), "token")
+
+        mock_monotonic.return_value = 160
+        self.assertIsNone(cache.get("secret"))
+
+    def test_invalidate(self):
+        cache = GitTokenCache(ttl_seconds=60)
+        cache.put("secret1", "token1")
+        cache.put("secret2", "token2")
+
+        cache.invalidate("secret1")
+        self.assertIsNone(cache.get("secret1"))
+        self.assertEqual(cache.get("secret2"), "token2")
+
+        cache.invalidate()
+        self.assertIsNone(cache.get("secret2"))
+
+    def test_disabled(self):
+        cache = GitTokenCache(ttl_seconds=0)
+        cache.put("secret", "token")
+        self.assertIsNone(cache.get("secret"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock
+from src.intent_memo import IntentRowMemo
+
+class TestIntentRowMemo(unittest.TestCase):
+
+    def test_key_includes_fleet_version(self):
+        row = {"store_id": "store1", "cluster_version": ""}
+
+        self.assertEqual(IntentRowMemo.get_key(row, "1.12.0"), IntentRowMemo.get_key(dict(row), "1.12.0"))
+        self.assertNotEqual(IntentRowMemo.get_key(row, "1.12.0"), IntentRowMemo.get_key(row, "1.13.0"))
+
+    def test_key_with_surplus_values(self):
+        row = {"store_id": "store1", None: ["extra1", "extra2"]}
+
+        self.assertEqual(hash(IntentRowMemo.get_key(row, None)), hash(IntentRowMemo.get_key(row, None)))
+
+    def test_get_and_put(self):
+        memo = IntentRowMemo()
+        edge_zone = MagicMock()
+        key = IntentRowMemo.get_key({"store_id": "store1"}, None)
+
+        self.assertIsNone(memo.get(key))
+        memo.put(key, edge_zone)
+        self.assertIs(memo.get(key), edge_zone)
+        self.assertEqual(memo.get_stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    def test_eviction(self):
+        memo = IntentRowMemo(max_entries=2)
+        key1 = IntentRowMemo.get_key({"store_id": "store1"}, None)
+        key2 = IntentRowMemo.get_key({"store_id": "store2"}, None)
+        key3 = IntentRowMemo.get_key({"store_id": "store3"}, None)
+
+        memo.put(key1, MagicMock())
+        memo.put(key2, MagicMock())
+        memo.get(key1)  # key2 is now the least recently used
+        memo.put(key3, MagicMock())
+
+        self.assertIsNotNone(memo.get(key1))
+        self.assertIsNone(memo.get(key2))
+        self.assertIsNotNone(memo.get(key3))
+
+if __name__ == '__main__':
+    unittest.main()
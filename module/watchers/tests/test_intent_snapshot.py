@@ -0,0 +1,92 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.intent_snapshot import IntentChangeset, IntentSnapshot
+from src.state_store import LocalFileStateStore
+
+def create_store(intent_hash):
+    store = MagicMock()
+    store.intent_hash = intent_hash
+    return store
+
+class TestIntentSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.state_store = LocalFileStateStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_first_run_is_full_sweep(self):
+        snapshot = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=5)
+        config_zone_info = {("proj", "loc"): {"store1": create_store("hash1")}}
+
+        changeset = snapshot.diff(config_zone_info)
+
+        self.assertTrue(changeset.full_sweep)
+        self.assertEqual(changeset.added, {"store1"})
+
+    def test_diff(self):
+        snapshot = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=5)
+        previous = {("proj", "loc"): {"store1": create_store("hash1"), "store2": create_store("hash2"), "store3": create_store("hash3")}}
+        snapshot.save(previous, snapshot.diff(previous))
+
+        current = {("proj", "loc"): {"store1": create_store("hash1"), "store2": create_store("hash2-new"), "store4": create_store("hash4")}}
+        changeset = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=5).diff(current)
+
+        self.assertFalse(changeset.full_sweep)
+        self.assertEqual(changeset.added, {"store4"})
+        self.assertEqual(changeset.changed, {"store2"})
+        self.assertEqual(changeset.removed, {"store3"})
+        self.assertEqual(changeset.select(current), {("proj", "loc"): {"store2": current[("proj", "loc")]["store2"], "store4": current[("proj", "loc")]["store4"]}})
+
+    def test_full_sweep_interval(self):
+        config_zone_info = {("proj", "loc"): {"store1": create_store("hash1")}}
+        full_sweeps = []
+
+        for _ in range(6):
+            snapshot = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=3)
+            changeset = snapshot.diff(config_zone_info)
+            full_sweeps.append(changeset.full_sweep)
+            snapshot.save(config_zone_info, changeset)
+
+        self.assertEqual(full_sweeps, [True, False, False, True, False, False])
+
+    def test_unprocessed_stores_stay_changed(self):
+        snapshot = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=3)
+        snapshot.save({("proj", "loc"): {"store1": create_store("hash1")}}, snapshot.diff({}))
+
+        config_zone_info = {("proj", "loc"): {"store1": create_store("hash2"), "store2": create_store("hash3")}}
+        snapshot = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=3)
+        changeset = snapshot.diff(config_zone_info)
+        snapshot.save(config_zone_info, changeset, unprocessed={"store1", "store2"})
+
+        changeset = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=3).diff(config_zone_info)
+        self.assertEqual(changeset.changed, {"store1"})
+        self.assertEqual(changeset.added, {"store2"})
+
+    def test_unfinished_full_sweep_carries_on(self):
+        config_zone_info = {("proj", "loc"): {"store1": create_store("hash1")}}
+        snapshot = IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=3)
+        snapshot.save(config_zone_info, snapshot.diff(config_zone_info), unprocessed={"store1"})
+
+        self.assertTrue(IntentSnapshot(self.state_store, "zone_watcher", full_sweep_interval=3).diff(config_zone_info).full_sweep)
+
+    def test_without_state_store(self):
+        snapshot = IntentSnapshot(None, "zone_watcher", full_sweep_interval=3)
+        config_zone_info = {("proj", "loc"): {"store1": create_store("hash1")}}
+        snapshot.save(config_zone_info, snapshot.diff(config_zone_info))
+
+        self.assertTrue(snapshot.diff(config_zone_info).full_sweep)
+
+    def test_full_sweep_prioritises_changed_stores(self):
+        changeset = IntentChangeset(changed={"store3"}, full_sweep=True)
+        stores = {"store1": create_store("hash1"), "store2": create_store("hash2"), "store3": create_store("hash3")}
+
+        selected = changeset.select({("proj", "loc"): stores})
+
+        self.assertEqual(list(selected[("proj", "loc")]), ["store3", "store1", "store2"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,11 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import tempfile
+import threading
 import unittest
 from unittest import mock
 from google.auth import credentials as google_credentials
+from google.cloud import gkehub_v1
 from google.cloud.gdchardwaremanagement_v1alpha import Zone
 from src.acp_zone import ACPZone
+from src.zone_inventory import ZoneInventory
+from src.build_dispatcher import BuildDispatcher
+from src.intent_snapshot import IntentSnapshot
+from src.state_store import LocalFileStateStore
+from src.sweep_cursor import RunDeadline, SweepCursor
 
 auth_patch = mock.patch('google.auth.default')
 mock_auth = auth_patch.start()
@@ -32,8 +41,23 @@ from src import main
 auth_patch.stop()
 clients_patch.stop()
 
+def create_sweep(budget_seconds=None):
+    return SweepCursor(None, "test_watcher", RunDeadline(budget_seconds))
+
+def mock_intent_readers(mock_reader_cls, files):
+    """Serves file content by path from the mocked ClusterIntentReader, since files are fetched concurrently."""
+    def create_reader(repo, branch, path, token, cache=None, timeout=None):
+        reader = mock.MagicMock()
+        reader.retrieve_source_of_truth.side_effect = lambda: files[path].pop(0)
+        return reader
+    mock_reader_cls.side_effect = create_reader
+
 class TestMain(unittest.TestCase):
 
+    def setUp(self):
+        main.api_concurrency.configure(enabled=False, initial_limit=1, max_limit=100, latency_threshold=2.0)
+        main.verify_operations.clear()
+
     def test_zone_ready_for_provisioning(self):
         result = main.verify_zone_state(Zone.State.READY_FOR_CUSTOMER_FACTORY_TURNUP_CHECKS, "mock_store_id", False)
         self.assertTrue(result)
@@ -56,7 +80,7 @@ class TestMain(unittest.TestCase):
     @mock.patch('src.main.get_zones')
     @mock.patch('src.main.clients.get_edgecontainer_client')
     @mock.patch('src.main.clients.get_cloudbuild_client')
-    def test_cluster_watcher_worker_multi_project(
+    def test_list_cluster_location_multi_project(
         self,
         mock_get_cloudbuild_client,
         mock_get_edgecontainer_client,
@@ -94,7 +118,7 @@ class TestMain(unittest.TestCase):
         }
 
         # Act
-        main._cluster_watcher_worker(project_id, location, stores, params)
+        main._list_cluster_location(project_id, location, stores, params)
 
         # Assert
         mock_get_zones.assert_has_calls(
@@ -111,8 +135,6 @@ class TestMain(unittest.TestCase):
     def test_read_intent_data_fallback(self, mock_reader_cls, mock_get_token):
         """Test that cluster version falls back to fleet config if missing in main CSV."""
         mock_get_token.return_value = "mock-token"
-        mock_reader_instance = mock.MagicMock()
-        mock_reader_cls.return_value = mock_reader_instance
         
         main_csv = """store_id,fleet_project_id,machine_project_id,location,cluster_name,node_count,cluster_ipv4_cidr,services_ipv4_cidr,external_load_balancer_ipv4_address_pools,sync_repo,sync_branch,sync_dir,secrets_project_id,git_token_secrets_manager_name,cluster_version
 store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,""
@@ -120,13 +142,15 @@ store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-
         fleet_csv = """fleet_project_id,cluster_version
 project1,1.12.0
 """
-        mock_reader_instance.retrieve_source_of_truth.side_effect = [main_csv, fleet_csv]
+        mock_intent_readers(mock_reader_cls, {"intent.csv": [main_csv], "fleet.csv": [fleet_csv]})
         
         params = mock.MagicMock()
         params.source_of_truth_repo = "repo"
         params.source_of_truth_branch = "main"
         params.source_of_truth_path = "intent.csv"
+        params.source_of_truth_paths = ["intent.csv"]
         params.fleet_config_path = "fleet.csv"
+        params.source_of_truth_streaming = False
         params.secrets_project_id = "sec-proj"
         params.git_secret_id = "git-sec"
         
@@ -142,8 +166,6 @@ project1,1.12.0
     def test_read_intent_data_robin_cns_invalid_version(self, mock_reader_cls, mock_get_token):
         """Test that Robin CNS validation fails if version is below 1.12.0."""
         mock_get_token.return_value = "mock-token"
-        mock_reader_instance = mock.MagicMock()
-        mock_reader_cls.return_value = mock_reader_instance
         
         main_csv = """store_id,fleet_project_id,machine_project_id,location,cluster_name,node_count,cluster_ipv4_cidr,services_ipv4_cidr,external_load_balancer_ipv4_address_pools,sync_repo,sync_branch,sync_dir,secrets_project_id,git_token_secrets_manager_name,cluster_version,enable_robin_cns
 store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,"",true
@@ -151,13 +173,15 @@ store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-
         fleet_csv = """fleet_project_id,cluster_version
 project1,1.11.0
 """
-        mock_reader_instance.retrieve_source_of_truth.side_effect = [main_csv, fleet_csv]
+        mock_intent_readers(mock_reader_cls, {"intent.csv": [main_csv], "fleet.csv": [fleet_csv]})
         
         params = mock.MagicMock()
         params.source_of_truth_repo = "repo"
         params.source_of_truth_branch = "main"
         params.source_of_truth_path = "intent.csv"
+        params.source_of_truth_paths = ["intent.csv"]
         params.fleet_config_path = "fleet.csv"
+        params.source_of_truth_streaming = False
         params.secrets_project_id = "sec-proj"
         params.git_secret_id = "git-sec"
         
@@ -173,6 +197,39 @@ project1,1.11.0
         self.assertEqual(main._get_failure_reason(main.exceptions.ResourceExhausted("error")), "quota_exceeded")
         self.assertEqual(main._get_failure_reason(Exception("generic")), "unreachable")
 
+    @mock.patch('src.main.clients.get_monitoring_client')
+    def test_report_concurrency_limit_metrics(self, mock_get_monitoring_client):
+        params = mock.MagicMock()
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.adaptive_concurrency = True
+        params.max_workers = 4
+        params.adaptive_max_workers = 10
+        params.adaptive_latency_threshold = 2.0
+        main._configure_api_concurrency(params)
+        with main.api_concurrency.slot("hwm"):
+            pass
+
+        main.report_concurrency_limit_metrics(params, "zone_watcher")
+
+        request = mock_get_monitoring_client.return_value.create_time_series.call_args.args[0]
+        self.assertEqual(request.name, "projects/test-host-project")
+        self.assertEqual(len(request.time_series), 1)
+        ts = request.time_series[0]
+        self.assertEqual(ts.metric.type, "custom.googleapis.com/gdc_watcher_concurrency_limit")
+        self.assertEqual(ts.metric.labels["api"], "hwm")
+        self.assertEqual(ts.metric.labels["watcher"], "zone_watcher")
+        self.assertEqual(ts.points[0].value.int64_value, 4)
+
+    @mock.patch('src.main.clients.get_monitoring_client')
+    def test_report_concurrency_limit_metrics_disabled(self, mock_get_monitoring_client):
+        params = mock.MagicMock()
+        params.adaptive_concurrency = False
+
+        main.report_concurrency_limit_metrics(params, "zone_watcher")
+
+        mock_get_monitoring_client.assert_not_called()
+
     @mock.patch('src.main.clients.get_monitoring_client')
     def test_report_api_connectivity_metric_success(self, mock_get_monitoring_client):
         mock_m_client = mock.MagicMock()
@@ -210,71 +267,728 @@ project1,1.11.0
 
     @mock.patch('src.main.report_api_connectivity_metric')
     @mock.patch('src.main.get_zones')
-    @mock.patch('src.main.clients.get_cloudbuild_client')
-    def test_zone_watcher_worker_reports_hwm_connectivity_success(
-        self, mock_get_cb, mock_get_zones, mock_report
-    ):
+    def test_list_location_zones_reports_hwm_connectivity_success(self, mock_get_zones, mock_report):
         mock_get_zones.return_value = {}
         params = mock.MagicMock()
         params.project_id = "test-host-project"
+
+        self.assertEqual(main._list_location_zones("mach-proj", "us-central1", params), {})
+
+        mock_report.assert_called_once_with(
+            host_project_id="test-host-project",
+            api="hwm",
+            project_type="machine_project",
+            project_id="mach-proj",
+            location="us-central1",
+            status=1,
+            failure_reason=""
+        )
+
+    @mock.patch('src.main.clients.get_cloudbuild_client')
+    def test_zone_watcher_worker_uses_zone_inventory(self, mock_get_cb):
+        zone_store_id = "projects/mach-proj/locations/us-central1/zones/{}"
+        zones = {
+            zone_store_id.format(store_id): ACPZone(zone_store_id.format(store_id), Zone.State.READY_FOR_CUSTOMER_FACTORY_TURNUP_CHECKS, f"zone-{store_id}", True)
+            for store_id in ("store1", "store2")
+        }
+        params = mock.MagicMock()
+        params.max_retries = 0
+        params.cloud_build_trigger = "projects/p/locations/l/triggers/t"
         builds = mock.MagicMock()
+        builds.should_retry_zone_build.return_value = False
 
         class MockStore:
-            fleet_project_id = "fleet-proj-1"
+            zone_name = None
+            node_count = 2
             intent_hash = "hash-1"
+            sync_branch = "main"
+            recreate_on_delete = False
 
-        stores = {"store1": MockStore()}
+            def __init__(self, cluster_name):
+                self.cluster_name = cluster_name
 
-        main._zone_watcher_worker(
+        inventory = ZoneInventory()
+        inventory.add_machines("mach-proj", "us-central1", [
+            main.edgecontainer.Machine(zone="zone-store1"),
+            main.edgecontainer.Machine(zone="zone-store1"),
+            main.edgecontainer.Machine(zone="zone-store2", hosted_node="projects/p/locations/l/clusters/cluster2/nodePools/np/nodes/n"),
+            main.edgecontainer.Machine(zone="zone-unknown"),
+        ])
+
+        count = main._zone_watcher_worker(
             machine_project="mach-proj",
             location="us-central1",
-            stores=stores,
+            stores={"store1": MockStore("cluster1"), "store2": MockStore("cluster2")},
+            zones=zones,
             params=params,
             builds=builds,
-            machine_lists={},
-            unprocessed_zones={},
-            unprocessed_zones_lock=mock.MagicMock(),
+            inventory=inventory,
+            dispatcher=BuildDispatcher(mock_get_cb.return_value),
+            verifier=mock.MagicMock(),
+            sweep=create_sweep(),
         )
 
-        mock_report.assert_called_once_with(
-            host_project_id="test-host-project",
-            api="hwm",
-            project_type="machine_project",
-            project_id="mach-proj",
-            location="us-central1",
-            status=1,
-            failure_reason=""
-        )
+        # store1 has enough free machines, the cluster of store2 already exists
+        self.assertEqual(count, 1)
+        req = mock_get_cb.return_value.run_build_trigger.call_args.kwargs["request"]
+        self.assertEqual(req.source.substitutions["_ZONE"], "zone-store1")
+        self.assertEqual(inventory.get_unprocessed_zones(), {"zone-unknown": ("mach-proj", "us-central1")})
 
-    @mock.patch('src.main.report_api_connectivity_metric')
-    @mock.patch('src.main.get_zones')
     @mock.patch('src.main.clients.get_cloudbuild_client')
-    def test_zone_watcher_worker_reports_hwm_connectivity_failure(
-        self, mock_get_cb, mock_get_zones, mock_report
-    ):
-        mock_get_zones.side_effect = Exception("HWM API Connection Failed")
+    def test_zone_watcher_worker_skips_zones_with_a_build_in_flight(self, mock_get_cb):
+        zone_store_id = "projects/mach-proj/locations/us-central1/zones/{}"
+        zones = {
+            zone_store_id.format(store_id): ACPZone(zone_store_id.format(store_id), Zone.State.READY_FOR_CUSTOMER_FACTORY_TURNUP_CHECKS, f"zone-{store_id}", True)
+            for store_id in ("store1", "store2")
+        }
         params = mock.MagicMock()
-        params.project_id = "test-host-project"
+        params.max_retries = 0
+        params.cloud_build_trigger = "projects/p/locations/l/triggers/t"
         builds = mock.MagicMock()
+        builds.claim_zone_build.side_effect = lambda zone: zone != "zone-store1"
 
         class MockStore:
-            fleet_project_id = "fleet-proj-1"
+            zone_name = None
+            node_count = 1
             intent_hash = "hash-1"
+            sync_branch = "main"
+            recreate_on_delete = False
+            cluster_name = "cluster"
 
-        stores = {"store1": MockStore()}
+        inventory = ZoneInventory()
+        inventory.add_machines("mach-proj", "us-central1", [
+            main.edgecontainer.Machine(zone="zone-store1"),
+            main.edgecontainer.Machine(zone="zone-store2"),
+        ])
 
-        result = main._zone_watcher_worker(
+        count = main._zone_watcher_worker(
             machine_project="mach-proj",
             location="us-central1",
-            stores=stores,
+            stores={"store1": MockStore(), "store2": MockStore()},
+            zones=zones,
             params=params,
             builds=builds,
-            machine_lists={},
-            unprocessed_zones={},
-            unprocessed_zones_lock=mock.MagicMock(),
+            inventory=inventory,
+            dispatcher=BuildDispatcher(mock_get_cb.return_value),
+            verifier=mock.MagicMock(),
+            sweep=create_sweep(),
         )
 
-        self.assertEqual(result, 0)
+        # The build of store1 is still in flight
+        self.assertEqual(count, 1)
+        mock_get_cb.return_value.run_build_trigger.assert_called_once()
+        req = mock_get_cb.return_value.run_build_trigger.call_args.kwargs["request"]
+        self.assertEqual(req.source.substitutions["_ZONE"], "zone-store2")
+
+    def test_count_triggered_builds_hands_back_builds_not_sent(self):
+        sweep = create_sweep()
+        build_futures = []
+        for store_id, triggered in (("store1", True), ("store2", False), ("store3", None)):
+            future = main.concurrent.futures.Future()
+            future.set_result(triggered)
+            build_futures.append((store_id, f"zone-{store_id}", future))
+
+        self.assertEqual(main._count_triggered_builds(build_futures, sweep, ("proj", "loc")), 1)
+        # The build of store3 was not sent before the deadline
+        self.assertEqual(sweep.get_unprocessed(), {"store3"})
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main._plan_zone_build')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_stops_at_deadline_and_resumes(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_get_zones, mock_plan, mock_report
+    ):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        mock_build_history.return_value.get_suppressed_build_count.return_value = 0
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 1
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.state_store_uri = state_dir.name
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        params.run_deadline_seconds = 1e-9
+        mock_read_intent_data.return_value = {
+            ("proj", "loc"): {"store1": mock.MagicMock(intent_hash="hash1")},
+        }
+        mock_build_history.return_value.get_retriable_intent_hashes.return_value = set()
+        mock_get_ec.return_value.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        mock_get_ec.return_value.list_machines.return_value = []
+        mock_get_zones.return_value = {}
+        mock_plan.return_value = None
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = False")
+        mock_plan.assert_not_called()
+
+        params.run_deadline_seconds = 60
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = True")
+        self.assertEqual(mock_plan.call_args.args[0], "store1")
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main._plan_zone_build')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_resumes_locations_whose_zones_could_not_be_listed(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_get_zones, mock_plan, mock_report
+    ):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        mock_build_history.return_value.get_suppressed_build_count.return_value = 0
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 1
+        params.store_chunk_size = 100
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.state_store_uri = state_dir.name
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        params.run_deadline_seconds = 60
+        mock_read_intent_data.return_value = {
+            ("proj", "up"): {"store1": mock.MagicMock(intent_hash="hash1")},
+            ("proj", "down"): {"store2": mock.MagicMock(intent_hash="hash2")},
+        }
+        mock_build_history.return_value.get_retriable_intent_hashes.return_value = set()
+        mock_get_ec.return_value.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        mock_get_ec.return_value.list_machines.return_value = []
+        mock_plan.return_value = None
+
+        def get_zones(machine_project, location):
+            if location == "down":
+                raise main.exceptions.ServiceUnavailable("HWM unavailable")
+            return {}
+
+        mock_get_zones.side_effect = get_zones
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = False")
+        self.assertEqual([c.args[0] for c in mock_plan.call_args_list], ["store1"])
+
+        # The next run carries on with the location that could not be listed only
+        mock_plan.reset_mock()
+        mock_get_zones.side_effect = None
+        mock_get_zones.return_value = {}
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = True")
+        self.assertEqual([c.args[0] for c in mock_plan.call_args_list], ["store2"])
+        # Only the build history of the location carried on with is looked for
+        self.assertEqual(mock_build_history.call_args.kwargs["candidate_hashes"], {"hash2"})
+        self.assertEqual(mock_build_history.call_args.kwargs["intent_hashes"], {"hash1", "hash2"})
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main._plan_zone_build')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_resumes_locations_whose_machines_could_not_be_listed(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_get_zones, mock_plan, mock_report
+    ):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        mock_build_history.return_value.get_suppressed_build_count.return_value = 0
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 1
+        params.store_chunk_size = 100
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.state_store_uri = state_dir.name
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        params.run_deadline_seconds = 60
+        mock_read_intent_data.return_value = {
+            ("proj", "up"): {"store1": mock.MagicMock(intent_hash="hash1")},
+            ("proj", "down"): {"store2": mock.MagicMock(intent_hash="hash2")},
+        }
+        mock_build_history.return_value.get_retriable_intent_hashes.return_value = set()
+        mock_get_ec.return_value.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        mock_get_zones.return_value = {}
+        mock_plan.return_value = None
+
+        def list_machines(request):
+            if request.parent.endswith("/down"):
+                raise main.exceptions.ServiceUnavailable("EdgeContainer unavailable")
+            return []
+
+        mock_get_ec.return_value.list_machines.side_effect = list_machines
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = False")
+        self.assertEqual([c.args[0] for c in mock_plan.call_args_list], ["store1"])
+
+        # The next run carries on with the location that could not be listed only
+        mock_plan.reset_mock()
+        mock_get_ec.return_value.list_machines.side_effect = None
+        mock_get_ec.return_value.list_machines.return_value = []
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = True")
+        self.assertEqual([c.args[0] for c in mock_plan.call_args_list], ["store2"])
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main._plan_zone_build')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_lists_machines_while_build_history_loads(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_get_zones, mock_plan, mock_report
+    ):
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 1
+        params.store_chunk_size = 100
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.state_store_uri = None
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        params.run_deadline_seconds = None
+        mock_read_intent_data.return_value = {
+            ("proj", "loc"): {"store1": mock.MagicMock(intent_hash="hash1")},
+        }
+
+        machines_listed = threading.Event()
+        history_waited = []
+
+        def load_build_history(*args, **kwargs):
+            # Only loads once the machines are being listed
+            history_waited.append(machines_listed.wait(timeout=5))
+            history = mock.MagicMock()
+            history.get_retriable_intent_hashes.return_value = set()
+            history.get_suppressed_build_count.return_value = 0
+            return history
+
+        def list_machines(req):
+            machines_listed.set()
+            return []
+
+        mock_build_history.side_effect = load_build_history
+        mock_get_ec.return_value.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        mock_get_ec.return_value.list_machines.side_effect = list_machines
+        mock_get_zones.return_value = {}
+        mock_plan.return_value = None
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = True")
+        self.assertEqual(history_waited, [True])
+        self.assertEqual(mock_plan.call_args.args[0], "store1")
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main._plan_zone_build')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_lists_swept_locations_with_builds_to_retry(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_get_zones, mock_plan, mock_report
+    ):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        state_store = LocalFileStateStore(state_dir.name)
+        state_store.save("zone_watcher_sweep_cursor", {"resume_from": {}, "completed": ["proj/loc1", "proj/loc2"]})
+        mock_build_history.return_value.get_suppressed_build_count.return_value = 0
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 2
+        params.store_chunk_size = 100
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.state_store_uri = state_dir.name
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        params.run_deadline_seconds = 60
+        mock_read_intent_data.return_value = {
+            ("proj", "loc1"): {"store1": mock.MagicMock(intent_hash="hash1")},
+            ("proj", "loc2"): {"store2": mock.MagicMock(intent_hash="hash2")},
+        }
+        # Nothing changed since the previous run
+        snapshot = IntentSnapshot(state_store, "zone_watcher")
+        snapshot.save(mock_read_intent_data.return_value, snapshot.diff(mock_read_intent_data.return_value), set())
+        mock_build_history.return_value.get_retriable_intent_hashes.return_value = {"hash2"}
+        ec_client = mock_get_ec.return_value
+        ec_client.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        ec_client.list_machines.return_value = []
+        mock_get_zones.return_value = {}
+        mock_plan.return_value = None
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = True")
+
+        # Both locations were swept, only the one with a build to retry is listed once the build history is loaded
+        self.assertEqual([c.args[0].parent for c in ec_client.list_machines.call_args_list], ["projects/proj/locations/loc2"])
+        self.assertEqual([c.args[0] for c in mock_plan.call_args_list], ["store2"])
+
+    def test_zone_watcher_worker_submits_unverified_zones(self):
+        zone_store_id = "projects/mach-proj/locations/us-central1/zones/{}"
+        zones = {
+            zone_store_id.format(store_id): ACPZone(zone_store_id.format(store_id), Zone.State.ACTIVE, f"zone-{store_id}", verified)
+            for store_id, verified in (("store1", False), ("store2", True))
+        }
+
+        class MockStore:
+            zone_name = None
+
+        verifier = mock.MagicMock()
+
+        main._zone_watcher_worker(
+            machine_project="mach-proj",
+            location="us-central1",
+            stores={"store1": MockStore(), "store2": MockStore()},
+            zones=zones,
+            params=mock.MagicMock(),
+            builds=mock.MagicMock(),
+            inventory=ZoneInventory(),
+            dispatcher=mock.MagicMock(),
+            verifier=verifier,
+            sweep=create_sweep(),
+        )
+
+        verifier.submit.assert_called_once_with(zone_store_id.format("store1"))
+
+    @mock.patch('src.main.clients.get_hardware_management_client')
+    def test_verify_signal_dispatcher_skips_pending_zones_and_refreshes_completed_ones(self, mock_get_hw):
+        zone = "projects/mach-proj/locations/us-central1/zones/store1"
+        hw_client = mock_get_hw.return_value
+        hw_client.signal_zone_state.return_value.operation.name = "operations/op1"
+        params = mock.MagicMock()
+        params.max_verify_signals_in_flight = 2
+
+        with main._create_verify_signal_dispatcher(params) as verifier:
+            self.assertTrue(verifier.submit(zone).result())
+            self.assertIsNone(verifier.submit(zone))
+
+        hw_client.signal_zone_state.assert_called_once()
+        self.assertEqual(main.verify_operations.get_pending(), {zone: "operations/op1"})
+
+        hw_client.get_operation.return_value.done = True
+        main.zone_cache.get(("mach-proj", "us-central1"), lambda: {})
+        with main._create_verify_signal_dispatcher(params) as verifier:
+            self.assertEqual(verifier.refresh(), [zone])
+
+        self.assertEqual(hw_client.get_operation.call_args.args[0].name, "operations/op1")
+        self.assertEqual(main.verify_operations.get_pending(), {})
+        self.assertNotIn(("mach-proj", "us-central1"), main.zone_cache._entries)
+
+    @mock.patch('src.main.clients.get_hardware_management_client')
+    def test_set_zone_state_verify_cluster_intent_invalidates_zone_cache(self, mock_get_hw):
+        with mock.patch.object(main.zone_cache, 'invalidate') as mock_invalidate:
+            main.set_zone_state_verify_cluster_intent("projects/mach-proj/locations/us-central1/zones/store1")
+
+        mock_get_hw.return_value.signal_zone_state.assert_called_once()
+        mock_invalidate.assert_called_once_with("mach-proj", "us-central1")
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main._zone_watcher_worker')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_starts_workers_as_machines_are_listed(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_worker, mock_get_zones, mock_report
+    ):
+        mock_build_history.return_value.get_suppressed_build_count.return_value = 0
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 4
+        params.store_chunk_size = 100
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.run_deadline_seconds = None
+        params.state_store_uri = None
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        mock_read_intent_data.return_value = {
+            ("proj", "fast"): {"store1": mock.MagicMock(intent_hash="hash1")},
+            ("proj", "slow"): {"store2": mock.MagicMock(intent_hash="hash2")},
+        }
+
+        fast_worker_started = threading.Event()
+        slow_listing_waited = []
+
+        def list_machines(req):
+            if req.parent.endswith("/slow"):
+                # Only returns once the worker of the fast location has started
+                slow_listing_waited.append(fast_worker_started.wait(timeout=5))
+            return []
+
+        ec_client = mock_get_ec.return_value
+        ec_client.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        ec_client.list_machines.side_effect = list_machines
+
+        mock_get_zones.return_value = {}
+
+        def worker(machine_project, location, stores, zones, params, builds, inventory, dispatcher, verifier, sweep):
+            if location == "fast":
+                fast_worker_started.set()
+            return 1
+
+        mock_worker.side_effect = worker
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 2, sweep complete = True")
+        self.assertEqual(slow_listing_waited, [True])
+        # EdgeContainer and HWM connectivity of both locations
+        self.assertEqual(mock_report.call_count, 4)
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main._zone_watcher_worker')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_lists_zones_while_machines_are_listed(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_worker, mock_get_zones, mock_report
+    ):
+        mock_build_history.return_value.get_suppressed_build_count.return_value = 0
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 2
+        params.store_chunk_size = 100
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.run_deadline_seconds = None
+        params.state_store_uri = None
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        mock_read_intent_data.return_value = {
+            ("proj", "loc"): {"store1": mock.MagicMock(intent_hash="hash1")},
+        }
+
+        zones_listed = threading.Event()
+        machines_waited = []
+
+        def list_machines(req):
+            # Only returns once the zones of the location are being listed
+            machines_waited.append(zones_listed.wait(timeout=5))
+            return []
+
+        def get_zones(machine_project, location):
+            zones_listed.set()
+            return {}
+
+        ec_client = mock_get_ec.return_value
+        ec_client.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        ec_client.list_machines.side_effect = list_machines
+        mock_get_zones.side_effect = get_zones
+        mock_worker.return_value = 1
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 1, sweep complete = True")
+        self.assertEqual(machines_waited, [True])
+        self.assertEqual(sorted(c.kwargs["api"] for c in mock_report.call_args_list), ["edgecontainer", "hwm"])
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main.get_zones')
+    @mock.patch('src.main._zone_watcher_worker')
+    @mock.patch('src.main.clients.get_edgecontainer_client')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_splits_large_locations_in_chunks(
+        self, mock_settings, mock_read_intent_data, mock_build_history, mock_get_ec, mock_worker, mock_get_zones, mock_report
+    ):
+        mock_build_history.return_value.get_suppressed_build_count.return_value = 0
+        params = mock_settings.return_value
+        params.project_id = "test-host-project"
+        params.execution_mode = "threads"
+        params.max_workers = 4
+        params.store_chunk_size = 2
+        params.max_builds_in_flight = 1
+        params.max_verify_signals_in_flight = 1
+        params.adaptive_concurrency = False
+        params.run_deadline_seconds = None
+        params.state_store_uri = None
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        mock_read_intent_data.return_value = {
+            ("proj", "loc"): {f"store{i}": mock.MagicMock(intent_hash=f"hash{i}") for i in range(5)},
+        }
+        mock_get_ec.return_value.common_location_path.side_effect = lambda project, location: f"projects/{project}/locations/{location}"
+        mock_get_ec.return_value.list_machines.return_value = []
+        zones = {}
+        mock_get_zones.return_value = zones
+        chunks = []
+
+        def worker(machine_project, location, stores, zones, params, builds, inventory, dispatcher, verifier, sweep):
+            chunks.append((list(stores), zones))
+            return len(stores)
+
+        mock_worker.side_effect = worker
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 5, sweep complete = True")
+        mock_get_zones.assert_called_once_with("proj", "loc")
+        self.assertCountEqual([stores for stores, _ in chunks], [["store0", "store1"], ["store2", "store3"], ["store4"]])
+        self.assertTrue(all(chunk_zones is zones for _, chunk_zones in chunks))
+
+    @mock.patch('src.main._cluster_watcher_worker')
+    @mock.patch('src.main._list_cluster_location')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_cluster_watcher_keeps_failed_stores_changed(self, mock_settings, mock_read_intent_data, mock_list_location, mock_worker):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        params = mock_settings.return_value
+        params.execution_mode = "threads"
+        params.max_workers = 4
+        params.store_chunk_size = 100
+        params.max_builds_in_flight = 1
+        params.adaptive_concurrency = False
+        params.run_deadline_seconds = None
+        params.state_store_uri = state_dir.name
+        params.full_sweep_interval = 10
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        mock_read_intent_data.return_value = {
+            ("fleet-proj", "ok"): {"store1": mock.MagicMock(intent_hash="hash1")},
+            ("fleet-proj", "raises"): {"store2": mock.MagicMock(intent_hash="hash2")},
+            ("fleet-proj", "down"): {"store3": mock.MagicMock(intent_hash="hash3")},
+        }
+
+        def list_location(project_id, location, stores, params):
+            if location == "down":
+                raise main.exceptions.ServiceUnavailable("HWM unavailable")
+            return main.ClusterLocation({}, {}, {})
+
+        def worker(project_id, location, stores, cluster_location, params, dispatcher, sweep):
+            if location == "raises":
+                raise RuntimeError("worker failed")
+            return 0
+
+        mock_list_location.side_effect = list_location
+        mock_worker.side_effect = worker
+
+        self.assertEqual(main.cluster_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = False")
+
+        # Only the store that was processed is recorded in the snapshot, the others still show up as added
+        snapshot = IntentSnapshot(LocalFileStateStore(state_dir.name), "cluster_watcher", 10)
+        changeset = snapshot.diff(mock_read_intent_data.return_value)
+        self.assertEqual(changeset.added, {"store2", "store3"})
+
+    @mock.patch('src.main._cluster_watcher_worker')
+    @mock.patch('src.main._list_cluster_location')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_cluster_watcher_splits_large_locations_in_chunks(self, mock_settings, mock_read_intent_data, mock_list_location, mock_worker):
+        params = mock_settings.return_value
+        params.execution_mode = "threads"
+        params.max_workers = 4
+        params.store_chunk_size = 2
+        params.max_builds_in_flight = 1
+        params.adaptive_concurrency = False
+        params.run_deadline_seconds = None
+        params.state_store_uri = None
+        params.full_sweep_interval = 1
+        params.verify_operation_max_age_seconds = 3600
+        params.source_of_truth_retry_backoff = 0.5
+        params.source_of_truth_retries = 3
+        params.git_token_cache_ttl_seconds = 300
+        params.intent_memo_max_entries = 100000
+        params.source_of_truth_cache_dir = None
+        params.zone_cache_ttl_seconds = 60
+        params.trigger_id_cache_ttl_seconds = 600
+        mock_read_intent_data.return_value = {
+            ("fleet-proj", "loc"): {f"store{i}": mock.MagicMock(intent_hash=f"hash{i}") for i in range(3)},
+            ("fleet-proj", "down"): {"store3": mock.MagicMock(intent_hash="hash3")},
+        }
+        cluster_location = main.ClusterLocation({}, {}, {})
+        mock_list_location.side_effect = lambda project_id, location, stores, params: cluster_location if location == "loc" else None
+        mock_worker.side_effect = lambda project_id, location, stores, cluster_location, params, dispatcher, sweep: len(stores)
+
+        # The clusters of fleet-proj/down could not be listed, its store is left for the next run
+        self.assertEqual(main.cluster_watcher(mock.MagicMock()), "total zones triggered = 3, sweep complete = False")
+        self.assertEqual(mock_list_location.call_count, 2)
+        self.assertCountEqual([list(c.args[2]) for c in mock_worker.call_args_list], [["store0", "store1"], ["store2"]])
+        self.assertTrue(all(c.args[3] is cluster_location for c in mock_worker.call_args_list))
+
+    @mock.patch('src.main.report_api_connectivity_metric')
+    @mock.patch('src.main.get_zones')
+    def test_list_location_zones_reports_hwm_connectivity_failure(self, mock_get_zones, mock_report):
+        mock_get_zones.side_effect = Exception("HWM API Connection Failed")
+        params = mock.MagicMock()
+        params.project_id = "test-host-project"
+
+        self.assertIsNone(main._list_location_zones("mach-proj", "us-central1", params))
         mock_report.assert_called_once_with(
             host_project_id="test-host-project",
             api="hwm",
@@ -290,7 +1004,7 @@ project1,1.11.0
     @mock.patch('src.main.get_zones')
     @mock.patch('src.main.clients.get_edgecontainer_client')
     @mock.patch('src.main.clients.get_cloudbuild_client')
-    def test_cluster_watcher_worker_reports_metrics_success(
+    def test_list_cluster_location_reports_metrics_success(
         self, mock_get_cb, mock_get_ec, mock_get_zones, mock_get_memberships, mock_report
     ):
         mock_get_memberships.return_value = {}
@@ -310,7 +1024,7 @@ project1,1.11.0
         params = mock.MagicMock()
         params.project_id = "test-host-project"
 
-        main._cluster_watcher_worker("fleet-proj-1", "us-central1", stores, params)
+        self.assertIsNotNone(main._list_cluster_location("fleet-proj-1", "us-central1", stores, params))
 
         # Assert report call for edgecontainer connectivity status=1 (HWM is not reported by cluster_watcher)
         mock_report.assert_called_once_with(
@@ -328,7 +1042,7 @@ project1,1.11.0
     @mock.patch('src.main.get_zones')
     @mock.patch('src.main.clients.get_edgecontainer_client')
     @mock.patch('src.main.clients.get_cloudbuild_client')
-    def test_cluster_watcher_worker_reports_metrics_failure(
+    def test_list_cluster_location_reports_metrics_failure(
         self, mock_get_cb, mock_get_ec, mock_get_zones, mock_get_memberships, mock_report
     ):
         mock_get_memberships.return_value = {}
@@ -349,7 +1063,7 @@ project1,1.11.0
         params = mock.MagicMock()
         params.project_id = "test-host-project"
 
-        main._cluster_watcher_worker("fleet-proj-1", "us-central1", stores, params)
+        self.assertIsNone(main._list_cluster_location("fleet-proj-1", "us-central1", stores, params))
 
         # Assert report call for edgecontainer status=0
         mock_report.assert_called_once_with(
@@ -360,4 +1074,471 @@ project1,1.11.0
             location="us-central1",
             status=0,
             failure_reason="unreachable"
-        )
\ No newline at end of file
+        )
+    @mock.patch('src.main.http_session.get')
+    def test_cluster_intent_reader_uses_cache_on_not_modified(self, mock_get):
+        cache = main.SourceOfTruthCache()
+        reader = main.ClusterIntentReader("github.com/org/repo.git", "main", "intent.csv", "token", cache)
+
+        first = mock.MagicMock(status_code=200, text="a,b\n1,2\n", headers={"ETag": '"v1"'})
+        second = mock.MagicMock(status_code=304, text="", headers={})
+        mock_get.side_effect = [first, second]
+
+        self.assertEqual(reader.retrieve_source_of_truth(), "a,b\n1,2\n")
+        self.assertEqual(reader.retrieve_source_of_truth(), "a,b\n1,2\n")
+
+        _, kwargs = mock_get.call_args
+        self.assertEqual(kwargs["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(cache.get_stats(), {"hits": 1, "misses": 1, "bytes_saved": 8})
+
+    @mock.patch('src.main._resolve_intent_row', wraps=main._resolve_intent_row)
+    @mock.patch('src.main.get_git_token_from_secrets_manager')
+    @mock.patch('src.main.ClusterIntentReader')
+    def test_read_intent_data_memoizes_rows(self, mock_reader_cls, mock_get_token, mock_validate):
+        main.intent_memo.clear()
+        mock_get_token.return_value = "mock-token"
+
+        main_csv = """store_id,fleet_project_id,machine_project_id,location,cluster_name,node_count,cluster_ipv4_cidr,services_ipv4_cidr,external_load_balancer_ipv4_address_pools,sync_repo,sync_branch,sync_dir,secrets_project_id,git_token_secrets_manager_name,cluster_version
+store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,""
+"""
+        fleet_csv = """fleet_project_id,cluster_version
+project1,1.12.0
+"""
+        updated_fleet_csv = """fleet_project_id,cluster_version
+project1,1.13.0
+"""
+        mock_intent_readers(mock_reader_cls, {
+            "intent.csv": [main_csv, main_csv, main_csv],
+            "fleet.csv": [fleet_csv, fleet_csv, updated_fleet_csv],
+        })
+
+        params = mock.MagicMock()
+        params.source_of_truth_path = "intent.csv"
+        params.source_of_truth_paths = ["intent.csv"]
+        params.fleet_config_path = "fleet.csv"
+        params.source_of_truth_streaming = False
+
+        first = main.read_intent_data(params, 'fleet_project_id')[('project1', 'us-central1')]['store1']
+        second = main.read_intent_data(params, 'fleet_project_id')[('project1', 'us-central1')]['store1']
+        self.assertEqual(mock_validate.call_count, 1)
+        self.assertIs(first, second)
+
+        # A change of fleet default version must invalidate the memoized row
+        third = main.read_intent_data(params, 'fleet_project_id')[('project1', 'us-central1')]['store1']
+        self.assertEqual(mock_validate.call_count, 2)
+        self.assertEqual(third.cluster_version, "1.13.0")
+        self.assertNotEqual(first.intent_hash, third.intent_hash)
+
+    @mock.patch('src.main.get_git_token_from_secrets_manager')
+    @mock.patch('src.main.ClusterIntentReader')
+    def test_read_intent_data_fleet_config_failure(self, mock_reader_cls, mock_get_token):
+        """Test that a missing fleet config only disables the fleet version fallback."""
+        mock_get_token.return_value = "mock-token"
+
+        main_csv = """store_id,fleet_project_id,machine_project_id,location,cluster_name,node_count,cluster_ipv4_cidr,services_ipv4_cidr,external_load_balancer_ipv4_address_pools,sync_repo,sync_branch,sync_dir,secrets_project_id,git_token_secrets_manager_name,cluster_version
+store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.11.0
+"""
+        mock_intent_readers(mock_reader_cls, {"intent.csv": [main_csv], "fleet.csv": []})
+
+        params = mock.MagicMock()
+        params.source_of_truth_path = "intent.csv"
+        params.source_of_truth_paths = ["intent.csv"]
+        params.fleet_config_path = "fleet.csv"
+        params.source_of_truth_streaming = False
+
+        result = main.read_intent_data(params, 'fleet_project_id')
+
+        self.assertEqual(result[('project1', 'us-central1')]['store1'].cluster_version, "1.11.0")
+
+    @mock.patch('src.main.clients.get_secret_manager_client')
+    def test_get_git_token_from_secrets_manager_is_cached(self, mock_get_sm_client):
+        main.git_token_cache.invalidate()
+        payload = b"git-token"
+        crc32c = main.google_crc32c.Checksum()
+        crc32c.update(payload)
+        response = mock.MagicMock()
+        response.payload.data = payload
+        response.payload.data_crc32c = int(crc32c.hexdigest(), 16)
+        mock_sm_client = mock.MagicMock()
+        mock_sm_client.access_secret_version.return_value = response
+        mock_get_sm_client.return_value = mock_sm_client
+
+        self.assertEqual(main.get_git_token_from_secrets_manager("sec-proj", "git-sec"), "git-token")
+        self.assertEqual(main.get_git_token_from_secrets_manager("sec-proj", "git-sec"), "git-token")
+
+        mock_sm_client.access_secret_version.assert_called_once_with(
+            request={"name": "projects/sec-proj/secrets/git-sec/versions/latest"})
+        main.git_token_cache.invalidate()
+
+    @mock.patch('src.main.retrieve_intent_files')
+    @mock.patch('src.main.get_git_token_from_secrets_manager')
+    def test_load_intent_files_refreshes_rejected_token(self, mock_get_token, mock_retrieve):
+        mock_get_token.side_effect = ["stale-token", "fresh-token"]
+        mock_retrieve.side_effect = [main.SourceOfTruthAuthError("401"), ("intent", "fleet")]
+        params = mock.MagicMock()
+
+        with mock.patch.object(main.git_token_cache, 'invalidate') as mock_invalidate:
+            self.assertEqual(main.load_intent_files(params), ("intent", "fleet"))
+            mock_invalidate.assert_called_once()
+
+        mock_retrieve.assert_called_with(params, "fresh-token", True, False)
+
+    def test_cluster_intent_reader_stream_source_of_truth(self):
+        reader = main.ClusterIntentReader("github.com/org/repo.git", "main", "intent.csv", "token")
+        resp = mock.MagicMock(status_code=200, encoding=None)
+        # Chunk boundaries fall inside rows and inside a quoted field spanning lines
+        resp.iter_content.return_value = iter(["store_id,lab", "els\nstore1,\"a=1,\nb=2\"\r\nsto", "re2,c=3"])
+
+        with mock.patch('src.main.http_session.get', return_value=resp) as mock_get:
+            rows = list(main.csv.DictReader(reader.stream_source_of_truth()))
+
+        self.assertEqual(mock_get.call_args.kwargs["stream"], True)
+        self.assertEqual(rows, [{"store_id": "store1", "labels": "a=1,\nb=2"}, {"store_id": "store2", "labels": "c=3"}])
+        resp.close.assert_called()
+
+    def test_cluster_intent_reader_stream_source_of_truth_matches_buffered(self):
+        reader = main.ClusterIntentReader("github.com/org/repo.git", "main", "intent.csv", "token")
+        # Only "\n" ends a row, other line boundaries of str.splitlines belong to the fields
+        content = "store_id,labels,node_count\r\ns1,a=1,3\ns2,a\x0cb,3\ns3,c\u2028d\x1ce\x85f,3\n"
+        buffered_rows = list(main.csv.DictReader(main.io.StringIO(content)))
+
+        for chunk_size in (1, 7, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                resp = mock.MagicMock(status_code=200, encoding="utf-8")
+                resp.iter_content.side_effect = lambda chunk_size, decode_unicode: iter(
+                    [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+                )
+
+                with mock.patch('src.main.http_session.get', return_value=resp):
+                    rows = list(main.csv.DictReader(reader.stream_source_of_truth(chunk_size=chunk_size)))
+
+                self.assertEqual(rows, buffered_rows)
+                self.assertEqual(rows[1], {"store_id": "s2", "labels": "a\x0cb", "node_count": "3"})
+
+    def test_cluster_intent_reader_stream_source_of_truth_error(self):
+        reader = main.ClusterIntentReader("github.com/org/repo.git", "main", "intent.csv", "token")
+        resp = mock.MagicMock(status_code=403)
+
+        with mock.patch('src.main.http_session.get', return_value=resp):
+            with self.assertRaises(main.SourceOfTruthAuthError):
+                reader.stream_source_of_truth()
+
+        resp.close.assert_called_once()
+
+    def test_cluster_intent_reader_local_repository(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "intent.csv"), "w") as f:
+                f.write("store_id\nstore1\nstore2\n")
+
+            reader = main.ClusterIntentReader(f"file://{directory}", "main", "intent.csv", None)
+
+            self.assertEqual(reader.retrieve_source_of_truth(), "store_id\nstore1\nstore2\n")
+            self.assertEqual(list(reader.stream_source_of_truth()), ["store_id\n", "store1\n", "store2\n"])
+
+            missing_reader = main.ClusterIntentReader(f"file://{directory}", "main", "missing.csv", None)
+            with self.assertRaisesRegex(Exception, "status code \\(404\\)"):
+                missing_reader.retrieve_source_of_truth()
+
+    @mock.patch('src.main.get_git_token_from_secrets_manager')
+    @mock.patch('src.main.ClusterIntentReader')
+    def test_read_intent_data_streaming(self, mock_reader_cls, mock_get_token):
+        mock_get_token.return_value = "mock-token"
+        main_csv_lines = [
+            "store_id,fleet_project_id,machine_project_id,location,cluster_name,node_count,cluster_ipv4_cidr,services_ipv4_cidr,external_load_balancer_ipv4_address_pools,sync_repo,sync_branch,sync_dir,secrets_project_id,git_token_secrets_manager_name,cluster_version\n",
+            "store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.12.0\n",
+            "store2,project1,machine1,us-central1,cluster2,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.12.0\n",
+        ]
+        intent_reader = mock.MagicMock()
+        intent_reader.stream_source_of_truth.return_value = iter(main_csv_lines)
+        fleet_reader = mock.MagicMock()
+        fleet_reader.retrieve_source_of_truth.return_value = "fleet_project_id,cluster_version\n"
+        mock_reader_cls.side_effect = lambda repo, branch, path, token, cache=None, timeout=None: intent_reader if path == "intent.csv" else fleet_reader
+
+        params = mock.MagicMock()
+        params.source_of_truth_path = "intent.csv"
+        params.source_of_truth_paths = ["intent.csv"]
+        params.fleet_config_path = "fleet.csv"
+        params.source_of_truth_streaming = True
+
+        result = main.read_intent_data(params, 'fleet_project_id')
+
+        intent_reader.retrieve_source_of_truth.assert_not_called()
+        self.assertEqual(set(result[('project1', 'us-central1')]), {"store1", "store2"})
+
+    @mock.patch('src.main.get_git_token_from_secrets_manager')
+    @mock.patch('src.main.ClusterIntentReader')
+    def test_read_intent_data_shards(self, mock_reader_cls, mock_get_token):
+        """Test that shards are merged and a store_id defined in two shards is only kept once."""
+        mock_get_token.return_value = "mock-token"
+        header = "store_id,fleet_project_id,machine_project_id,location,cluster_name,node_count,cluster_ipv4_cidr,services_ipv4_cidr,external_load_balancer_ipv4_address_pools,sync_repo,sync_branch,sync_dir,secrets_project_id,git_token_secrets_manager_name,cluster_version\n"
+        central_csv = header + "store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.12.0\n"
+        east_csv = (header
+            + "store2,project1,machine1,us-east4,cluster2,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.12.0\n"
+            + "store1,project1,machine1,us-east4,cluster3,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.12.0\n")
+        mock_intent_readers(mock_reader_cls, {
+            "central.csv": [central_csv],
+            "east.csv": [east_csv],
+            "fleet.csv": ["fleet_project_id,cluster_version\n"],
+        })
+
+        params = mock.MagicMock()
+        params.source_of_truth_paths = ["central.csv", "east.csv"]
+        params.fleet_config_path = "fleet.csv"
+        params.source_of_truth_streaming = False
+
+        with self.assertLogs(main.logger, level='ERROR') as logs:
+            result = main.read_intent_data(params, 'fleet_project_id')
+
+        self.assertEqual(result[('project1', 'us-central1')]['store1'].cluster_name, "cluster1")
+        self.assertEqual(list(result[('project1', 'us-east4')]), ["store2"])
+        self.assertIn("[CONFIG_VALIDATION_FAILED][cluster:cluster3]", logs.output[0])
+
+    @mock.patch('src.main.get_git_token_from_secrets_manager')
+    @mock.patch('src.main.ClusterIntentReader')
+    def test_read_intent_data_reports_invalid_row_line(self, mock_reader_cls, mock_get_token):
+        mock_get_token.return_value = "mock-token"
+        main_csv = """store_id,fleet_project_id,machine_project_id,location,cluster_name,node_count,cluster_ipv4_cidr,services_ipv4_cidr,external_load_balancer_ipv4_address_pools,sync_repo,sync_branch,sync_dir,secrets_project_id,git_token_secrets_manager_name,cluster_version
+store1,project1,machine1,us-central1,cluster1,3,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.12.0
+store2,project1,machine1,us-central1,cluster2,three,10.0.0.0/16,10.1.0.0/16,1.1.1.1-1.1.1.10,repo1,main,.,sec-proj,git-sec,1.12.0
+"""
+        mock_intent_readers(mock_reader_cls, {"intent.csv": [main_csv], "fleet.csv": ["fleet_project_id,cluster_version\n"]})
+
+        params = mock.MagicMock()
+        params.source_of_truth_paths = ["intent.csv"]
+        params.fleet_config_path = "fleet.csv"
+        params.source_of_truth_streaming = False
+
+        with self.assertLogs(main.logger, level='ERROR') as logs:
+            result = main.read_intent_data(params, 'fleet_project_id')
+
+        self.assertEqual(list(result[('project1', 'us-central1')]), ["store1"])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("[CONFIG_VALIDATION_FAILED][cluster:cluster2] Invalid row detected in source of truth at line 3", logs.output[0])
+
+class AsyncPager:
+    """Stands in for the pagers returned by the list methods of async GAPIC clients."""
+
+    def __init__(self, items):
+        self.items = items
+
+    async def __aiter__(self):
+        for item in self.items:
+            yield item
+
+def create_async_params(**overrides):
+    params = mock.MagicMock()
+    params.project_id = "test-host-project"
+    params.execution_mode = "asyncio"
+    params.async_max_concurrency = 10
+    params.build_trigger_rate = 100
+    params.build_trigger_burst = 10
+    params.max_builds_in_flight = 5
+    params.adaptive_concurrency = False
+    params.max_retries = 0
+    params.cloud_build_trigger = "projects/p/locations/l/triggers/t"
+    params.state_store_uri = None
+    params.full_sweep_interval = 1
+    params.verify_operation_max_age_seconds = 3600
+    params.source_of_truth_retry_backoff = 0.5
+    params.source_of_truth_retries = 3
+    params.git_token_cache_ttl_seconds = 300
+    params.intent_memo_max_entries = 100000
+    params.source_of_truth_cache_dir = None
+    params.zone_cache_ttl_seconds = 60
+    params.trigger_id_cache_ttl_seconds = 600
+    params.run_deadline_seconds = None
+    for key, value in overrides.items():
+        setattr(params, key, value)
+    return params
+
+def create_async_clients(mock_async_clients_cls):
+    async_clients = mock_async_clients_cls.return_value
+    async_clients.close = mock.AsyncMock()
+    for client in ("edgecontainer", "edgenetwork", "gkehub", "hardware_management", "cloudbuild", "monitoring"):
+        getattr(async_clients, f"get_{client}_client").return_value = mock.AsyncMock()
+    async_clients.get_edgecontainer_client.return_value.common_location_path = lambda project, location: f"projects/{project}/locations/{location}"
+    async_clients.get_edgenetwork_client.return_value.common_location_path = lambda project, location: f"projects/{project}/locations/{location}"
+    return async_clients
+
+class TestAsyncExecutionMode(unittest.TestCase):
+
+    def setUp(self):
+        main.zone_cache.invalidate()
+        main.verify_operations.clear()
+
+    @mock.patch('src.main.AsyncGoogleClients')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher(self, mock_settings, mock_read_intent_data, mock_build_history, mock_async_clients_cls):
+        mock_settings.return_value = create_async_params()
+        mock_build_history.return_value.should_retry_zone_build.return_value = False
+
+        class MockStore:
+            zone_name = None
+            node_count = 1
+            sync_branch = "main"
+            recreate_on_delete = False
+
+            def __init__(self, cluster_name, intent_hash):
+                self.cluster_name = cluster_name
+                self.intent_hash = intent_hash
+
+        mock_read_intent_data.return_value = {
+            ("mach-proj", "us-central1"): {"store1": MockStore("cluster1", "hash1"), "store2": MockStore("cluster2", "hash2")},
+        }
+
+        async_clients = create_async_clients(mock_async_clients_cls)
+        async_clients.get_edgecontainer_client.return_value.list_machines.return_value = AsyncPager([
+            main.edgecontainer.Machine(zone="zone-store1"),
+            main.edgecontainer.Machine(zone="zone-store2", hosted_node="projects/p/locations/l/clusters/cluster2/nodePools/np/nodes/n"),
+        ])
+        async_clients.get_hardware_management_client.return_value.list_zones.return_value = AsyncPager([
+            Zone(name=f"projects/mach-proj/locations/us-central1/zones/{store_id}", globally_unique_id=f"zone-{store_id}", state=Zone.State.READY_FOR_CUSTOMER_FACTORY_TURNUP_CHECKS, cluster_intent_verified=store_id == "store2")
+            for store_id in ("store1", "store2")
+        ])
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 1, sweep complete = True")
+
+        hw_client = async_clients.get_hardware_management_client.return_value
+        hw_client.signal_zone_state.assert_awaited_once()
+        self.assertEqual(hw_client.signal_zone_state.call_args.kwargs["request"].name, "projects/mach-proj/locations/us-central1/zones/store1")
+        self.assertEqual(list(main.verify_operations.get_pending()), ["projects/mach-proj/locations/us-central1/zones/store1"])
+        cb_client = async_clients.get_cloudbuild_client.return_value
+        cb_client.run_build_trigger.assert_awaited_once()
+        self.assertEqual(cb_client.run_build_trigger.call_args.kwargs["request"].source.substitutions["_ZONE"], "zone-store1")
+        # edgecontainer and hwm connectivity
+        self.assertEqual(async_clients.get_monitoring_client.return_value.create_time_series.await_count, 2)
+        async_clients.close.assert_awaited_once()
+
+    @mock.patch('src.main.AsyncGoogleClients')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_lists_swept_locations_with_builds_to_retry(self, mock_settings, mock_read_intent_data, mock_build_history, mock_async_clients_cls):
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        state_store = LocalFileStateStore(state_dir.name)
+        state_store.save("zone_watcher_sweep_cursor", {"resume_from": {}, "completed": ["mach-proj/us-central1", "mach-proj/us-east1"]})
+        mock_settings.return_value = create_async_params(state_store_uri=state_dir.name, run_deadline_seconds=60)
+        mock_build_history.return_value.get_retriable_intent_hashes.return_value = {"hash1"}
+        mock_build_history.return_value.should_retry_zone_build.return_value = True
+        mock_build_history.return_value.get_summary.return_value = None
+
+        class MockStore:
+            zone_name = None
+            node_count = 1
+            sync_branch = "main"
+            recreate_on_delete = False
+            cluster_name = "cluster1"
+
+            def __init__(self, intent_hash):
+                self.intent_hash = intent_hash
+
+        mock_read_intent_data.return_value = {
+            ("mach-proj", "us-central1"): {"store1": MockStore("hash1")},
+            ("mach-proj", "us-east1"): {"store2": MockStore("hash2")},
+        }
+        # Nothing changed since the previous run
+        snapshot = IntentSnapshot(state_store, "zone_watcher")
+        snapshot.save(mock_read_intent_data.return_value, snapshot.diff(mock_read_intent_data.return_value), set())
+
+        async_clients = create_async_clients(mock_async_clients_cls)
+        ec_client = async_clients.get_edgecontainer_client.return_value
+        ec_client.list_machines.return_value = AsyncPager([main.edgecontainer.Machine(zone="zone-store1")])
+        async_clients.get_hardware_management_client.return_value.list_zones.return_value = AsyncPager([
+            Zone(name="projects/mach-proj/locations/us-central1/zones/store1", globally_unique_id="zone-store1", state=Zone.State.READY_FOR_CUSTOMER_FACTORY_TURNUP_CHECKS, cluster_intent_verified=True)
+        ])
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 1, sweep complete = True")
+
+        # Only the location with a build to retry is listed, once the build history is loaded
+        self.assertEqual([c.args[0].parent for c in ec_client.list_machines.call_args_list], ["projects/mach-proj/locations/us-central1"])
+        cb_client = async_clients.get_cloudbuild_client.return_value
+        self.assertEqual(cb_client.run_build_trigger.call_args.kwargs["request"].source.substitutions["_ZONE"], "zone-store1")
+
+    @mock.patch('src.main.AsyncGoogleClients')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_skips_locations_whose_zones_could_not_be_listed(self, mock_settings, mock_read_intent_data, mock_build_history, mock_async_clients_cls):
+        mock_settings.return_value = create_async_params()
+        mock_build_history.return_value.get_retriable_intent_hashes.return_value = set()
+        mock_read_intent_data.return_value = {
+            ("mach-proj", "us-central1"): {"store1": mock.MagicMock(intent_hash="hash1")},
+        }
+
+        async_clients = create_async_clients(mock_async_clients_cls)
+        async_clients.get_edgecontainer_client.return_value.list_machines.return_value = AsyncPager([])
+        async_clients.get_hardware_management_client.return_value.list_zones.side_effect = main.exceptions.ServiceUnavailable("HWM unavailable")
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = False")
+
+    @mock.patch('src.main.AsyncGoogleClients')
+    @mock.patch('src.main.BuildHistory')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_zone_watcher_skips_locations_whose_machines_could_not_be_listed(self, mock_settings, mock_read_intent_data, mock_build_history, mock_async_clients_cls):
+        mock_settings.return_value = create_async_params()
+        mock_build_history.return_value.get_retriable_intent_hashes.return_value = set()
+        mock_read_intent_data.return_value = {
+            ("mach-proj", "us-central1"): {"store1": mock.MagicMock(intent_hash="hash1")},
+        }
+
+        async_clients = create_async_clients(mock_async_clients_cls)
+        async_clients.get_edgecontainer_client.return_value.list_machines.side_effect = main.exceptions.ServiceUnavailable("EdgeContainer unavailable")
+        async_clients.get_hardware_management_client.return_value.list_zones.return_value = AsyncPager([])
+
+        self.assertEqual(main.zone_watcher(mock.MagicMock()), "total zones triggered = 0, sweep complete = False")
+
+    @mock.patch('src.main.AsyncGoogleClients')
+    @mock.patch('src.main.read_intent_data')
+    @mock.patch('src.main.WatcherSettings')
+    def test_cluster_watcher(self, mock_settings, mock_read_intent_data, mock_async_clients_cls):
+        mock_settings.return_value = create_async_params()
+
+        class MockStore:
+            zone_name = None
+            fleet_project_id = "fleet-proj"
+            machine_project_id = "mach-proj"
+            location = "us-central1"
+            sync_branch = "main"
+            maintenance_window_recurrence = None
+            maintenance_window_start = None
+            maintenance_window_end = None
+            subnet_vlans = "100"
+            labels = "env=prod"
+
+            def __init__(self, cluster_name, intent_hash):
+                self.cluster_name = cluster_name
+                self.intent_hash = intent_hash
+
+        mock_read_intent_data.return_value = {
+            ("fleet-proj", "us-central1"): {"store1": MockStore("cluster1", "hash1"), "store2": MockStore("cluster2", "hash2")},
+        }
+
+        async_clients = create_async_clients(mock_async_clients_cls)
+        async_clients.get_hardware_management_client.return_value.list_zones.return_value = AsyncPager([
+            Zone(name=f"projects/mach-proj/locations/us-central1/zones/{store_id}", globally_unique_id=f"zone-{store_id}")
+            for store_id in ("store1", "store2")
+        ])
+        async_clients.get_gkehub_client.return_value.list_memberships.return_value = AsyncPager([
+            gkehub_v1.Membership(name="projects/fleet-proj/locations/global/memberships/cluster1", labels={"env": "prod"}),
+            gkehub_v1.Membership(name="projects/fleet-proj/locations/global/memberships/cluster2", labels={"env": "dev"}),
+        ])
+        clusters = []
+        for store_id in ("store1", "store2"):
+            cluster = main.edgecontainer.Cluster()
+            cluster.control_plane.local.node_location = f"zone-{store_id}"
+            clusters.append(cluster)
+        async_clients.get_edgecontainer_client.return_value.list_clusters.return_value = AsyncPager(clusters)
+        async_clients.get_edgenetwork_client.return_value.list_subnets.side_effect = lambda request: AsyncPager([main.edgenetwork.Subnet(vlan_id=100)])
+
+        self.assertEqual(main.cluster_watcher(mock.MagicMock()), "total zones triggered = 1, sweep complete = True")
+
+        # Only the labels of cluster2 differ from the intent
+        cb_client = async_clients.get_cloudbuild_client.return_value
+        cb_client.run_build_trigger.assert_awaited_once()
+        self.assertEqual(cb_client.run_build_trigger.call_args.kwargs["request"].source.substitutions["_ZONE"], "zone-store2")
+        self.assertEqual(async_clients.get_edgenetwork_client.return_value.list_subnets.call_count, 2)
+        async_clients.close.assert_awaited_once()
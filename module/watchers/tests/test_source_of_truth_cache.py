@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from src.source_of_truth_cache import SourceOfTruthCache
+
+class TestSourceOfTruthCache(unittest.TestCase):
+
+    def test_put_and_get(self):
+        cache = SourceOfTruthCache()
+        cache.put("https://example.com/intent.csv", '"etag-1"', None, "a,b\n1,2\n")
+
+        entry = cache.get("https://example.com/intent.csv")
+
+        self.assertEqual(entry.body, "a,b\n1,2\n")
+        self.assertEqual(entry.get_conditional_headers(), {"If-None-Match": '"etag-1"'})
+        self.assertIsNone(cache.get("https://example.com/other.csv"))
+
+    def test_put_without_validators_is_ignored(self):
+        cache = SourceOfTruthCache()
+        cache.put("https://example.com/intent.csv", None, None, "a,b\n")
+
+        self.assertIsNone(cache.get("https://example.com/intent.csv"))
+
+    def test_stats(self):
+        cache = SourceOfTruthCache()
+        cache.put("https://example.com/intent.csv", '"etag-1"', None, "abcd")
+        cache.record_miss()
+        cache.record_hit(cache.get("https://example.com/intent.csv"))
+
+        self.assertEqual(cache.get_stats(), {"hits": 1, "misses": 1, "bytes_saved": 4})
+
+    def test_spill_to_disk(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            url = "https://gitlab.com/api/v4/projects/org%2Frepo/repository/files/intent.csv/raw?ref=main&private_token=secret"
+            SourceOfTruthCache(spill_dir).put(url, None, "Wed, 21 Oct 2015 07:28:00 GMT", "a,b\n")
+
+            # The URL carries a token, so it must never appear in the file name
+            for file_name in os.listdir(spill_dir):
+                self.assertNotIn("secret", file_name)
+
+            entry = SourceOfTruthCache(spill_dir).get(url)
+
+            self.assertEqual(entry.body, "a,b\n")
+            self.assertEqual(entry.get_conditional_headers(), {"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"})
+
+if __name__ == '__main__':
+    unittest.main()
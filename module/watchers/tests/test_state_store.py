@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.state_store import GCSStateStore, LocalFileStateStore, get_state_store
+
+class TestStateStore(unittest.TestCase):
+
+    def test_get_state_store(self):
+        self.assertIsNone(get_state_store(None))
+        self.assertIsNone(get_state_store(""))
+
+        store = get_state_store("gs://my-bucket/acp/state")
+        self.assertIsInstance(store, GCSStateStore)
+        self.assertEqual(store.bucket, "my-bucket")
+        self.assertEqual(store.prefix, "acp/state")
+
+        store = get_state_store("/tmp/acp-state")
+        self.assertIsInstance(store, LocalFileStateStore)
+        self.assertEqual(store.directory, "/tmp/acp-state")
+
+    def test_local_file_state_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = LocalFileStateStore(f"{directory}/state")
+            self.assertIsNone(store.load("snapshot"))
+
+            store.save("snapshot", {"intent_hashes": {"store1": "hash1"}})
+            self.assertEqual(store.load("snapshot"), {"intent_hashes": {"store1": "hash1"}})
+
+    @patch('src.state_store.clients')
+    def test_gcs_state_store(self, mock_clients):
+        mock_blob = MagicMock()
+        mock_blob.exists.return_value = True
+        mock_blob.download_as_text.return_value = '{"a": 1}'
+        mock_bucket = mock_clients.get_storage_client.return_value.bucket.return_value
+        mock_bucket.blob.return_value = mock_blob
+
+        store = GCSStateStore("my-bucket", "/acp/")
+        self.assertEqual(store.load("snapshot"), {"a": 1})
+        store.save("snapshot", {"a": 2})
+
+        mock_bucket.blob.assert_called_with("acp/snapshot.json")
+        mock_blob.upload_from_string.assert_called_once_with('{"a": 2}', content_type="application/json")
+
+    @patch('src.state_store.clients')
+    def test_gcs_state_store_missing(self, mock_clients):
+        mock_blob = mock_clients.get_storage_client.return_value.bucket.return_value.blob.return_value
+        mock_blob.exists.return_value = False
+
+        self.assertIsNone(GCSStateStore("my-bucket").load("snapshot"))
+
+if __name__ == '__main__':
+    unittest.main()
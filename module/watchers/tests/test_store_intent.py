@@ -0,0 +1,69 @@
+import dataclasses
+import unittest
+from src.cluster_intent_model import SourceOfTruthModel
+from src.store_intent import StoreIntent
+
+def create_model(**overrides) -> SourceOfTruthModel:
+    row = {
+        "store_id": "store1",
+        "zone_name": "",
+        "machine_project_id": "machine-project",
+        "fleet_project_id": "fleet-project",
+        "cluster_name": "cluster1",
+        "location": "us-central1",
+        "node_count": "3",
+        "cluster_ipv4_cidr": "10.0.0.0/17",
+        "services_ipv4_cidr": "10.1.0.0/20",
+        "external_load_balancer_ipv4_address_pools": "10.100.20.100-10.100.20.110",
+        "sync_repo": "https://github.com/org/repo",
+        "sync_branch": "main",
+        "sync_dir": "clusters/cluster1",
+        "secrets_project_id": "secrets-project",
+        "git_token_secrets_manager_name": "git-sec",
+        "cluster_version": "1.12.0",
+        "maintenance_exclusion_name_1": "holidays",
+        "maintenance_exclusion_start_1": "2024-12-20T00:00:00Z",
+        "maintenance_exclusion_end_1": "2025-01-05T00:00:00Z",
+        "maintenance_exclusion_name_2": "incomplete",
+        "recreate_on_delete": "true",
+    }
+    row.update(overrides)
+    edge_zone = SourceOfTruthModel.model_validate(row)
+    edge_zone.intent_hash = "hash1"
+    return edge_zone
+
+class TestStoreIntent(unittest.TestCase):
+
+    def test_from_model(self):
+        intent = StoreIntent.from_model(create_model())
+
+        self.assertEqual(intent.store_id, "store1")
+        self.assertIsNone(intent.zone_name)
+        self.assertEqual(intent.machine_project_id, "machine-project")
+        self.assertEqual(intent.location, "us-central1")
+        self.assertEqual(intent.node_count, 3)
+        self.assertEqual(intent.cluster_version, "1.12.0")
+        self.assertEqual(intent.intent_hash, "hash1")
+        self.assertTrue(intent.recreate_on_delete)
+
+    def test_only_complete_maintenance_exclusions_are_kept(self):
+        intent = StoreIntent.from_model(create_model())
+
+        self.assertEqual(intent.get_maintenance_exclusions(), (("holidays", "2024-12-20T00:00:00Z", "2025-01-05T00:00:00Z"),))
+
+    def test_is_immutable(self):
+        intent = StoreIntent.from_model(create_model())
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            intent.node_count = 5
+        self.assertFalse(hasattr(intent, "__dict__"))
+
+    def test_shared_values_are_interned(self):
+        # Build the values at runtime so they are distinct string objects
+        intent1 = StoreIntent.from_model(create_model(location="".join(["us-", "central1"])))
+        intent2 = StoreIntent.from_model(create_model(store_id="store2", location="".join(["us-", "central1"])))
+
+        self.assertIs(intent1.location, intent2.location)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.state_store import LocalFileStateStore
+from src.sweep_cursor import RunDeadline, SweepCursor
+
+def create_stores(*store_ids):
+    return {store_id: MagicMock(intent_hash=f"hash-{store_id}") for store_id in store_ids}
+
+class TestRunDeadline(unittest.TestCase):
+
+    def test_without_budget_never_expires(self):
+        self.assertFalse(RunDeadline(None).expired())
+
+    @patch('src.sweep_cursor.time')
+    def test_expires_after_budget(self, mock_time):
+        mock_time.monotonic.return_value = 100.0
+        deadline = RunDeadline(30)
+
+        mock_time.monotonic.return_value = 129.0
+        self.assertFalse(deadline.expired())
+        mock_time.monotonic.return_value = 130.0
+        self.assertTrue(deadline.expired())
+
+class TestSweepCursor(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.state_store = LocalFileStateStore(self.directory.name)
+        self.intent = {
+            ("proj", "loc1"): create_stores("store3", "store1", "store2"),
+            ("proj", "loc2"): create_stores("store5", "store4"),
+        }
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_cursor(self, budget_seconds=30):
+        return SweepCursor(self.state_store, "zone_watcher", RunDeadline(budget_seconds))
+
+    def test_priority_stores_and_their_locations_go_first(self):
+        arranged = self.create_cursor().arrange(self.intent, {"store4"}, full_sweep=True)
+
+        self.assertEqual(list(arranged), [("proj", "loc2"), ("proj", "loc1")])
+        self.assertEqual(list(arranged[("proj", "loc2")]), ["store4", "store5"])
+        self.assertEqual(list(arranged[("proj", "loc1")]), ["store1", "store2", "store3"])
+
+    def test_resumes_where_the_previous_run_stopped(self):
+        cursor = self.create_cursor()
+        arranged = cursor.arrange(self.intent, set(), full_sweep=True)
+        cursor.skip(("proj", "loc1"), ["store2", "store3"])
+        cursor.save(arranged)
+
+        self.assertFalse(cursor.complete)
+        self.assertEqual(cursor.get_unprocessed(), {"store2", "store3"})
+
+        cursor = self.create_cursor()
+        arranged = cursor.arrange(self.intent, {"store5"}, full_sweep=True)
+
+        # loc2 was swept completely, only its priority store is processed again
+        self.assertEqual(arranged, {
+            ("proj", "loc2"): {"store5": self.intent[("proj", "loc2")]["store5"]},
+            ("proj", "loc1"): {store_id: self.intent[("proj", "loc1")][store_id] for store_id in ("store2", "store3")},
+        })
+
+    def test_complete_sweep_starts_over(self):
+        cursor = self.create_cursor()
+        arranged = cursor.arrange(self.intent, set(), full_sweep=True)
+        cursor.skip(("proj", "loc2"), ["store5"])
+        cursor.save(arranged)
+
+        cursor = self.create_cursor()
+        arranged = cursor.arrange(self.intent, set(), full_sweep=True)
+        self.assertEqual(list(arranged), [("proj", "loc2")])
+        cursor.save(arranged)
+        self.assertTrue(cursor.complete)
+
+        arranged = self.create_cursor().arrange(self.intent, set(), full_sweep=True)
+        self.assertEqual(arranged.keys(), self.intent.keys())
+
+    def test_skipped_priority_stores_do_not_hold_the_cursor(self):
+        cursor = self.create_cursor()
+        arranged = cursor.arrange(self.intent, {"store4"}, full_sweep=True)
+        cursor.skip(("proj", "loc2"), ["store4"])
+        cursor.save(arranged)
+
+        arranged = self.create_cursor().arrange(self.intent, {"store4"}, full_sweep=True)
+
+        self.assertEqual(arranged, {("proj", "loc2"): {"store4": self.intent[("proj", "loc2")]["store4"]}})
+
+    def test_ignores_cursor_without_deadline(self):
+        cursor = self.create_cursor()
+        arranged = cursor.arrange(self.intent, set(), full_sweep=True)
+        cursor.skip(("proj", "loc1"), ["store3"])
+        cursor.save(arranged)
+
+        arranged = self.create_cursor(budget_seconds=None).arrange(self.intent, set(), full_sweep=True)
+
+        self.assertEqual(arranged.keys(), self.intent.keys())
+
+if __name__ == '__main__':
+    unittest.main()
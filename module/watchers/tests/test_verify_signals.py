@@ -0,0 +1,119 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from google.api_core import exceptions
+from src.state_store import LocalFileStateStore
+from src.verify_signals import VerifyOperationLog, VerifySignalDispatcher
+
+ZONE = "projects/mach-proj/locations/us-central1/zones/store1"
+
+def create_operation(name):
+    operation = MagicMock()
+    operation.operation.name = name
+    return operation
+
+class TestVerifyOperationLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.state_store = LocalFileStateStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pending_operations_survive_across_runs(self):
+        operation_log = VerifyOperationLog()
+        operation_log.record(ZONE, "operations/op1")
+        operation_log.save(self.state_store)
+
+        next_run = VerifyOperationLog()
+        next_run.load(self.state_store)
+
+        self.assertTrue(next_run.is_pending(ZONE))
+        self.assertEqual(next_run.get_pending(), {ZONE: "operations/op1"})
+
+    def test_keeps_in_memory_operations_without_state(self):
+        operation_log = VerifyOperationLog()
+        operation_log.record(ZONE, "operations/op1")
+
+        operation_log.load(None)
+        operation_log.load(self.state_store)
+
+        self.assertTrue(operation_log.is_pending(ZONE))
+
+    @patch('src.verify_signals.time')
+    def test_forgets_expired_operations(self, mock_time):
+        mock_time.time.return_value = 1000.0
+        operation_log = VerifyOperationLog(max_age_seconds=60)
+        operation_log.record(ZONE, "operations/op1")
+
+        mock_time.time.return_value = 1060.0
+
+        self.assertFalse(operation_log.is_pending(ZONE))
+        self.assertEqual(operation_log.get_pending(), {})
+
+class TestVerifySignalDispatcher(unittest.TestCase):
+
+    def create_dispatcher(self, operation_log, signal=None, get_operation=None, on_complete=None):
+        return VerifySignalDispatcher(
+            signal or MagicMock(return_value=create_operation("operations/op1")),
+            get_operation or MagicMock(),
+            operation_log,
+            on_complete or MagicMock(),
+            max_in_flight=4,
+        )
+
+    def test_signals_zones_concurrently_and_records_operations(self):
+        operation_log = VerifyOperationLog()
+        zones = [f"projects/p/locations/l/zones/store{i}" for i in range(8)]
+        signal = MagicMock(side_effect=lambda zone: create_operation(f"operations/{zone.rsplit('/', 1)[1]}"))
+
+        with self.create_dispatcher(operation_log, signal=signal) as dispatcher:
+            futures = [dispatcher.submit(zone) for zone in zones]
+
+        self.assertTrue(all(future.result() for future in futures))
+        self.assertEqual(operation_log.get_pending(), {zone: f"operations/{zone.rsplit('/', 1)[1]}" for zone in zones})
+
+    def test_skips_pending_zones(self):
+        operation_log = VerifyOperationLog()
+        operation_log.record(ZONE, "operations/op1")
+        signal = MagicMock()
+
+        with self.create_dispatcher(operation_log, signal=signal) as dispatcher:
+            self.assertIsNone(dispatcher.submit(ZONE))
+
+        signal.assert_not_called()
+
+    def test_failed_signals_are_not_recorded(self):
+        operation_log = VerifyOperationLog()
+        signal = MagicMock(side_effect=exceptions.ServiceUnavailable("unavailable"))
+
+        with self.create_dispatcher(operation_log, signal=signal) as dispatcher:
+            self.assertFalse(dispatcher.submit(ZONE).result())
+
+        self.assertFalse(operation_log.is_pending(ZONE))
+
+    def test_refresh_completes_done_operations_only(self):
+        operation_log = VerifyOperationLog()
+        operation_log.record("zone-done", "operations/done")
+        operation_log.record("zone-running", "operations/running")
+        operation_log.record("zone-gone", "operations/gone")
+        operation_log.record("zone-error", "operations/error")
+
+        def get_operation(name):
+            if name == "operations/gone":
+                raise exceptions.NotFound("gone")
+            if name == "operations/error":
+                raise exceptions.ServiceUnavailable("unavailable")
+            return MagicMock(done=name == "operations/done")
+
+        on_complete = MagicMock()
+        with self.create_dispatcher(operation_log, get_operation=get_operation, on_complete=on_complete) as dispatcher:
+            completed = dispatcher.refresh()
+
+        self.assertCountEqual(completed, ["zone-done", "zone-gone"])
+        self.assertCountEqual([c.args[0] for c in on_complete.call_args_list], ["zone-done", "zone-gone"])
+        self.assertEqual(operation_log.get_pending(), {"zone-running": "operations/running", "zone-error": "operations/error"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import unittest
+from unittest import mock
+from pydantic import ValidationError
+from src.watcher_settings import WatcherSettings
+
+REQUIRED_ENV = {
+    "GOOGLE_CLOUD_PROJECT": "test-project",
+    "REGION": "us-central1",
+    "GIT_SECRET_ID": "git-sec",
+    "SOURCE_OF_TRUTH_REPO": "github.com/org/repo.git",
+    "SOURCE_OF_TRUTH_BRANCH": "main",
+    "SOURCE_OF_TRUTH_PATH": "intent.csv",
+    "FLEET_CONFIG_PATH": "fleet.csv",
+    "CB_TRIGGER_NAME": "trigger",
+}
+
+def create_settings(**env) -> WatcherSettings:
+    with mock.patch.dict(os.environ, {**REQUIRED_ENV, **env}, clear=True):
+        return WatcherSettings()
+
+class TestWatcherSettings(unittest.TestCase):
+
+    def test_intent_memo_max_entries(self):
+        self.assertEqual(create_settings().intent_memo_max_entries, 100000)
+        self.assertEqual(create_settings(INTENT_MEMO_MAX_ENTRIES="10").intent_memo_max_entries, 10)
+
+        for value in ("0", "many"):
+            with self.assertRaises(ValidationError):
+                create_settings(INTENT_MEMO_MAX_ENTRIES=value)
+
+    def test_git_token_cache_ttl_seconds(self):
+        self.assertEqual(create_settings().git_token_cache_ttl_seconds, 300)
+        self.assertEqual(create_settings(GIT_TOKEN_CACHE_TTL_SECONDS="30.5").git_token_cache_ttl_seconds, 30.5)
+
+        for value in ("0", "-1", "five minutes"):
+            with self.assertRaises(ValidationError):
+                create_settings(GIT_TOKEN_CACHE_TTL_SECONDS=value)
+
+    def test_source_of_truth_download_settings(self):
+        params = create_settings(SOURCE_OF_TRUTH_RETRIES="0", SOURCE_OF_TRUTH_CONNECT_TIMEOUT="5", SOURCE_OF_TRUTH_READ_TIMEOUT="30")
+        self.assertEqual(params.source_of_truth_retries, 0)
+        self.assertEqual(params.source_of_truth_retry_backoff, 0.5)
+        self.assertEqual(params.source_of_truth_timeout, (5, 30))
+
+        for name, value in (
+            ("SOURCE_OF_TRUTH_RETRIES", "-1"),
+            ("SOURCE_OF_TRUTH_RETRY_BACKOFF", "slow"),
+            ("SOURCE_OF_TRUTH_CONNECT_TIMEOUT", "0"),
+            ("SOURCE_OF_TRUTH_READ_TIMEOUT", "-5"),
+        ):
+            with self.subTest(name=name), self.assertRaises(ValidationError):
+                create_settings(**{name: value})
+
+    def test_verify_operation_max_age_seconds(self):
+        self.assertEqual(create_settings().verify_operation_max_age_seconds, 3600)
+
+        for value in ("0", "an hour"):
+            with self.assertRaises(ValidationError):
+                create_settings(VERIFY_OPERATION_MAX_AGE_SECONDS=value)
+
+    def test_build_history_max_pending_age_seconds(self):
+        self.assertEqual(create_settings().build_history_max_pending_age_seconds, 86400)
+        self.assertEqual(create_settings(BUILD_HISTORY_MAX_PENDING_AGE_SECONDS="600").build_history_max_pending_age_seconds, 600)
+
+        for value in ("0", "a day"):
+            with self.assertRaises(ValidationError):
+                create_settings(BUILD_HISTORY_MAX_PENDING_AGE_SECONDS=value)
+
+    def test_zone_cache_ttl_seconds(self):
+        self.assertEqual(create_settings().zone_cache_ttl_seconds, 60)
+        # 0 disables the cache
+        self.assertEqual(create_settings(ZONE_CACHE_TTL_SECONDS="0").zone_cache_ttl_seconds, 0)
+
+        for value in ("-1", "a minute"):
+            with self.assertRaises(ValidationError):
+                create_settings(ZONE_CACHE_TTL_SECONDS=value)
+
+    def test_trigger_id_cache_ttl_seconds(self):
+        self.assertEqual(create_settings().trigger_id_cache_ttl_seconds, 600)
+        # 0 disables the cache
+        self.assertEqual(create_settings(TRIGGER_ID_CACHE_TTL_SECONDS="0").trigger_id_cache_ttl_seconds, 0)
+
+        for value in ("-1", "ten minutes"):
+            with self.assertRaises(ValidationError):
+                create_settings(TRIGGER_ID_CACHE_TTL_SECONDS=value)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from google.cloud import edgecontainer
+from src.zone_inventory import ZoneInventory
+
+def create_machine(zone: str, cluster_name: str = None) -> edgecontainer.Machine:
+    hosted_node = f"projects/fleet-project/locations/us-central1/clusters/{cluster_name}/nodePools/pool/nodes/node" if cluster_name else ""
+    return edgecontainer.Machine(zone=zone, hosted_node=hosted_node)
+
+class TestZoneInventory(unittest.TestCase):
+
+    def test_add_machines(self):
+        inventory = ZoneInventory()
+        inventory.add_machines("machine-project", "us-central1", [
+            create_machine("zone1"),
+            create_machine("zone1"),
+            create_machine("zone1", "cluster1"),
+            create_machine("zone2", "cluster2"),
+        ])
+
+        self.assertIn("zone1", inventory)
+        self.assertNotIn("zone3", inventory)
+        self.assertEqual(inventory.get_free_machine_count("zone1"), 2)
+        self.assertEqual(inventory.get_free_machine_count("zone2"), 0)
+        self.assertTrue(inventory.has_cluster("zone1", "cluster1"))
+        self.assertFalse(inventory.has_cluster("zone1", "cluster2"))
+
+    def test_whitespace_hosted_node_is_free(self):
+        inventory = ZoneInventory()
+        inventory.add_machines("machine-project", "us-central1", [edgecontainer.Machine(zone="zone1", hosted_node="  ")])
+
+        self.assertEqual(inventory.get_free_machine_count("zone1"), 1)
+
+    def test_unprocessed_zones(self):
+        inventory = ZoneInventory()
+        inventory.add_machines("machine-project", "us-central1", [create_machine("zone1"), create_machine("zone2")])
+        inventory.add_machines("machine-project", "us-east1", [create_machine("zone3")])
+
+        inventory.mark_processed("zone1")
+        inventory.mark_processed("zone1")
+
+        self.assertEqual(inventory.get_unprocessed_zones(), {
+            "zone2": ("machine-project", "us-central1"),
+            "zone3": ("machine-project", "us-east1"),
+        })
+
+if __name__ == '__main__':
+    unittest.main()